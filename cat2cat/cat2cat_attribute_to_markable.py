@@ -2,6 +2,8 @@ from lxml import etree
 import sys
 import os
 
+# One parser for all files
+PARSER = etree.XMLParser(ns_clean=True)
 
 
 def take_over_tokens(root, cattree):
@@ -31,8 +33,7 @@ def derive_markables(root, cattree, markable, attribute):
 
 def convert_file(inputfile, markable, attribute):
 
-    parser = etree.XMLParser(ns_clean=True)
-    cattree = etree.parse(inputfile, parser)
+    cattree = etree.parse(inputfile, PARSER)
 
     filename = inputfile.split('/')[-1].rstrip('.xml')
     root = etree.Element('Document', doc_name=filename)
@@ -2,6 +2,9 @@ from lxml import etree
 import sys
 import os
 
+# One parser for all files
+PARSER = etree.XMLParser(ns_clean=True)
+
 
 def create_token_dict(cat):
 
@@ -42,9 +45,8 @@ def add_markables_from_file(markables, newcat, mid):
 
 def create_new_cat_from_files(nf, of, outf):
     
-    parser = etree.XMLParser(ns_clean=True)
-    newcat = etree.parse(nf, parser)
-    origcat = etree.parse(of, parser)
+    newcat = etree.parse(nf, PARSER)
+    origcat = etree.parse(of, PARSER)
     
     
     root = etree.Element('Document', doc_name=outf)
@@ -2,6 +2,9 @@ from lxml import etree
 import sys
 import os
 
+# One parser for all files
+PARSER = etree.XMLParser(ns_clean=True)
+
 
 def get_token_list(mark):
     
@@ -14,8 +17,7 @@ def get_token_list(mark):
 
 def create_annotation_dict(fname):
 
-    parser = etree.XMLParser(ns_clean=True)
-    correctedcat = etree.parse(fname, parser)
+    correctedcat = etree.parse(fname, PARSER)
 
     mark_dict = {}
     markables = correctedcat.find('Markables')
@@ -31,8 +33,7 @@ def create_annotation_dict(fname):
 
 def merge_annotations(originfile, corrected_mark, outfname):
         
-    parser = etree.XMLParser(ns_clean=True)
-    correctedcat = etree.parse(originfile, parser)
+    correctedcat = etree.parse(originfile, PARSER)
                   
     markables = correctedcat.find('Markables')
     for mark in markables:
@@ -2,8 +2,8 @@ from lxml import etree
 import sys
 import os
 
-
-
+# One parser for all files
+PARSER = etree.XMLParser(ns_clean=True)
 
 
 def take_over_tokens(root, cattree):
@@ -46,8 +46,7 @@ def derive_markables(root, cattree):
 
 def convert_file(inputfile):
     
-    parser = etree.XMLParser(ns_clean=True)
-    cattree = etree.parse(inputfile, parser)
+    cattree = etree.parse(inputfile, PARSER)
     
     filename = inputfile.split('/')[-1].rstrip('.xml')
     root = etree.Element('Document', doc_name=filename)
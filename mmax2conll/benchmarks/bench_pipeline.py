@@ -0,0 +1,213 @@
+"""
+Benchmark the stages of converting one synthetic SoNaR or COREA document
+(see `synthetic.py`) separately:
+
+ - read:       reading the words and sentences (`Main.read_SoNaR` or
+               `Main.read_COREA`)
+ - coref_sets: extracting the coreference sets
+               (`MMAXCorefDocumentReader.stream_coref_sets`)
+ - convert:    adding the coreference sets to the sentences
+               (`MMAXCorefConverter`)
+ - write:      formatting the sentences as CoNLL (`CoNLLWriter`)
+ - single_main: all of the above, end to end, including writing the file
+
+Every stage is run `--repeat` times and the fastest time is reported. The
+times can be saved with `--save` and compared with saved times of the same
+document using `--compare`: the benchmark then fails if a stage got more
+than `--max-slowdown` times slower.
+
+Usage: python bench_pipeline.py [--corea] [--words N] [--save times.json]
+                                [--compare times.json] [...]
+"""
+import io
+import os
+import sys
+import json
+import logging
+import tempfile
+from time import perf_counter
+from argparse import ArgumentParser
+
+import mmax2conll.constants as c
+from mmax2conll.main import Main
+from mmax2conll.token_table import WordIndex
+from mmax2conll.mmax_document_readers import MMAXCorefDocumentReader
+from mmax2conll.conll_converters import MMAXCorefConverter
+from mmax2conll.conll_writers import CoNLLWriter
+
+from synthetic import write_document, SONAR_NAME, COREA_NAME
+
+STAGES = ('read', 'coref_sets', 'convert', 'write', 'single_main')
+
+
+def best_time(function, setup, repeat):
+    """
+    Get the fastest of `repeat` runs of `function(*setup())`, where only
+    `function` is timed.
+    """
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = perf_counter()
+        function(*args)
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def benchmark(words_file, coref_file, sentences_file, repeat=5,
+              fill_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS):
+    """
+    Time every stage of converting one document.
+
+    Returns a dictionary from stage to time in seconds.
+    """
+    def read():
+        if sentences_file is None:
+            return Main.read_COREA(words_file)[1]
+        return Main.read_SoNaR(words_file, sentences_file)[1]
+
+    def coref_sets(sentences):
+        word_index = WordIndex.from_sentences(sentences)
+        return word_index, MMAXCorefDocumentReader(
+            words=word_index,
+        ).stream_coref_sets(coref_file)
+
+    def convert(sentences, word_index, chains):
+        MMAXCorefConverter(
+            sentences,
+            fill_spans=fill_spans,
+            word_index=word_index,
+        ).add_data_from_MMAX_chains(chains, span_as_indices=True)
+
+    def read_with_coref_sets():
+        sentences = read()
+        return (sentences, *coref_sets(sentences))
+
+    def converted():
+        sentences = read()
+        convert(sentences, *coref_sets(sentences))
+        return sentences,
+
+    def write(sentences):
+        CoNLLWriter().write(io.StringIO(), 'document', sentences)
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'output.conll')
+        return {
+            'read': best_time(read, tuple, repeat),
+            'coref_sets': best_time(
+                coref_sets,
+                lambda: (read(),),
+                repeat
+            ),
+            'convert': best_time(convert, read_with_coref_sets, repeat),
+            'write': best_time(write, converted, repeat),
+            'single_main': best_time(
+                lambda: Main.single_main(
+                    output_file,
+                    words_file,
+                    coref_file,
+                    sentences_file,
+                    fill_non_consecutive_coref_spans=fill_spans,
+                ),
+                tuple,
+                repeat
+            ),
+        }
+
+
+def compare(times, baseline, max_slowdown):
+    """
+    Print how much faster or slower every stage is than in `baseline`.
+
+    Returns the stages that are more than `max_slowdown` times slower.
+    """
+    slower = []
+    for stage in STAGES:
+        if stage not in baseline:
+            continue
+        ratio = times[stage] / baseline[stage]
+        print(f"{stage:>12}: {ratio:.2f}x the time of the baseline")
+        if ratio > max_slowdown:
+            slower.append(stage)
+    return slower
+
+
+def main(cmdline_args=None):
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--corea', action='store_true',
+                        help="Benchmark a COREA instead of a SoNaR document")
+    parser.add_argument('--words', type=int, default=100000,
+                        help="Number of words of the document")
+    parser.add_argument('--sentence-length', type=int, default=15,
+                        help="Average number of words per sentence")
+    parser.add_argument('--coref-density', type=float, default=0.3,
+                        help="Number of mentions per word")
+    parser.add_argument('--chain-length', type=int, default=4,
+                        help="Average number of mentions per chain")
+    parser.add_argument('--non-consecutive', type=float, default=0.0,
+                        help="Fraction of the longer mentions that skip a"
+                             " word (turns on filling out spans)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Number of runs of every stage")
+    parser.add_argument('--save', help="Save the times to this JSON file")
+    parser.add_argument('--compare',
+                        help="Compare with the times in this JSON file")
+    parser.add_argument('--max-slowdown', type=float, default=1.25,
+                        help="Fail if a stage takes more than this times the"
+                             " time in the file passed to --compare")
+    args = parser.parse_args(cmdline_args)
+
+    # The synthetic documents give warnings about overlapping chains
+    logging.basicConfig(level=logging.ERROR)
+
+    document = {
+        'corea': args.corea,
+        'n_words': args.words,
+        'sentence_length': args.sentence_length,
+        'coref_density': args.coref_density,
+        'chain_length': args.chain_length,
+        'non_consecutive': args.non_consecutive,
+        'seed': args.seed,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)
+        if baseline['document'] != document:
+            parser.error(
+                f"The times in {args.compare} are of another document:"
+                f" {baseline['document']}"
+            )
+
+    name = (COREA_NAME if args.corea else SONAR_NAME).format(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        files = write_document(directory, name, **document)
+        times = benchmark(
+            *files,
+            repeat=args.repeat,
+            fill_spans=args.non_consecutive > 0,
+        )
+
+    print(
+        f"{'COREA' if args.corea else 'SoNaR'} document of {args.words}"
+        f" words, best of {args.repeat}:"
+    )
+    for stage in STAGES:
+        print(f"{stage:>12}: {times[stage]:.4f}s")
+
+    if args.save:
+        with open(args.save, 'w') as fd:
+            json.dump({'document': document, 'times': times}, fd, indent=1)
+
+    if baseline is not None:
+        slower = compare(times, baseline['times'], args.max_slowdown)
+        if slower:
+            print(f"Slower than the baseline: {', '.join(slower)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Benchmark `CorefConverter.uniqueyfy` on a synthetic document with one long
+coreference chain and many overlapping sub-chains.
+
+The previous implementation is included as a baseline; both are checked to
+give the same reference sets and log messages.
+
+Usage: python bench_uniqueyfy.py [number of mentions]
+"""
+import sys
+import random
+import logging
+from time import perf_counter
+from collections import Counter
+
+from mmax2conll.conll_converters import CorefConverter, logger
+
+
+def synthetic_sets(n_mentions, n_sub_chains=200, seed=0):
+    """
+    Create reference sets with `n_mentions` mentions in total: half of the
+    mentions form one long chain, the other half is spread over overlapping
+    sub-chains of it, minus some mentions that go to a few pairs of chains
+    that share a mention.
+    """
+    rng = random.Random(seed)
+    n_long = n_mentions // 2
+    long_chain = [(2 * i, 2 * i) for i in range(n_long)]
+    sets = [long_chain]
+    sub_size = (n_mentions - n_long) // n_sub_chains
+    for _ in range(n_sub_chains):
+        start = rng.randrange(n_long - 4 * sub_size)
+        sets.append(rng.sample(long_chain[start:start + 4 * sub_size],
+                               sub_size))
+    # Chains that share a mention, but not with the long chain
+    for i in range(1, 20, 4):
+        sets[-i] = sets[-i][4:]
+        sets.append([(2 * i + 1, 2 * i + 1), (2 * i + 3, 2 * i + 3)])
+        sets.append([(2 * i + 3, 2 * i + 3), (2 * i + 5, 2 * i + 5)])
+    return sets
+
+
+def baseline_uniqueyfy(sets):
+    """
+    The quadratic implementation `CorefConverter.uniqueyfy` replaced.
+    """
+    all_refsets = set()
+    all_spans = {}
+    for refcollection in sets:
+        if not refcollection:
+            logger.debug("Discarding empty reference set")
+            continue
+        refcounts = Counter(map(tuple, refcollection))
+        refset = frozenset(refcounts)
+        if refset in all_refsets:
+            logger.debug(
+                f"Discarding duplicate reference set: {refcollection}"
+            )
+            continue
+        all_refsets.add(refset)
+        for span in refset:
+            all_spans.setdefault(span, set()).add(refset)
+    extra = sorted(
+        (sp, rs) for sp, rs in all_spans.items() if len(rs) > 1
+    )
+    for span, sets in extra:
+        biggest = max(sets)
+        others = sets - {biggest}
+        if all(biggest > refset for refset in others):
+            logger.debug(
+                "Discarding reference sets that are strictly smaller than"
+                f" another: {sorted(map(sorted, others))}"
+            )
+            all_refsets -= others
+        else:
+            uncomparable = {
+                refset - {span}
+                for refset in sets
+                if any(not refset > rs and not rs > refset for rs in sets)
+            }
+            logger.warn(
+                "Span in multiple reference sets that are quite different:"
+                f" {span}. Sets: {sorted(map(sorted, uncomparable))}"
+            )
+    return all_refsets
+
+
+class Recorder(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def run(function, sets):
+    recorder = Recorder()
+    logger.addHandler(recorder)
+    try:
+        start = perf_counter()
+        result = function(sets)
+        return perf_counter() - start, result, recorder.messages
+    finally:
+        logger.removeHandler(recorder)
+
+
+def main(n_mentions=10000):
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.WARNING)
+    # The warnings are expected: silence them on stderr
+    logger.propagate = False
+    sets = synthetic_sets(n_mentions)
+    print(
+        f"{len(sets)} reference sets,"
+        f" {sum(map(len, sets))} mentions"
+    )
+    old_time, old, old_messages = run(baseline_uniqueyfy, sets)
+    new_time, new, new_messages = run(CorefConverter.uniqueyfy, sets)
+    assert old == new, "Different reference sets"
+    assert old_messages == new_messages, "Different log messages"
+    print(f"baseline:  {old_time:.3f}s")
+    print(f"uniqueyfy: {new_time:.3f}s")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,195 @@
+"""
+Generate synthetic SoNaR and COREA documents in MMAX format to benchmark
+mmax2conll with.
+
+A document has `n_words` words in sentences of about `sentence_length`
+words. `coref_density` is the number of mentions per word and the mentions
+are spread over coreference chains of about `chain_length` mentions. Some
+mentions are bridging or sense references, so the default coreference
+filters have something to do. A fraction `non_consecutive` of the longer
+spans skips a word, which needs `fill_non_consecutive_coref_spans`.
+
+Usage: python synthetic.py <output folder> [sonar|corea] [number of words]
+"""
+import os
+import sys
+import random
+from xml.sax.saxutils import escape
+
+SONAR_NAME = 'WR-P-E-E-{:010}'
+COREA_NAME = 'WR-P-P-H-{:010}'
+
+
+def sentence_lengths(n_words, sentence_length, rng):
+    """
+    Split `n_words` into sentence lengths of about `sentence_length`.
+    """
+    lengths = []
+    while n_words > 0:
+        length = min(n_words, rng.randint(1, 2 * sentence_length - 1))
+        lengths.append(length)
+        n_words -= length
+    return lengths
+
+
+def mention_spans(n_words, sentences, coref_density, non_consecutive, rng):
+    """
+    Create `coref_density * n_words` mention spans as strings, that do not
+    cross sentence boundaries.
+    """
+    starts = []
+    start = 1
+    for length in sentences:
+        starts.append((start, length))
+        start += length
+
+    spans = []
+    for _ in range(int(n_words * coref_density)):
+        sent_start, sent_length = rng.choice(starts)
+        length = min(sent_length, rng.choice((1, 1, 1, 2, 2, 3, 5)))
+        first = sent_start + rng.randrange(sent_length - length + 1)
+        last = first + length - 1
+        if length > 2 and rng.random() < non_consecutive:
+            spans.append(f'word_{first},word_{first + 2}..word_{last}')
+        elif length > 1:
+            spans.append(f'word_{first}..word_{last}')
+        else:
+            spans.append(f'word_{first}')
+    return spans
+
+
+def coref_markables(spans, chain_length, rng):
+    """
+    Group mention spans into chains of about `chain_length` mentions.
+
+    Yields the attributes of every markable as a dictionary.
+    """
+    rng.shuffle(spans)
+    number = 0
+    index = 0
+    while index < len(spans):
+        size = rng.randint(1, 2 * chain_length - 1)
+        previous = None
+        for span in spans[index:index + size]:
+            number += 1
+            ID = f'markable_{number}'
+            attributes = {'id': ID, 'span': span}
+            if previous is not None:
+                attributes['ref'] = previous
+                attributes['type'] = rng.choice(
+                    ('ident', 'ident', 'ident', 'bound', 'bridge')
+                )
+                attributes['level'] = rng.choice(
+                    ('reference', 'reference', 'reference', 'sense')
+                )
+            else:
+                attributes['ref'] = 'empty'
+            previous = ID
+            yield attributes
+        index += size
+
+
+def markable_element(attributes, mmax_level):
+    attributes = ' '.join(
+        f'{key}="{escape(value)}"' for key, value in attributes.items()
+    )
+    return f'<markable {attributes} mmax_level="{mmax_level}"/>\n'
+
+
+def write_markables(filename, namespace, markables):
+    with open(filename, 'w') as fd:
+        fd.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            "<!DOCTYPE markables SYSTEM 'markables.dtd'>"
+            f'<markables xmlns="www.eml.org/NameSpaces/{namespace}">\n'
+        )
+        fd.writelines(markable_element(m, namespace) for m in markables)
+        fd.write('</markables>\n')
+
+
+def write_document(directory, name, corea=False, n_words=10000,
+                   sentence_length=15, coref_density=0.3, chain_length=4,
+                   non_consecutive=0.0, seed=0):
+    """
+    Write a synthetic document `name` to the `Basedata` and `Markables`
+    directories of `directory`.
+
+    A SoNaR document has a words, a sentence level and a np level file and a
+    COREA document has a words file with sentence information and a coref
+    level file.
+
+    Returns the `(words_file, coref_file, sentences_file)` of the document,
+    where `sentences_file` is None for COREA.
+    """
+    rng = random.Random(seed)
+    basedata = os.path.join(directory, 'Basedata')
+    markables = os.path.join(directory, 'Markables')
+    os.makedirs(basedata, exist_ok=True)
+    os.makedirs(markables, exist_ok=True)
+
+    sentences = sentence_lengths(n_words, sentence_length, rng)
+    words_file = os.path.join(basedata, name + '_words.xml')
+    with open(words_file, 'w') as fd:
+        fd.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            "<!DOCTYPE words SYSTEM 'words.dtd'><words>\n"
+        )
+        number = 0
+        for senti, length in enumerate(sentences):
+            for position in range(length):
+                number += 1
+                if corea:
+                    sentence = f'{name}.p.{senti // 20 + 1}.s.{senti + 1}.xml'
+                    extra = f' alppos="{position}" alpsent="{sentence}"'
+                else:
+                    extra = ''
+                fd.write(
+                    f'<word id="word_{number}"{extra}>w{number}</word>\n'
+                )
+        fd.write('</words>\n')
+
+    sentences_file = None
+    if not corea:
+        sentences_file = os.path.join(
+            markables,
+            name + '_sentence_level.xml'
+        )
+        sentence_markables = []
+        first = 1
+        for senti, length in enumerate(sentences):
+            last = first + length - 1
+            span = f'word_{first}..word_{last}' if length > 1 \
+                else f'word_{first}'
+            sentence_markables.append(
+                {'id': f'markable_{senti + 1}', 'span': span}
+            )
+            first = last + 1
+        write_markables(sentences_file, 'sentence', sentence_markables)
+
+    coref_file = os.path.join(
+        markables,
+        name + ('_coref_level.xml' if corea else '_np_level.xml')
+    )
+    write_markables(
+        coref_file,
+        'coref' if corea else 'np',
+        coref_markables(
+            mention_spans(
+                n_words,
+                sentences,
+                coref_density,
+                non_consecutive,
+                rng
+            ),
+            chain_length,
+            rng
+        )
+    )
+    return words_file, coref_file, sentences_file
+
+
+if __name__ == '__main__':
+    corea = len(sys.argv) > 2 and sys.argv[2] == 'corea'
+    n_words = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    name = (COREA_NAME if corea else SONAR_NAME).format(1)
+    print(write_document(sys.argv[1], name, corea, n_words))
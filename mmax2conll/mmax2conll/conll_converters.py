@@ -2,7 +2,14 @@ import logging
 import itertools as it
 from collections import Counter
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from . import constants as c
+from .token_table import TokenTable, WordIndex
+from .instrumentation import NO_INSTRUMENTATION
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -11,22 +18,29 @@ class CorefConverter:
     """
     Convert coreference information to a format writeable by
     `.conll_writers.CoNLLWriter`
+
+    Checking the spans and `uniqueyfy` are timed as the stages `check_spans`
+    and `uniqueyfy` of `instrumentation` (see `Instrumentation`).
     """
 
     def __init__(self, sentences, uniqueyfy=c.UNIQUEYFY,
                  fill_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS,
-                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID):
+                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID,
+                 word_index=None,
+                 instrumentation=NO_INSTRUMENTATION):
         self.sentences = sentences
+        self.instrumentation = instrumentation
         self.should_uniqueyfy = uniqueyfy
         self.should_fill_spans = fill_spans
         self.sort_key = sort_key
-        self.word_ids = [word['id'] for word in it.chain(*sentences)]
-        self.word_indices = dict(
-            (ID, i) for i, ID in enumerate(self.word_ids)
-        )
+        self.word_index = word_index \
+            if word_index is not None \
+            else WordIndex.from_sentences(sentences)
+        self.word_ids = self.word_index.ids
+        self.word_indices = self.word_index.indices
 
     @staticmethod
-    def uniqueyfy(sets):
+    def uniqueyfy(sets, format_span=None):
         """
         Make sure all spans within a refset are unique and that all refsets
         have a unique set of spans (i.e. no other refset has exactly the same
@@ -34,7 +48,13 @@ class CorefConverter:
 
         Also discards empty reference sets and discards reference sets that
         are (strict) subsets of other reference sets.
+
+        `format_span` is used to show spans in log messages.
         """
+        if format_span is None:
+            def format_span(span):
+                return span
+
         all_refsets = set()
         all_spans = {}
         for refcollection in sets:
@@ -46,37 +66,84 @@ class CorefConverter:
             refset = frozenset(refcounts)
             if refset in all_refsets:
                 logger.debug(
-                    f"Discarding duplicate reference set: {refcollection}"
+                    "Discarding duplicate reference set:"
+                    f" {list(map(format_span, refcollection))}"
                 )
                 continue
             all_refsets.add(refset)
             for span in refset:
                 all_spans.setdefault(span, set()).add(refset)
             for span in (s for s in refcounts.elements() if refcounts[c] > 1):
-                logger.debug(f"Discarding duplicate reference: {span}")
-        # Check for spans that are in multiple reference sets
-        extra = sorted((sp, rs) for sp, rs in all_spans.items() if len(rs) > 1)
-        for span, sets in extra:
-            biggest = max(sets)
-            others = sets - {biggest}
-            if all(biggest > refset for refset in others):
                 logger.debug(
-                    "Discarding reference sets that are strictly smaller than"
-                    f" another: {sorted(others)}"
+                    f"Discarding duplicate reference: {format_span(span)}"
+                )
+        # Check for spans that are in multiple reference sets.
+        # A reference set can only contain all other reference sets of a span
+        # if it is the only biggest one. The reference sets that contain a
+        # reference set contain all its spans, so they are only looked for
+        # among the bigger reference sets of its span that is in the fewest
+        # reference sets, and only once for every reference set.
+        sizes = {refset: len(refset) for refset in all_refsets}
+        supersets = {}
+        sorted_spans = {}
+
+        def strict_supersets(refset):
+            """
+            Get the reference sets that strictly contain `refset`.
+            """
+            try:
+                return supersets[refset]
+            except KeyError:
+                pass
+            rarest = min(refset, key=lambda span: len(all_spans[span]))
+            size = sizes[refset]
+            result = supersets[refset] = {
+                bigger
+                for bigger in all_spans[rarest]
+                if sizes[bigger] > size and refset < bigger
+            }
+            return result
+
+        def sorted_refset_without(refset, span):
+            """
+            Get the sorted, formatted spans of `refset` except `span`.
+            """
+            try:
+                formatted = sorted_spans[refset]
+            except KeyError:
+                formatted = sorted_spans[refset] = sorted(
+                    map(format_span, refset)
                 )
+            formatted = list(formatted)
+            formatted.remove(format_span(span))
+            return formatted
+
+        extra = sorted(
+            ((sp, rs) for sp, rs in all_spans.items() if len(rs) > 1),
+            key=lambda item: format_span(item[0])
+        )
+        for span, sets in extra:
+            biggest = max(sets, key=sizes.__getitem__)
+            others = sets - {biggest}
+            size = sizes[biggest]
+            if all(
+                sizes[refset] < size and biggest in strict_supersets(refset)
+                for refset in others
+            ):
+                if logger.getEffectiveLevel() <= logging.DEBUG:
+                    logger.debug(
+                        "Discarding reference sets that are strictly smaller"
+                        " than another:"
+                        f" {sorted(sorted(map(format_span, rs)) for rs in others)}"  # noqa
+                    )
                 all_refsets -= others
             else:
-                uncomparable = {
-                    refset - {span}
-                    for refset in sets
-                    if any(
-                        not refset > rs and not rs > refset
-                        for rs in sets
-                    )
-                }
+                uncomparable = sorted(
+                    sorted_refset_without(refset, span) for refset in sets
+                )
                 logger.warn(
                     "Span in multiple reference sets that are quite different:"
-                    f" {span}. Sets: {sorted(map(sorted, uncomparable))}"
+                    f" {format_span(span)}. Sets: {uncomparable}"
                 )
 
         if logger.getEffectiveLevel() <= logging.DEBUG:
@@ -87,18 +154,42 @@ class CorefConverter:
 
         return all_refsets
 
+    def format_span(self, span):
+        """
+        Get the word IDs of a `(first, last)` span, for use in messages.
+        """
+        first, last = span
+        return tuple(self.word_ids[first:last + 1])
+
     def check_and_fill_spans(self, sets):
         """
         Find spans that are not consecutive.
 
+        A span is a list of word positions (see `WordIndex`) and is returned
+        as a `(first, last)` pair.
+
         If self.should_fill_spans, the second return value is a
-        {span: [missing word IDs]} map, pointing to the word IDs that would
-        have been in this span if it had been consecutive.
+        {(first, last): [missing word positions]} map, pointing to the word
+        positions that would have been in this span if it had been
+        consecutive.
 
         Otherwise raises a ValueError when a span is not a consecutive
         collection of words.
 
-        :return:    list of tuples of word IDs, span: word IDs
+        Uses NumPy when it is installed.
+
+        :return:    list of lists of (first, last) pairs,
+                    (first, last): word positions
+        """
+        if np is None:
+            return self.check_and_fill_spans_python(sets)
+        return self.check_and_fill_spans_numpy(sets)
+
+    def check_and_fill_spans_python(self, sets):
+        """
+        Find spans that are not consecutive, one span at a time.
+
+        See `check_and_fill_spans`.
         """
         out = []
         problem_map = {}
@@ -106,88 +197,234 @@ class CorefConverter:
             new_refset = []
             out.append(new_refset)
             for span in refset:
-                correct_span = tuple(self.get_correct_span(span))
-                span = tuple(span)
-                if span != correct_span:
+                first, last = self.get_correct_span(span)
+                if len(span) != last - first + 1 or \
+                   list(span) != list(range(first, last + 1)):
+                    span_ids = self.word_index.ids_of(span)
+                    correct_span_ids = self.format_span((first, last))
                     if self.should_fill_spans:
                         # Mark the words that are filled in
-                        for wordID in self.find_missing(span, correct_span):
-                            problem_map.setdefault(correct_span, []).append(
-                                wordID
+                        for wordID in self.find_missing(
+                            span_ids,
+                            correct_span_ids
+                        ):
+                            problem_map.setdefault((first, last), []).append(
+                                self.word_indices[wordID]
                             )
-                        span = correct_span
                     else:
                         raise ValueError(
                             "Coreference spans in CoNLL must be consecutive."
-                            f" Found: {span}, which should be: {correct_span}"
+                            f" Found: {span_ids}, which should be:"
+                            f" {correct_span_ids}"
                         )
-                new_refset.append(span)
+                new_refset.append((first, last))
         return out, problem_map
 
-    def word_id_map_from_coref_sets(self, sets):
+    def check_and_fill_spans_numpy(self, sets):
+        """
+        Find spans that are not consecutive, for all spans of a document at
+        once.
+
+        The positions of all spans are put in one array, so finding the
+        spans that are not consecutive and the positions that are missing
+        from them does not need a list or set per span.
+
+        See `check_and_fill_spans`.
         """
-        Extract a `{word_id: [(reference ID, position), ...]}` map from a
-        reference set, where `position` is either `start`, `end` or
+        sets = [list(refset) for refset in sets]
+        spans = list(it.chain.from_iterable(sets))
+        lengths = np.fromiter(map(len, spans), dtype=np.intp, count=len(spans))
+        if not lengths.all():
+            # Let `get_correct_span` complain about empty spans
+            return self.check_and_fill_spans_python(sets)
+
+        positions = np.fromiter(
+            it.chain.from_iterable(spans),
+            dtype=np.intp,
+            count=lengths.sum()
+        )
+        stops = np.cumsum(lengths)
+        starts = stops - lengths
+        firsts = positions[starts]
+        lasts = positions[stops - 1]
+
+        # A span is consecutive if every position is one higher than the
+        # previous. Count the wrong steps within every span.
+        wrong_steps = np.concatenate(
+            ([0], np.cumsum(np.diff(positions) != 1))
+        )
+        bad = np.flatnonzero(wrong_steps[stops - 1] - wrong_steps[starts])
+
+        problem_map = {}
+        if len(bad):
+            if self.should_fill_spans:
+                n_missing, n_extra, missing, missing_of = \
+                    self.find_missing_numpy(
+                        positions, starts[bad], lengths[bad],
+                        firsts[bad], lasts[bad]
+                    )
+
+            for n, i in enumerate(bad.tolist()):
+                first, last = self.get_correct_span(spans[i])
+                if not self.should_fill_spans:
+                    raise ValueError(
+                        "Coreference spans in CoNLL must be consecutive."
+                        f" Found: {self.word_index.ids_of(spans[i])}, which"
+                        f" should be: {self.format_span((first, last))}"
+                    )
+                if n_extra[n] or not n_missing[n]:
+                    # Raises a ValueError
+                    self.find_missing(
+                        self.word_index.ids_of(spans[i]),
+                        self.format_span((first, last))
+                    )
+
+            bad_firsts = firsts[bad].tolist()
+            bad_lasts = lasts[bad].tolist()
+            for n, index in zip(missing_of.tolist(), missing.tolist()):
+                problem_map.setdefault(
+                    (bad_firsts[n], bad_lasts[n]),
+                    []
+                ).append(index)
+
+        # Split the spans up into reference sets again
+        spans = iter(zip(firsts.tolist(), lasts.tolist()))
+        out = [list(it.islice(spans, len(refset))) for refset in sets]
+        return out, problem_map
+
+    @staticmethod
+    def find_missing_numpy(positions, starts, lengths, firsts, lasts):
+        """
+        Find the positions missing from spans of `positions`.
+
+        Every span is given by its start and length in `positions` and the
+        `first` and `last` position it should span.
+
+        :return:    number of missing positions per span,
+                    number of positions per span outside of first...last,
+                    missing positions,
+                    span number of every missing position
+        """
+        n_spans = len(starts)
+        width = max(positions.max(), lasts.max()) + 1
+
+        def ranges(starts, lengths):
+            """
+            Concatenated `range(start, start + length)` for every span and
+            the span number of every value.
+            """
+            span_numbers = np.repeat(np.arange(n_spans), lengths)
+            offsets = np.cumsum(lengths) - lengths
+            values = np.arange(lengths.sum()) \
+                - np.repeat(offsets, lengths) \
+                + np.repeat(starts, lengths)
+            return values, span_numbers
+
+        found, found_of = ranges(starts, lengths)
+        found = positions[found]
+        correct, correct_of = ranges(
+            firsts,
+            np.maximum(lasts - firsts + 1, 0)
+        )
+
+        # Make the positions unique per span to compare all spans at once
+        found_keys = found_of * width + found
+        correct_keys = correct_of * width + correct
+        is_missing = ~np.isin(correct_keys, found_keys)
+        is_extra = ~np.isin(found_keys, correct_keys)
+        return (
+            np.bincount(correct_of[is_missing], minlength=n_spans),
+            np.bincount(found_of[is_extra], minlength=n_spans),
+            correct[is_missing],
+            correct_of[is_missing],
+        )
+
+    def get_span_sort_key(self):
+        """
+        Get a function that returns the sort key of a `(first, last)` span,
+        which sorts spans the same way as sorting on
+        `tuple(map(self.sort_key, word IDs of the span))`.
+
+        Returns None if `self.sort_key` increases with the word position, in
+        which case sorting on the spans themselves is equivalent.
+        """
+        keys = list(map(self.sort_key, self.word_ids))
+        try:
+            increasing = all(a < b for a, b in zip(keys, keys[1:]))
+        except TypeError:
+            increasing = False
+        if increasing:
+            return None
+
+        def span_sort_key(span):
+            first, last = span
+            return tuple(keys[first:last + 1])
+
+        return span_sort_key
+
+    def word_maps_from_index_sets(self, sets):
+        """
+        Extract a `{word position: [(reference ID, position), ...]}` map from
+        a reference set, where `position` is either `start`, `end` or
         `singleton`.
 
         If self.should_fill_spans, the second return value is a
-        {word_id: [reference ID, ...]} map, pointing to the reference spans
-        this word was not in, but would have been if the span were consecutive.
+        {word position: [reference ID, ...]} map, pointing to the reference
+        spans this word was not in, but would have been if the span were
+        consecutive.
 
         Otherwise raises a ValueError when a span is not a consecutive
         collection of words.
 
         Assumes:
-         - a reference set is a list of lists of word IDs
+         - a reference set is a list of lists of word positions
 
         Incrementally assigns a reference ID to reference sets.
         """
-        sets, set_problem_map = self.check_and_fill_spans(sets)
+        with self.instrumentation.stage('check_spans'):
+            sets, set_problem_map = self.check_and_fill_spans(sets)
 
         if self.should_uniqueyfy:
-            sets = self.uniqueyfy(sets)
+            with self.instrumentation.stage('uniqueyfy'):
+                sets = self.uniqueyfy(sets, self.format_span)
 
-        word_id_map = {}
+        word_map = {}
         word_problem_map = {}
 
-        sorted_sets = sorted(
-            map(
-                lambda refset: sorted(
-                    refset,
-                    key=lambda span: tuple(map(self.sort_key, span))
-                ),
-                sets
-            ),
-            key=lambda refset: tuple(map(
-                lambda span: tuple(map(self.sort_key, span)),
-                refset
-            ))
-        )
+        span_sort_key = self.get_span_sort_key()
+        if span_sort_key is None:
+            sorted_sets = sorted(sorted(refset) for refset in sets)
+        else:
+            sorted_sets = sorted(
+                (sorted(refset, key=span_sort_key) for refset in sets),
+                key=lambda refset: tuple(map(span_sort_key, refset))
+            )
 
         # Randomly create a reference ID for every reference refset
         for refID, refset in enumerate(sorted_sets):
             for span in refset:
-                for wordID in set_problem_map.get(span, []):
-                    word_problem_map.setdefault(wordID, []).append(
+                for index in set_problem_map.get(span, []):
+                    word_problem_map.setdefault(index, []).append(
                         refID
                     )
 
-                if len(span) == 1:
-                    word_id_map.setdefault(span[0], []).append(
+                first, last = span
+                if first == last:
+                    word_map.setdefault(first, []).append(
                         (refID, 'singleton')
                     )
                 else:
-                    word_id_map.setdefault(span[0], []).append(
+                    word_map.setdefault(first, []).append(
                         (refID, 'start')
                     )
-                    word_id_map.setdefault(span[-1], []).append(
+                    word_map.setdefault(last, []).append(
                         (refID, 'end')
                     )
 
-        if len(word_id_map) == 0:
+        if len(word_map) == 0:
             logger.warn("No coreference data found.")
 
-        return word_id_map, word_problem_map
+        return word_map, word_problem_map
 
     @staticmethod
     def find_missing(span, correct_span):
@@ -207,19 +444,30 @@ class CorefConverter:
 
     def get_correct_span(self, span):
         """
-        Get the span with the gaps filled out.
+        Get the span of word positions with the gaps filled out as a
+        `(first, last)` pair.
 
-        E.g. if span = [0, 1, 2, 5, 6], return list(range(7))
+        E.g. if span = [0, 1, 2, 5, 6], return (0, 6)
         """
-        first = self.word_indices[span[0]]
-        last = self.word_indices[span[-1]]
+        first = span[0]
+        last = span[-1]
         if first > last:
             raise ValueError(
                 "Illegal span specification: the first ID of a span"
                 " abbreviation must appear in the words before the"
-                f" last ID: {span}"
+                f" last ID: {list(self.word_index.ids_of(span))}"
             )
-        return self.word_ids[first:last + 1]
+        return first, last
+
+    def index_sets_from_coref_sets(self, sets):
+        """
+        Convert reference sets of spans of word IDs to reference sets of spans
+        of word positions.
+        """
+        return (
+            [self.word_index.indices_of(span) for span in refset]
+            for refset in sets
+        )
 
     def add_data_from_coref_sets(self, coref_sets):
         """
@@ -227,49 +475,81 @@ class CorefConverter:
 
         !! NB !! Changes data in-place.
 
-        Assumes every word has an ID stored in 'id'.
+        Assumes every word has an ID stored in 'id' and that a reference set
+        is a list of lists of word IDs.
         """
-        id_map, problem_map = self.word_id_map_from_coref_sets(coref_sets)
+        self.add_data_from_index_sets(
+            self.index_sets_from_coref_sets(coref_sets)
+        )
 
-        def ref_to_str(refID, pos):
-            if pos == 'singleton':
-                return f'({refID})'
-            elif pos == 'start':
-                return f'({refID}'
-            elif pos == 'end':
-                return f'{refID})'
-            else:
-                raise ValueError(
-                    f"The position of the reference of {word} must be"
-                    " either `start`, `end` or `singleton`. Found:"
-                    f" {pos}"
-                )
+    def add_data_from_index_sets(self, sets):
+        """
+        Add coreference information from reference sets to sentence data.
 
-        for sentence in self.sentences:
-            for word in sentence:
-                if word['id'] in id_map:
-                    word['coref'] = '|'.join(
-                        it.starmap(ref_to_str, id_map[word['id']])
-                    )
-                if word['id'] in problem_map:
-                    word['problem'] = '|'.join(map(
-                        str,
-                        problem_map[word['id']]
-                    ))
+        !! NB !! Changes data in-place.
+
+        Assumes a reference set is a list of lists of word positions.
+        """
+        word_map, problem_map = self.word_maps_from_index_sets(sets)
+
+        if isinstance(self.sentences, TokenTable):
+            coref = self.sentences.column('coref')
+            problem = self.sentences.column('problem')
+
+            def set_coref(index, value):
+                coref[index] = value
+
+            def set_problem(index, value):
+                problem[index] = value
+        else:
+            words = list(it.chain(*self.sentences))
+
+            def set_coref(index, value):
+                words[index]['coref'] = value
+
+            def set_problem(index, value):
+                words[index]['problem'] = value
+
+        for index, refs in word_map.items():
+            set_coref(index, '|'.join(it.starmap(self.ref_to_str, refs)))
+        for index, refIDs in problem_map.items():
+            set_problem(index, '|'.join(map(str, refIDs)))
+
+    @staticmethod
+    def ref_to_str(refID, pos):
+        """
+        Get the CoNLL representation of the `start`, `end` or `singleton`
+        of a reference
+        """
+        if pos == 'singleton':
+            return f'({refID})'
+        elif pos == 'start':
+            return f'({refID}'
+        elif pos == 'end':
+            return f'{refID})'
+        else:
+            raise ValueError(
+                "The position of a reference must be either `start`, `end` or"
+                f" `singleton`. Found: {pos}"
+            )
 
 
 class MMAXCorefConverter(CorefConverter):
-    def add_data_from_MMAX_chains(self, chains):
+    def add_data_from_MMAX_chains(self, chains, span_as_indices=False):
         """
         Add coreference information from reference sets to sentence data.
 
         !! NB !! Changes data in-place.
 
-        Assumes every word has an ID stored in 'id'.
+        Assumes every word has an ID stored in 'id'. If `span_as_indices`,
+        the spans of the markables are lists of word positions instead of
+        lists of word IDs (see `WordIndex`).
         """
-        self.add_data_from_coref_sets(
-            self.coref_sets_from_MMAX_chains(chains)
-        )
+        sets = self.coref_sets_from_MMAX_chains(chains)
+        if span_as_indices:
+            self.add_data_from_index_sets(sets)
+        else:
+            self.add_data_from_coref_sets(sets)
 
     @staticmethod
     def coref_sets_from_MMAX_chains(chains):
@@ -2,6 +2,11 @@
 DEFAULT_CONFIG_FILE = './default_config.yml'
 MIN_COLUMN_SPACING = 3
 VALIDATE_XML = True
+# Levels `validate_xml` can be set to besides `True` ('full') and `False`
+# ('none'). 'sampled' validates a fraction of the documents fully and the
+# others structurally.
+VALIDATION_LEVELS = ('none', 'structural', 'sampled', 'full')
+VALIDATION_SAMPLE_RATE = 0.1
 UNIQUEYFY = True
 FILL_NON_CONSECUTIVE_COREF_SPANS = False
 AUTO_USE_MED_ITEM_READER = False
@@ -20,7 +25,39 @@ MARKABLES_DIR = 'Markables'
 COREF_FILES_EXTENSION = '_np_level.xml'             # for SoNaR
 SENTENCES_FILES_EXTENSION = '_sentence_level.xml'   # for SoNaR
 LOG_ON_ERROR = False
+JOBS = 1
+# Tasks that are submitted to the worker processes at a time, per worker
+TASKS_PER_WORKER = 4
+OUTPUT_FLUSH_SIZE = 1 << 20  # characters
+ATOMIC_OUTPUT = False
+INCREMENTAL = False
+INDEX_CACHE = None
+STATS_FILE = None
+PROFILE_DIR = None
+PROFILE_EXTENSION = '.prof'
+PROFILE_REPORT = 'report.txt'
+PROFILE_TOP = 30  # functions
+# Sharded output: at most SHARD_SIZE bytes and SHARD_DOCUMENTS documents
+# per shard. Both None writes one output file per document.
+SHARD_SIZE = None
+SHARD_DOCUMENTS = None
+SHARD_PREFIX = 'shard-'
+SHARD_NAME = SHARD_PREFIX + '{:05d}'
+SHARD_INDEX = 'index.jsonl'
+# Save an index of the byte offsets of the parts of the documents next to
+# every output file (see `CoNLLIndex`)
+CONLL_INDEX = False
+CONLL_INDEX_EXTENSION = '.idx'
+MANIFEST_FILENAME = '.mmax2conll-manifest.json'
 DIRS_TO_IGNORE = {'Configuration'}
+# Options for the lxml parsers that read the MMAX files. `huge_tree` lifts
+# the limits libxml2 puts on (very) large documents, so it is opt-in.
+XML_PARSER_OPTIONS = {
+    'remove_blank_text': True,
+    'resolve_entities': False,
+    'no_network': True,
+    'huge_tree': False,
+}
 
 CONLL_COLUMNS = [
     'part_number',
@@ -69,10 +106,24 @@ CONLL_ON_MISSING = {
     'coref': 'nothing',
 }
 
+
+# The filters are plain functions (not lambdas) so that they can be pickled
+# and sent to worker processes when converting in parallel.
+def SENTENCE_NONE_FILTER(sentence): return sentence
+
+
+def SENTENCE_HAS_PROBLEM_FILTER(sentence):
+    return any('problem' in w for w in sentence)
+
+
+def SENTENCE_NO_PROBLEM_FILTER(sentence):
+    return all('problem' not in w for w in sentence)
+
+
 SENTENCE_FILTERS = {
-    'none': lambda x: x,
-    'has_problem': lambda s: any('problem' in w for w in s),
-    'no_problem': lambda s: all('problem' not in w for w in s),
+    'none': SENTENCE_NONE_FILTER,
+    'has_problem': SENTENCE_HAS_PROBLEM_FILTER,
+    'no_problem': SENTENCE_NO_PROBLEM_FILTER,
 }
 SENTENCE_DEFAULT_FILTER = SENTENCE_FILTERS[SENTENCE_FILTER]
 
@@ -172,23 +223,20 @@ COREF_EMPTY_REF_VALUE = 'empty'
 
 # -- End of quote
 
-MMAX_TYPE_FILTERS = {
-    'ident': lambda i: 'type' not in i or i['type'] == 'bridge',
-    'ident_or_bridge': lambda i:
-        'type' not in i or
-        i['type'] == 'ident' or
-        i['type'] == 'bound',
-    'bridge': lambda i: 'type' not in i or i['type'] == 'bridge',
-    'pref': lambda i: 'type' not in i or i['type'] == 'pref',
-    'none': lambda i: True,
+
+# The coreference filters by name: the values of `type` and `level` that
+# they let pass. A markable without a type or a level always passes and None
+# lets every value pass. `compile_coref_filter` combines a type and a level
+# filter into one filter.
+MMAX_TYPE_FILTER_VALUES = {
+    'ident': frozenset({'bridge'}),
+    'ident_or_bridge': frozenset({'ident', 'bound'}),
+    'bridge': frozenset({'bridge'}),
+    'pref': frozenset({'pref'}),
+    'none': None,
 }
-MMAX_LEVEL_FILTERS = {
-    'reference': lambda i: 'level' not in i or i['level'] == 'reference',
-    'sense': lambda i: 'level' not in i or i['level'] == 'sense',
-    'none': lambda i: True,
+MMAX_LEVEL_FILTER_VALUES = {
+    'reference': frozenset({'reference'}),
+    'sense': frozenset({'sense'}),
+    'none': None,
 }
-
-
-def MMAX_COREF_FILTER(item):
-    return MMAX_TYPE_FILTERS[COREF_TYPE_FILTER](item) and \
-        MMAX_LEVEL_FILTERS[COREF_LEVEL_FILTER](item)
@@ -0,0 +1,270 @@
+import os
+import json
+import logging
+
+from . import constants as c
+from .output import BufferedOutput
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+class DocumentIndex:
+    """
+    Index of the data directories in one or more directory trees.
+
+    A data directory is a directory containing a `basedata_dir` and
+    `markables_dir` directory as direct children. For every data directory
+    the index keeps the names of the files in those two directories, so the
+    documents can be paired up without listing them again.
+
+    Every tree is walked once, using `os.scandir`, when it is first needed.
+    The index can be saved to and loaded from a JSON file to skip the walk
+    the next time. The modification times of the directories are saved as
+    well: a `basedata_dir` or `markables_dir` that changed is listed again
+    and a tree in which directories were added or removed is walked again.
+    """
+    FORMAT_VERSION = 2
+
+    def __init__(self, basedata_dir=c.WORDS_DIR,
+                 markables_dir=c.MARKABLES_DIR,
+                 roots=None):
+        self.basedata_dir = basedata_dir
+        self.markables_dir = markables_dir
+        # {absolute root: {
+        #     'dirs': {searched directory: mtime_ns},
+        #     'data_dirs': {data_dir: {'basedata': [filename, ...],
+        #                              'markables': [filename, ...],
+        #                              'mtime_ns': {'basedata': mtime_ns,
+        #                                           'markables': mtime_ns}}}
+        # }}
+        # where the directories are relative to the root
+        self.roots = {} if roots is None else roots
+        self.changed = False
+
+    @classmethod
+    def load(cls, filename, basedata_dir=c.WORDS_DIR,
+             markables_dir=c.MARKABLES_DIR):
+        """
+        Read an index from `filename`. Start an empty one if it does not
+        exist or was created for other `basedata_dir` or `markables_dir`.
+        """
+        index = cls(basedata_dir, markables_dir)
+        if not os.path.exists(filename):
+            return index
+
+        with open(filename) as fd:
+            data = json.load(fd)
+        if data.get('format') != cls.FORMAT_VERSION or \
+           data.get('basedata_dir') != basedata_dir or \
+           data.get('markables_dir') != markables_dir:
+            logger.warn(
+                f"Not using the document index in {filename}, because it was"
+                " made for an other format or other data directory names"
+            )
+            return index
+
+        logger.info(f"Using the document index in {filename}")
+        index.roots = data['roots']
+        return index
+
+    def save(self, filename):
+        """
+        Write the index to `filename`, replacing it atomically.
+        """
+        with BufferedOutput(filename, atomic=True) as fd:
+            json.dump(
+                {
+                    'format': self.FORMAT_VERSION,
+                    'basedata_dir': self.basedata_dir,
+                    'markables_dir': self.markables_dir,
+                    'roots': self.roots,
+                },
+                fd,
+                indent=1,
+                sort_keys=True
+            )
+        self.changed = False
+
+    def data_dirs(self, directory, dirs_to_ignore=c.DIRS_TO_IGNORE):
+        """
+        Get the sorted data directories in `directory`, walking it if it is
+        not in the index yet and updating the index if it changed (see
+        `update`).
+
+        Does not return directories whose base name is in `dirs_to_ignore`,
+        but does search them.
+        """
+        root = os.path.abspath(directory)
+        if root not in self.roots:
+            self.roots[root] = self.scan(root)
+            self.changed = True
+        else:
+            self.update(root)
+        dirs_to_ignore = set(dirs_to_ignore)
+        return sorted(
+            self.join(directory, data_dir)
+            for data_dir in self.roots[root]['data_dirs']
+            if os.path.basename(self.join(root, data_dir))
+            not in dirs_to_ignore
+        )
+
+    def files(self, directory, data_dir):
+        """
+        Get the names of the files in the `basedata_dir` and the
+        `markables_dir` directory of `data_dir`, which was found in
+        `directory`.
+        """
+        listing = self.roots[os.path.abspath(directory)]['data_dirs'][
+            os.path.relpath(data_dir, directory)
+        ]
+        return listing['basedata'], listing['markables']
+
+    @staticmethod
+    def join(directory, data_dir):
+        """
+        Get the path of `data_dir`, relative to `directory`, as found when
+        walking `directory`.
+        """
+        if data_dir == os.curdir:
+            return directory
+        return os.path.join(directory, data_dir)
+
+    @staticmethod
+    def mtime_ns(path):
+        """
+        Get the modification time of `path`, or None if it does not exist.
+        """
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def update(self, root):
+        """
+        Walk `root` again if directories were added to or removed from it
+        since it was indexed, and list the `basedata_dir` and
+        `markables_dir` directories that changed again otherwise.
+        """
+        indexed = self.roots[root]
+        if any(
+            self.mtime_ns(self.join(root, path)) != mtime_ns
+            for path, mtime_ns in indexed['dirs'].items()
+        ):
+            logger.info(f"Directories were added or removed: walking {root}")
+            self.roots[root] = self.scan(root)
+            self.changed = True
+            return
+
+        for data_dir, listing in indexed['data_dirs'].items():
+            for key, name in [('basedata', self.basedata_dir),
+                              ('markables', self.markables_dir)]:
+                path = os.path.join(self.join(root, data_dir), name)
+                mtime_ns = self.mtime_ns(path)
+                if mtime_ns == listing['mtime_ns'][key]:
+                    continue
+                logger.debug(f"Listing {path} again")
+                listing[key] = self.list_files(path)
+                listing['mtime_ns'][key] = mtime_ns
+                self.changed = True
+
+    @staticmethod
+    def list_files(path):
+        """
+        Get the sorted names of the files (not directories) in `path`.
+        """
+        files = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry.name)
+        return sorted(files)
+
+    def scan(self, root):
+        """
+        Walk `root` once and find all data directories in it.
+
+        Like `os.walk`, symbolic links to directories are not followed,
+        except to list the files of a `basedata_dir` or `markables_dir`.
+        """
+        data_dirs = {}
+        # Modification times of the directories that are searched
+        dirs = {}
+        # Files in directories named `basedata_dir` or `markables_dir`
+        listings = {}
+        # Directories named `basedata_dir` or `markables_dir` per parent
+        children = {}
+        special = (self.basedata_dir, self.markables_dir)
+
+        # (path, whether to search its subdirectories)
+        stack = [(root, True)]
+        while stack:
+            path, recurse = stack.pop()
+            # Before listing, so a change while listing is seen next time
+            mtime_ns = self.mtime_ns(path)
+            try:
+                entries = os.scandir(path)
+            except OSError as e:
+                # `os.walk` ignores directories it cannot list as well
+                logger.debug(f"Cannot list {path}: {e}")
+                continue
+            # Changes in a `basedata_dir` or `markables_dir` only need that
+            # directory to be listed again (see `update`)
+            if recurse and (
+                path == root or os.path.basename(path) not in special
+            ):
+                dirs[os.path.relpath(path, root)] = mtime_ns
+            with entries:
+                files = []
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry.name)
+                        continue
+                    if not recurse:
+                        continue
+                    if entry.name in special:
+                        children.setdefault(path, set()).add(entry.name)
+                        stack.append((entry.path, not entry.is_symlink()))
+                    elif not entry.is_symlink():
+                        stack.append((entry.path, True))
+            if os.path.basename(path) in special:
+                listings[path] = (sorted(files), mtime_ns)
+
+        for path, names in children.items():
+            has_words = self.basedata_dir in names
+            has_markables = self.markables_dir in names
+            if has_words and has_markables:
+                logger.debug(f"subdir: {path}")
+                basedata, basedata_mtime_ns = listings.get(
+                    os.path.join(path, self.basedata_dir), ([], None)
+                )
+                markables, markables_mtime_ns = listings.get(
+                    os.path.join(path, self.markables_dir), ([], None)
+                )
+                data_dirs[os.path.relpath(path, root)] = {
+                    'basedata': basedata,
+                    'markables': markables,
+                    'mtime_ns': {
+                        'basedata': basedata_mtime_ns,
+                        'markables': markables_mtime_ns,
+                    },
+                }
+            elif has_markables:
+                logger.warn(
+                    f"{path} has a markables directory"
+                    f" ({self.markables_dir}), but no words directory"
+                    f" ({self.basedata_dir})."
+                )
+            else:
+                logger.warn(
+                    f"{path} has a words directory ({self.basedata_dir}),"
+                    f" but no markables directory ({self.markables_dir})."
+                )
+        return {'dirs': dirs, 'data_dirs': data_dirs}
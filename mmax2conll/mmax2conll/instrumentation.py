@@ -0,0 +1,165 @@
+import sys
+import json
+import logging
+from time import perf_counter, process_time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:     # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+def peak_memory():
+    """
+    Get the peak resident set size of this process in KiB, or None if it
+    cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes instead of KiB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Instrumentation:
+    """
+    Wall time and CPU time per stage and counters of the conversion of one
+    document.
+
+    Time a stage using `with instrumentation.stage(name): ...` and count
+    things using `instrumentation.count(name, number)`. The times of a
+    stage that is entered more than once are added up. Stages can be nested,
+    in which case the time of the inner stage is part of the time of the
+    outer stage as well.
+    """
+
+    def __init__(self):
+        # {stage: {'wall': seconds, 'cpu': seconds}}
+        self.stages = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name):
+        wall = perf_counter()
+        cpu = process_time()
+        try:
+            yield
+        finally:
+            times = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0})
+            times['wall'] += perf_counter() - wall
+            times['cpu'] += process_time() - cpu
+
+    def count(self, name, number):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def record(self):
+        """
+        Get a JSON serialisable dictionary with the times, the counts and the
+        peak memory usage of the process so far.
+        """
+        return {
+            'stages': self.stages,
+            'counts': self.counts,
+            'peak_memory_kib': peak_memory(),
+        }
+
+
+class NoInstrumentation:
+    """
+    Stand-in for `Instrumentation` that does not measure anything.
+    """
+
+    def stage(self, name):
+        return nullcontext()
+
+    def count(self, name, number):
+        pass
+
+    def record(self):
+        return None
+
+
+NO_INSTRUMENTATION = NoInstrumentation()
+
+
+class Statistics:
+    """
+    Writes the `Instrumentation` records of converted documents to
+    `filename` as JSON lines and adds them up.
+
+    Every document gets a line with `"type": "document"`. `close` adds a
+    line with `"type": "summary"`, which contains the number of documents,
+    the total times per stage, the total counts and the highest peak memory
+    usage, and logs the summary.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.fd = open(filename, 'w')
+        self.documents = 0
+        self.stages = {}
+        self.counts = {}
+        self.peak_memory_kib = None
+
+    def add(self, name, input_dir, record):
+        """
+        Write and add up the `Instrumentation` record of document `name`.
+        """
+        self.fd.write(json.dumps(
+            dict(type='document', document=name, input_dir=input_dir,
+                 **record),
+            sort_keys=True
+        ) + '\n')
+
+        self.documents += 1
+        for stage, times in record['stages'].items():
+            total = self.stages.setdefault(stage, {'wall': 0.0, 'cpu': 0.0})
+            total['wall'] += times['wall']
+            total['cpu'] += times['cpu']
+        for count, number in record['counts'].items():
+            self.counts[count] = self.counts.get(count, 0) + number
+        if record['peak_memory_kib'] is not None:
+            self.peak_memory_kib = max(
+                self.peak_memory_kib or 0,
+                record['peak_memory_kib']
+            )
+
+    def summary(self):
+        return {
+            'type': 'summary',
+            'documents': self.documents,
+            'stages': self.stages,
+            'counts': self.counts,
+            'peak_memory_kib': self.peak_memory_kib,
+        }
+
+    def close(self):
+        """
+        Write and log the summary and close the file.
+        """
+        summary = self.summary()
+        self.fd.write(json.dumps(summary, sort_keys=True) + '\n')
+        self.fd.close()
+
+        logger.info(
+            f"Converted {self.documents} documents. Statistics are saved in"
+            f" {self.filename}"
+        )
+        for stage, times in self.stages.items():
+            logger.info(
+                f"{stage}: {times['wall']:.3f}s wall time,"
+                f" {times['cpu']:.3f}s CPU time"
+            )
+        if self.counts:
+            logger.info(', '.join(
+                f"{number} {count}" for count, number in self.counts.items()
+            ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,17 +1,25 @@
 #! /usr/bin/env python3
 
+import io
 import os
+import pickle
 import logging
 import itertools as it
-
-from lxml import etree
+from functools import partial
+from collections import deque
 
 import mmax2conll.constants as c
-from mmax2conll.util import file_exists, directory_exists
+from mmax2conll.util import (
+    file_exists,
+    directory_exists,
+    WorkerError,
+)
 
 from mmax2conll.mmax_document_readers import (
     document_ID_from_filename,
-    add_sentence_layer_to_words,
+    compile_coref_filter,
+    validation_level,
+    document_validation_level,
     add_word_numbers,
     COREAWordsDocumentReader,
     SoNaRWordsDocumentReader,
@@ -19,8 +27,21 @@ from mmax2conll.mmax_document_readers import (
     MMAXCorefDocumentReader,
 )
 from mmax2conll.mmax_item_readers import COREAMedWordReader
+from mmax2conll.token_table import TokenTable, WordIndex
 from mmax2conll.conll_converters import MMAXCorefConverter
 from mmax2conll.conll_writers import CoNLLWriter
+from mmax2conll.output import BufferedOutput, encode_output
+from mmax2conll.shards import DocumentOutput, ShardWriter
+from mmax2conll.conll_index import CoNLLIndex, index_filename
+from mmax2conll.manifest import Manifest
+from mmax2conll.document_index import DocumentIndex
+from mmax2conll.xml_parsers import parser_options
+from mmax2conll.instrumentation import (
+    Instrumentation,
+    NO_INSTRUMENTATION,
+    Statistics,
+)
+from mmax2conll.profiling import Profiles, run_profiled
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -37,26 +58,13 @@ class Main:
 
         Does not return directories whose base name is in `dirs_to_ignore`,
         but does search them.
+
+        See `DocumentIndex` to also keep the files found in them.
         """
-        dirs_to_ignore = set(dirs_to_ignore)
-        for subdir, subsubdirs, _ in os.walk(directory):
-            if os.path.basename(subdir) in dirs_to_ignore:
-                continue
-            has_words = basedata_dir in subsubdirs
-            has_markables = markables_dir in subsubdirs
-            if has_words and has_markables:
-                logger.debug(f"subdir: {subdir}")
-                yield subdir
-            elif has_markables:
-                logger.warn(
-                    f"{subdir} has a markables directory ({markables_dir}),"
-                    f" but no words directory ({basedata_dir})."
-                )
-            elif has_words:
-                logger.warn(
-                    f"{subdir} has a words directory ({basedata_dir}), but no"
-                    f" markables directory ({markables_dir})."
-                )
+        return DocumentIndex(basedata_dir, markables_dir).data_dirs(
+            directory,
+            dirs_to_ignore
+        )
 
     @classmethod
     def super_dir_main(cls, directories, output_dir,
@@ -64,134 +72,229 @@ class Main:
                        markables_dir=c.MARKABLES_DIR,
                        dirs_to_ignore=c.DIRS_TO_IGNORE,
                        allow_overwriting=c.ALLOW_OVERWRITING,
+                       log_on_error=c.LOG_ON_ERROR,
+                       jobs=c.JOBS,
+                       incremental=c.INCREMENTAL,
+                       index_cache=c.INDEX_CACHE,
+                       stats_file=c.STATS_FILE,
+                       profile_dir=c.PROFILE_DIR,
+                       shard_size=c.SHARD_SIZE,
+                       shard_documents=c.SHARD_DOCUMENTS,
                        **kwargs):
+        """
+        Batch convert all data directories found in `directories`.
+
+        The documents of all data directories are put in one queue. If `jobs`
+        is not 1 and the output is not sharded, the largest documents are
+        scheduled first, so that one big directory or document does not end
+        up being converted on its own at the end of the run.
+
+        If `incremental`, only the documents whose input files or
+        configuration changed since they were last converted are converted
+        (see `Manifest`).
+
+        The directories are searched once for data directories and their
+        files (see `DocumentIndex`). If `index_cache` is a filename, the
+        directories that are in the index saved there are not searched again
+        and the directories that are not are added to it.
+
+        If `stats_file` is a filename, the conversion of every document is
+        instrumented and the statistics are saved there (see `Statistics`).
+
+        If `profile_dir` is a directory name, the conversion of every document
+        is profiled and the profiles and a report of the functions that took
+        the most time are saved there (see `Profiles`).
+
+        If `shard_size` or `shard_documents` is not None, the output of all
+        documents is written to shards of at most `shard_size` bytes and
+        `shard_documents` documents in `output_dir`, with an index of where
+        every document is (see `ShardWriter`). The workers send the output to
+        this process, which writes it in the order of the documents. The
+        documents are not reordered by size then, so the shards and their
+        index do not depend on `jobs`.
+        """
         logger.debug(f"output_dir: {output_dir}")
+        sharded = shard_size is not None or shard_documents is not None
+        if sharded and incremental:
+            raise ValueError(
+                "Incremental conversion needs one output file per document,"
+                " so it cannot be combined with `shard_size` or"
+                " `shard_documents`"
+            )
+        if stats_file is not None:
+            kwargs['instrument'] = True
+        if incremental:
+            os.makedirs(output_dir, exist_ok=True)
+            manifest = Manifest.load(
+                os.path.join(output_dir, c.MANIFEST_FILENAME),
+                root=output_dir
+            )
+            kwargs['manifest'] = manifest
+        if index_cache is None:
+            index = DocumentIndex(basedata_dir, markables_dir)
+        else:
+            index = DocumentIndex.load(
+                index_cache,
+                basedata_dir,
+                markables_dir
+            )
+
+        tasks = []
         for directory in directories:
-            data_dirs = sorted(cls.find_data_dirs(
-                directory=directory,
-                basedata_dir=basedata_dir,
-                markables_dir=markables_dir,
-                dirs_to_ignore=dirs_to_ignore
-            ))
+            data_dirs = index.data_dirs(directory, dirs_to_ignore)
             for data_dir in data_dirs:
-                cur_output_dir = os.path.join(
-                    output_dir,
-                    data_dir[len(directory):]
-                )
-                if not allow_overwriting and os.path.exists(cur_output_dir):
-                    logger.warn(
-                        f"Merging output converted from {data_dir} into"
-                        f" {cur_output_dir}"
-                    )
+                if sharded:
+                    cur_output_dir = None
                 else:
-                    logger.debug(f"Creating: {cur_output_dir}")
-                    os.makedirs(cur_output_dir, exist_ok=True)
-                    logger.info(
-                        f"Saving data converted from {data_dir} in"
-                        f" {cur_output_dir}"
+                    cur_output_dir = os.path.join(
+                        output_dir,
+                        data_dir[len(directory):]
                     )
-
-                cls.dir_main(
+                    if not allow_overwriting and not incremental and \
+                       os.path.exists(cur_output_dir):
+                        logger.warn(
+                            f"Merging output converted from {data_dir} into"
+                            f" {cur_output_dir}"
+                        )
+                    else:
+                        logger.debug(f"Creating: {cur_output_dir}")
+                        os.makedirs(cur_output_dir, exist_ok=True)
+                        logger.info(
+                            f"Saving data converted from {data_dir} in"
+                            f" {cur_output_dir}"
+                        )
+
+                basedata_files, markables_files = index.files(
+                    directory,
+                    data_dir
+                )
+                tasks.append(cls.dir_tasks(
                     input_dir=data_dir,
                     output_dir=cur_output_dir,
                     basedata_dir=basedata_dir,
                     markables_dir=markables_dir,
                     allow_overwriting=allow_overwriting,
+                    basedata_files=basedata_files,
+                    markables_files=markables_files,
                     **kwargs
+                ))
+
+        if index_cache is not None and index.changed:
+            index.save(index_cache)
+
+        tasks = it.chain.from_iterable(tasks)
+        if incremental:
+            tasks = manifest.outdated(tasks)
+        if jobs != 1 and not sharded:
+            tasks = sorted(tasks, key=cls.task_size, reverse=True)
+
+        statistics = None if stats_file is None else Statistics(stats_file)
+        profiles = None if profile_dir is None else Profiles(profile_dir)
+        shards = None if not sharded else ShardWriter(
+            output_dir,
+            max_bytes=shard_size,
+            max_documents=shard_documents,
+            extension=kwargs.get('conll_extension', c.CONLL_EXTENSION),
+            part_index=kwargs.get('conll_index', c.CONLL_INDEX),
+            flush_size=kwargs.get('output_flush_size', c.OUTPUT_FLUSH_SIZE)
+        )
+
+        def on_done(task, record):
+            name, input_dir, _, _ = task
+            if shards is not None:
+                shards.add(
+                    record.document_id,
+                    record.data,
+                    name=name,
+                    input_dir=input_dir
                 )
+                record = record.record
+            if incremental:
+                manifest.done(task)
+            if statistics is not None:
+                statistics.add(name, input_dir, record)
+
+        try:
+            cls.run_tasks(
+                tasks,
+                jobs=jobs,
+                log_on_error=log_on_error,
+                on_done=on_done,
+                profiles=profiles
+            )
+        finally:
+            if incremental:
+                manifest.save()
+            if statistics is not None:
+                statistics.close()
+            if profiles is not None:
+                profiles.report()
+            if shards is not None:
+                shards.close()
 
     @classmethod
     def dir_main(cls, input_dir, output_dir,
-                 basedata_dir=c.WORDS_DIR,
-                 markables_dir=c.MARKABLES_DIR,
-                 allow_overwriting=c.ALLOW_OVERWRITING,
-                 conll_extension=c.CONLL_EXTENSION,
-                 words_files_extension=c.WORDS_FILES_EXTENSION,
-                 coref_files_extension=c.COREF_FILES_EXTENSION,
-                 sentences_files_extension=c.SENTENCES_FILES_EXTENSION,
                  log_on_error=c.LOG_ON_ERROR,
+                 jobs=c.JOBS,
                  **kwargs):
         """
         Batch convert all files in a directory containing a `basedata_dir` and
         `markables_dir` directory as direct children.
-        """
-        basedata_dir = os.path.join(input_dir, basedata_dir)
-        markables_dir = os.path.join(input_dir, markables_dir)
-
-        words_files = {
-            filename[:-len(words_files_extension)]
-            for filename in os.listdir(basedata_dir)
-            if filename.endswith(words_files_extension)
-        }
-
-        coref_files = {
-            filename[:-len(coref_files_extension)]
-            for filename in os.listdir(markables_dir)
-            if filename.endswith(coref_files_extension)
-        }
 
-        if sentences_files_extension is not None:
-            sentences_files = {
-                filename[:-len(sentences_files_extension)]
-                for filename in os.listdir(markables_dir)
-                if filename.endswith(sentences_files_extension)
-            }
-
-        all_files = words_files & coref_files
-
-        if words_files - coref_files:
-            logger.warn(
-                "The following files seem to be words files, but do not"
-                " have corresponding coreference files:\n\t" + '\n\t'.join(
-                    sorted(words_files - coref_files)
-                )
-            )
+        Uses `jobs` worker processes if `jobs` is not 1 (see `run_tasks`).
+        """
+        cls.run_tasks(
+            cls.dir_tasks(input_dir, output_dir, **kwargs),
+            jobs=jobs,
+            log_on_error=log_on_error
+        )
 
-        if coref_files - words_files:
-            logger.warn(
-                "The following files seem to be coreference files, but do not"
-                " have corresponding words files:\n\t" + '\n\t'.join(
-                    sorted(coref_files - words_files)
-                )
-            )
+    @classmethod
+    def dir_tasks(cls, input_dir, output_dir,
+                  basedata_dir=c.WORDS_DIR,
+                  markables_dir=c.MARKABLES_DIR,
+                  allow_overwriting=c.ALLOW_OVERWRITING,
+                  conll_extension=c.CONLL_EXTENSION,
+                  words_files_extension=c.WORDS_FILES_EXTENSION,
+                  coref_files_extension=c.COREF_FILES_EXTENSION,
+                  sentences_files_extension=c.SENTENCES_FILES_EXTENSION,
+                  manifest=None,
+                  basedata_files=None,
+                  markables_files=None,
+                  **kwargs):
+        """
+        Find all files to convert in a directory containing a `basedata_dir`
+        and `markables_dir` directory as direct children.
 
-        if sentences_files_extension is not None:
-            all_files &= sentences_files
-            if words_files - sentences_files:
-                logger.warn(
-                    "The following files seem to be words files, but do not"
-                    " have corresponding sentences files:\n\t" + '\n\t'.join(
-                        sorted(words_files - sentences_files)
-                    )
-                )
+        The names of the files in these directories can be given as
+        `basedata_files` and `markables_files` (see `DocumentIndex`),
+        otherwise they are listed.
 
-            if coref_files - sentences_files:
-                logger.warn(
-                    "The following files seem to be coreference files, but do"
-                    " not have corresponding sentences files:\n\t" +
-                    '\n\t'.join(
-                        sorted(coref_files - sentences_files)
-                    )
-                )
+        Yields `(name, input_dir, args, kwargs)` tuples, sorted by name, where
+        `cls.single_main(*args, **kwargs)` converts the document `name`.
 
-            if sentences_files - words_files:
-                logger.warn(
-                    "The following files seem to be sentences files, but do"
-                    " not have corresponding words files:\n\t"
-                    + '\n\t'.join(
-                        sorted(sentences_files - words_files)
-                    )
-                )
+        Raises an IOError when an output file already exists and overwriting
+        is not allowed, unless it is in `manifest`.
 
-            if sentences_files - coref_files:
-                logger.warn(
-                    "The following files seem to be sentences files, but do"
-                    " not have corresponding coreference files:\n\t"
-                    + '\n\t'.join(
-                        sorted(sentences_files - coref_files)
-                    )
-                )
+        If `output_dir` is None, the tasks have no output file and return
+        their output instead (see `single_main`).
+        """
+        basedata_dir = os.path.join(input_dir, basedata_dir)
+        markables_dir = os.path.join(input_dir, markables_dir)
+        if basedata_files is None:
+            basedata_files = os.listdir(basedata_dir)
+        if markables_files is None:
+            markables_files = os.listdir(markables_dir)
+
+        all_files = cls.pair_files(
+            basedata_files,
+            markables_files,
+            words_files_extension=words_files_extension,
+            coref_files_extension=coref_files_extension,
+            sentences_files_extension=sentences_files_extension,
+        )
 
+        kwargs['words_files_extension'] = words_files_extension
         for name in sorted(all_files):
             words_file = os.path.join(basedata_dir, name) + \
                 words_files_extension
@@ -204,33 +307,230 @@ class Main:
                 else os.path.join(markables_dir, name) \
                 + sentences_files_extension
 
-            output_file = os.path.join(output_dir, name) + conll_extension
+            if output_dir is None:
+                output_file = None
+            else:
+                output_file = os.path.join(output_dir, name) + \
+                    conll_extension
 
-            if os.path.exists(output_file):
+            if output_file is not None and os.path.exists(output_file) and \
+               (manifest is None or output_file not in manifest):
                 if allow_overwriting:
                     logger.warn(f"Overwriting {output_file}")
                 else:
                     raise IOError(f"Will not overwrite: {output_file}")
-            try:
-                cls.single_main(
-                    output_file,
-                    words_file,
-                    coref_file,
-                    sentences_file,
-                    words_files_extension=words_files_extension,
-                    **kwargs
+
+            yield (
+                name,
+                input_dir,
+                (output_file, words_file, coref_file, sentences_file),
+                kwargs
+            )
+
+    @staticmethod
+    def pair_files(basedata_files, markables_files,
+                   words_files_extension=c.WORDS_FILES_EXTENSION,
+                   coref_files_extension=c.COREF_FILES_EXTENSION,
+                   sentences_files_extension=c.SENTENCES_FILES_EXTENSION):
+        """
+        Get the sorted names of the documents that have a words file in
+        `basedata_files` and a coreference file (and a sentences file, if
+        `sentences_files_extension` is not None) in `markables_files`.
+
+        Warns about the files that are missing for the other documents.
+        """
+        use_sentences = sentences_files_extension is not None
+        # Which of the words, coreference and sentences file exist
+        documents = {}
+        for filename in basedata_files:
+            if filename.endswith(words_files_extension):
+                name = filename[:-len(words_files_extension)]
+                documents.setdefault(name, [False, False, False])[0] = True
+        for filename in markables_files:
+            if filename.endswith(coref_files_extension):
+                name = filename[:-len(coref_files_extension)]
+                documents.setdefault(name, [False, False, False])[1] = True
+            if use_sentences and filename.endswith(sentences_files_extension):
+                name = filename[:-len(sentences_files_extension)]
+                documents.setdefault(name, [False, False, False])[2] = True
+
+        all_files = []
+        # (kind of file found, kind of file missing): [name, ...]
+        missing = {
+            (having, lacking): []
+            for having in range(3)
+            for lacking in range(3)
+        }
+        for name in sorted(documents):
+            found = documents[name]
+            if found[0] and found[1] and (found[2] or not use_sentences):
+                all_files.append(name)
+            for having in range(3 if use_sentences else 2):
+                for lacking in range(3 if use_sentences else 2):
+                    if found[having] and not found[lacking]:
+                        missing[having, lacking].append(name)
+
+        kinds = ['words', 'coreference', 'sentences']
+        for having, lacking in [(0, 1), (1, 0), (0, 2), (1, 2), (2, 0),
+                                (2, 1)]:
+            if missing[having, lacking]:
+                logger.warn(
+                    f"The following files seem to be {kinds[having]} files,"
+                    " but do"
+                    f" not have corresponding {kinds[lacking]} files:\n\t"
+                    + '\n\t'.join(missing[having, lacking])
                 )
-            except Exception as e:
-                if log_on_error:
-                    logger.error(
-                        f"{name} from {input_dir} is skipped: " + e.args[0]
+        return all_files
+
+    @staticmethod
+    def task_size(task):
+        """
+        Get the total size in bytes of the input files of a
+        `(name, input_dir, args, kwargs)` task.
+
+        The first argument is the output file, the other arguments that are
+        not None are input files.
+        """
+        _, _, args, _ = task
+        return sum(
+            os.path.getsize(filename)
+            for filename in args[1:]
+            if filename is not None
+        )
+
+    @classmethod
+    def run_tasks(cls, tasks, jobs=c.JOBS, log_on_error=c.LOG_ON_ERROR,
+                  on_done=None, profiles=None):
+        """
+        Run `cls.single_main` for every `(name, input_dir, args, kwargs)` task.
+
+        If `jobs` is 1, the tasks are run one after another in this process.
+        Otherwise they are distributed over `jobs` worker processes, or over
+        one worker process per CPU if `jobs` is 0 or None. Every task writes
+        its own output file, or returns its output to `on_done`, which is
+        called in the order of `tasks`, so the output does not depend on the
+        order in which the workers finish. At most `c.TASKS_PER_WORKER` tasks
+        per worker are submitted at a time, so the results that wait for an
+        earlier task to finish do not fill up the memory.
+
+        Errors are handled per task, in the order of `tasks`: if
+        `log_on_error`, the error is logged and the task is skipped, otherwise
+        the error is re-raised with the name of the task in its message and
+        all tasks that have not started yet are cancelled.
+
+        `on_done(task, result)` is called for every task that finished without
+        errors, where `result` is what `cls.single_main` returned.
+
+        If `profiles` is a `Profiles`, every task is profiled and its
+        statistics are saved to `profiles.filename(name)`.
+        """
+        if jobs == 1:
+            for task in tasks:
+                name, input_dir, args, kwargs = task
+                try:
+                    result = run_profiled(
+                        cls.profile_file(profiles, name),
+                        cls.single_main,
+                        *args,
+                        **kwargs
                     )
+                except Exception as e:
+                    cls.handle_task_error(e, name, input_dir, log_on_error)
                 else:
-                    e.args = (
-                        f"While processing {name} from {input_dir}: " +
-                        e.args[0],
-                    ) + e.args[1:]
-                    raise e
+                    if on_done is not None:
+                        on_done(task, result)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = jobs or os.cpu_count() or 1
+        remaining = iter(tasks)
+        # Make sure workers that do not inherit the logging configuration
+        # (i.e. spawned workers) log at the same level.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=partial(
+                logging.basicConfig,
+                level=logging.getLogger().getEffectiveLevel()
+            )
+        ) as executor:
+            def submit(task):
+                return task, executor.submit(
+                    cls.worker_single_main,
+                    *task[2],
+                    profile_file=cls.profile_file(profiles, task[0]),
+                    **task[3]
+                )
+
+            futures = deque(map(
+                submit,
+                it.islice(remaining, workers * c.TASKS_PER_WORKER)
+            ))
+            # Handled tasks are dropped, so their results (which can be the
+            # output of a whole document) do not stay in memory
+            while futures:
+                task, future = futures.popleft()
+                name, input_dir, _, _ = task
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not log_on_error:
+                        for _, other in futures:
+                            other.cancel()
+                    cls.handle_task_error(e, name, input_dir, log_on_error)
+                else:
+                    if on_done is not None:
+                        on_done(task, result)
+                futures.extend(map(submit, it.islice(remaining, 1)))
+
+    @classmethod
+    def worker_single_main(cls, *args, profile_file=None, **kwargs):
+        """
+        Run `cls.single_main` in a worker process, profiled if `profile_file`
+        is not None (see `run_profiled`).
+
+        Exceptions that cannot be pickled (e.g. the ones from lxml) are
+        replaced by a `WorkerError` with the same message.
+        """
+        try:
+            return run_profiled(
+                profile_file,
+                cls.single_main,
+                *args,
+                **kwargs
+            )
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                raise WorkerError(str(e)) from None
+            raise e
+
+    @staticmethod
+    def profile_file(profiles, name):
+        """
+        Get the file to save the profile of task `name` to, or None if
+        `profiles` is None.
+        """
+        return None if profiles is None else profiles.filename(name)
+
+    @staticmethod
+    def handle_task_error(error, name, input_dir,
+                          log_on_error=c.LOG_ON_ERROR):
+        """
+        Log `error` if `log_on_error` and re-raise it with the name of the
+        document in its message otherwise.
+        """
+        if log_on_error:
+            logger.error(
+                f"{name} from {input_dir} is skipped: " + error.args[0]
+            )
+        else:
+            error.args = (
+                f"While processing {name} from {input_dir}: " +
+                error.args[0],
+            ) + error.args[1:]
+            raise error
 
     @classmethod
     def single_main(
@@ -249,63 +549,109 @@ class Main:
            min_column_spacing=c.MIN_COLUMN_SPACING,
            conll_columns=c.CONLL_COLUMNS,
            on_missing=c.CONLL_ON_MISSING,
-           coref_filter=c.MMAX_COREF_FILTER,
-           sentence_filter=c.SENTENCE_DEFAULT_FILTER):
+           coref_filter=None,
+           sentence_filter=c.SENTENCE_DEFAULT_FILTER,
+           output_flush_size=c.OUTPUT_FLUSH_SIZE,
+           atomic_output=c.ATOMIC_OUTPUT,
+           conll_index=c.CONLL_INDEX,
+           xml_parser_options=None,
+           validation_sample_rate=c.VALIDATION_SAMPLE_RATE,
+           instrument=False):
+        """
+        Convert one document.
+
+        If `instrument`, returns the `Instrumentation` record of the
+        conversion, with the stages `read`, `read_coref`, `convert` (which
+        contains `check_spans` and `uniqueyfy`) and `write`.
+
+        If `output_file` is None, the output is not written but returned
+        (encoded) in a `DocumentOutput` together with the record.
+        """
+        instrumentation = Instrumentation() if instrument \
+            else NO_INSTRUMENTATION
+
+        # Pick the validation level of this document when sampling
+        validate_xml = document_validation_level(
+            validate_xml,
+            os.path.basename(words_file),
+            validation_sample_rate
+        )
+
         # Read sentences
-        if sentences_file is None:
-            document_id, sentences = cls.read_COREA(
-                filename=words_file,
-                extension=words_files_extension,
-                validate_xml=validate_xml,
-                on_missing_document_ID=on_missing['document_id'],
-                warn_on_auto_use_Med_item_reader=warn_on_auto_use_Med_item_reader   # noqa
-            )
-        else:
-            document_id, sentences = cls.read_SoNaR(
-                words_file=words_file,
-                sentences_file=sentences_file,
-                validate_xml=validate_xml,
-                words_files_extension=words_files_extension,
-                on_missing_document_ID=on_missing['document_id']
-            )
+        with instrumentation.stage('read'):
+            if sentences_file is None:
+                document_id, sentences = cls.read_COREA(
+                    filename=words_file,
+                    extension=words_files_extension,
+                    validate_xml=validate_xml,
+                    on_missing_document_ID=on_missing['document_id'],
+                    warn_on_auto_use_Med_item_reader=warn_on_auto_use_Med_item_reader,   # noqa
+                    xml_parser_options=xml_parser_options
+                )
+            else:
+                document_id, sentences = cls.read_SoNaR(
+                    words_file=words_file,
+                    sentences_file=sentences_file,
+                    validate_xml=validate_xml,
+                    words_files_extension=words_files_extension,
+                    on_missing_document_ID=on_missing['document_id'],
+                    xml_parser_options=xml_parser_options
+                )
 
         # Read in coreference data
         logger.debug(f"Read coreference data of {document_id}")
-        coref_chains = MMAXCorefDocumentReader(
-            words=it.chain(*sentences),
-            validate=validate_xml,
-            item_filter=coref_filter,
-        ).extract_coref_sets(
-            etree.parse(coref_file)
-        )
+        with instrumentation.stage('read_coref'):
+            word_index = WordIndex.from_sentences(sentences)
+            coref_chains = MMAXCorefDocumentReader(
+                words=word_index,
+                validate=validate_xml,
+                item_filter=coref_filter,
+                parser_options=xml_parser_options,
+            ).stream_coref_sets(coref_file)
+        instrumentation.count('sentences', len(sentences))
+        instrumentation.count('words', len(word_index))
+        instrumentation.count('chains', len(coref_chains))
+        instrumentation.count('markables', sum(map(len, coref_chains)))
 
         # Merge coref data into sentences (in place)
-        MMAXCorefConverter(
-            sentences,
-            uniqueyfy=uniqueyfy,
-            fill_spans=fill_non_consecutive_coref_spans,
-        ).add_data_from_MMAX_chains(coref_chains)
+        with instrumentation.stage('convert'):
+            MMAXCorefConverter(
+                sentences,
+                uniqueyfy=uniqueyfy,
+                fill_spans=fill_non_consecutive_coref_spans,
+                word_index=word_index,
+                instrumentation=instrumentation,
+            ).add_data_from_MMAX_chains(coref_chains, span_as_indices=True)
 
         sentences = filter(sentence_filter, sentences)
 
         # Save the data to CoNLL
-        cls.write_conll(
-            filename=output_file,
-            writer=CoNLLWriter(
-                defaults=conll_defaults,
-                min_column_spacing=min_column_spacing,
-                on_missing=on_missing,
-                columns=conll_columns,
-            ),
-            document_id=document_id,
-            sentences=sentences
-        )
+        with instrumentation.stage('write'):
+            data = cls.write_conll(
+                filename=output_file,
+                writer=CoNLLWriter(
+                    defaults=conll_defaults,
+                    min_column_spacing=min_column_spacing,
+                    on_missing=on_missing,
+                    columns=conll_columns,
+                ),
+                document_id=document_id,
+                sentences=sentences,
+                flush_size=output_flush_size,
+                atomic=atomic_output,
+                index=conll_index,
+            )
+
+        if output_file is None:
+            return DocumentOutput(document_id, data, instrumentation.record())
+        return instrumentation.record()
 
     @classmethod
     def read_SoNaR(cls, words_file, sentences_file,
                    validate_xml=c.VALIDATE_XML,
                    words_files_extension=c.WORDS_FILES_EXTENSION,
-                   on_missing_document_ID=c.CONLL_ON_MISSING['document_id']):
+                   on_missing_document_ID=c.CONLL_ON_MISSING['document_id'],
+                   xml_parser_options=None):
         """
         Read sentences and document ID from a words_file and sentences file
         from SoNaR.
@@ -321,19 +667,20 @@ class Main:
 
         # Read words
         logger.debug(f"Read words of {document_id}")
-        words = list(SoNaRWordsDocumentReader(
-            validate=validate_xml
-        ).extract_items(
-            etree.parse(words_file)
-        ))
+        words = TokenTable()
+        words.extend(SoNaRWordsDocumentReader(
+            validate=validate_xml,
+            parser_options=xml_parser_options
+        ).stream_items(words_file))
 
         logger.debug(f"Read sentences of {document_id}")
         # Add sentence data
         sentence_items = SoNaRSentencesDocumentReader(
-            words,
-            validate=validate_xml
-        ).extract_items(etree.parse(sentences_file))
-        sentences = add_sentence_layer_to_words(words, sentence_items)
+            WordIndex(words.column('id')),
+            validate=validate_xml,
+            parser_options=xml_parser_options
+        ).stream_items(sentences_file)
+        sentences = words.take(item['span'] for item in sentence_items)
         del words, sentence_items
 
         add_word_numbers(sentences)
@@ -347,21 +694,27 @@ class Main:
             extension=c.WORDS_FILES_EXTENSION,
             validate_xml=c.VALIDATE_XML,
             on_missing_document_ID=c.CONLL_ON_MISSING['document_id'],
-            warn_on_auto_use_Med_item_reader=c.WARN_ON_AUTO_USE_MED_ITEM_READER
+            warn_on_auto_use_Med_item_reader=(
+                c.WARN_ON_AUTO_USE_MED_ITEM_READER
+            ),
+            xml_parser_options=None
             ):
         """
         Read sentences and document ID from a words_file from COREA.
 
         First tries to figure out the document ID using the xml and falls back
-        on finding a document ID using the file basename.
+        on finding a document ID using the file basename. The file is parsed
+        only once: the document ID is read from its first word.
 
         See Ch. 7 of Essential Speech and Language Technology for Dutch
         COREA: Coreference Resolution for Extracting Answers for Dutch
         https://link.springer.com/book/10.1007/978-3-642-30910-6
         """
-        reader = COREAWordsDocumentReader(validate=validate_xml)
-        xml = etree.parse(filename)
-        document_id = reader.extract_document_ID(xml)
+        reader = COREAWordsDocumentReader(
+            validate=validate_xml,
+            parser_options=xml_parser_options
+        )
+        document_id, words = reader.stream_document_ID_and_words(filename)
         if document_id is None and extension is not None:
             document_id = document_ID_from_filename(filename, extension)
         cls.check_document_id(document_id, filename, on_missing_document_ID)
@@ -377,7 +730,7 @@ class Main:
             reader.item_reader = COREAMedWordReader()
 
         logger.debug(f"Read words and sentences of {document_id}")
-        return document_id, reader.extract_sentences(xml)
+        return document_id, reader.stream_sentences_from_elements(words)
 
     @classmethod
     def check_document_id(cls, document_id, filename,
@@ -400,17 +753,36 @@ class Main:
                 )
 
     @classmethod
-    def write_conll(cls, filename, writer, document_id, sentences):
+    def write_conll(cls, filename, writer, document_id, sentences,
+                    flush_size=c.OUTPUT_FLUSH_SIZE, atomic=c.ATOMIC_OUTPUT,
+                    index=c.CONLL_INDEX):
         """
         Write sentence data to a file in CoNLL format.
+
+        The output is written in chunks of `flush_size` characters (see
+        `BufferedOutput`). If `atomic`, it is written to a temporary file
+        that replaces `filename` once everything is written.
+
+        If `index`, the byte offsets of the parts are saved next to the file
+        (see `CoNLLIndex`).
+
+        If `filename` is None, the output is returned as bytes, encoded as it
+        would be in a file (see `encode_output`), instead.
         """
-        with open(filename, 'w') as fd:
+        if filename is None:
+            fd = io.StringIO()
+            writer.write(fd, document_id, sentences)
+            return encode_output(fd.getvalue())
+        with BufferedOutput(filename, flush_size, atomic) as fd:
             writer.write(fd, document_id, sentences)
+        if index:
+            CoNLLIndex.build(filename).save(index_filename(filename))
 
     @classmethod
-    def can_output_to(cls, output, config, batch):
+    def can_output_to(cls, output, config, batch, incremental=False):
         if os.path.exists(output):
-            if not config['allow_overwriting']:
+            if not config['allow_overwriting'] and \
+               not (batch and incremental):
                 thing = "folder" if batch else "file"
                 raise ValueError(
                     "The configuration specifies overwriting is not allowed,"
@@ -492,6 +864,35 @@ class Main:
         parser.add_argument('-d', '--directory', action='append',
                             dest='directories', type=directory_exists,
                             help="Directory to batch convert files from")
+        parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="Number of worker processes to use when"
+                            " batch converting. 0 means one per CPU."
+                            " Overrides `jobs` from the configuration file")
+        parser.add_argument('-i', '--incremental', action='store_true',
+                            default=None,
+                            help="Only convert the documents whose input"
+                            " files or configuration changed since the last"
+                            " batch conversion to the same output folder."
+                            " Overrides `incremental` from the configuration"
+                            " file")
+        parser.add_argument('--index-cache', default=None,
+                            help="File to save the data folders and files"
+                            " found when batch converting in, so they do not"
+                            " have to be searched again the next time."
+                            " Overrides `index_cache` from the configuration"
+                            " file")
+        parser.add_argument('--stats', default=None, dest='stats_file',
+                            help="File to save statistics about the"
+                            " conversion of every document in, as JSON lines"
+                            " with the time spent per stage and the number of"
+                            " words, sentences, chains and markables."
+                            " Overrides `stats_file` from the configuration"
+                            " file")
+        parser.add_argument('--profile', default=None, dest='profile_dir',
+                            help="Directory to save a cProfile profile of the"
+                            " conversion of every document in, together with"
+                            " a report of the functions that took the most"
+                            " time over all documents")
         parser.add_argument('config', help="YAML configuration file",
                             type=file_exists)
         parser.add_argument('output',
@@ -533,6 +934,9 @@ class Main:
             args.pop('sentences_file')
         else:
             del args['directories']
+            del args['jobs']
+            del args['incremental']
+            del args['index_cache']
             args['output_file'] = output
             if args['words_file'] is None or args['coref_file'] is None:
                 parser.error(
@@ -549,19 +953,44 @@ class Main:
         args.update(
             cls.keys_from_config(config, args_from_config, config_file)
         )
+        # Optional, so configuration files without it keep working
+        if args['stats_file'] is None:
+            args['stats_file'] = config.get('stats_file', c.STATS_FILE)
 
-        coref_type_filter = c.MMAX_TYPE_FILTERS[
-            args.pop('coref_type_filter')
-        ]
-        coref_level_filter = c.MMAX_LEVEL_FILTERS[
+        # Compiled once, instead of looking both filters up for every markable
+        args['coref_filter'] = compile_coref_filter(
+            args.pop('coref_type_filter'),
             args.pop('coref_level_filter')
-        ]
-        args['coref_filter'] = lambda i: \
-            coref_type_filter(i) and \
-            coref_level_filter(i)
+        )
 
         args['sentence_filter'] = c.SENTENCE_FILTERS[args['sentence_filter']]
 
+        # Check the validation level and the (optional) sample rate before
+        # converting anything
+        validation_level(args['validate_xml'])
+        args['validation_sample_rate'] = config.get(
+            'validation_sample_rate',
+            c.VALIDATION_SAMPLE_RATE
+        )
+        if not 0 <= args['validation_sample_rate'] <= 1:
+            raise ValueError(
+                "`validation_sample_rate` should be between 0 and 1, but is"
+                f" {args['validation_sample_rate']!r}"
+            )
+
+        # Optional, so configuration files without them keep working
+        args['output_flush_size'] = config.get(
+            'output_flush_size',
+            c.OUTPUT_FLUSH_SIZE
+        )
+        args['atomic_output'] = config.get('atomic_output', c.ATOMIC_OUTPUT)
+        args['conll_index'] = config.get('conll_index', c.CONLL_INDEX)
+        # Optional as well, but checked now so unknown options are reported
+        # before anything is converted
+        args['xml_parser_options'] = parser_options(
+            config.get('xml_parser_options', None)
+        )
+
         # Read batch keys
         if batch:
             args.update(
@@ -571,9 +1000,32 @@ class Main:
                     config_file
                 )
             )
+            # Optional, so configuration files without it keep working
+            if args['jobs'] is None:
+                args['jobs'] = config.get('jobs', c.JOBS)
+            if args['incremental'] is None:
+                args['incremental'] = config.get(
+                    'incremental',
+                    c.INCREMENTAL
+                )
+            if args['index_cache'] is None:
+                args['index_cache'] = config.get(
+                    'index_cache',
+                    c.INDEX_CACHE
+                )
+            args['shard_size'] = config.get('shard_size', c.SHARD_SIZE)
+            args['shard_documents'] = config.get(
+                'shard_documents',
+                c.SHARD_DOCUMENTS
+            )
 
         # Verify the output location
-        cls.can_output_to(output, config, batch)
+        cls.can_output_to(
+            output,
+            config,
+            batch,
+            incremental=args.get('incremental', False)
+        )
 
         return batch, args
 
@@ -613,7 +1065,25 @@ class Main:
         if batch:
             cls.super_dir_main(**args)
         else:
-            cls.single_main(**args)
+            stats_file = args.pop('stats_file')
+            profile_dir = args.pop('profile_dir')
+            profiles = None if profile_dir is None else Profiles(profile_dir)
+            name = os.path.basename(args['words_file'])
+            record = run_profiled(
+                cls.profile_file(profiles, name),
+                cls.single_main,
+                instrument=stats_file is not None,
+                **args
+            )
+            if stats_file is not None:
+                with Statistics(stats_file) as statistics:
+                    statistics.add(
+                        name,
+                        os.path.dirname(args['words_file']),
+                        record
+                    )
+            if profiles is not None:
+                profiles.report()
         logger.info("Done!")
 
 
@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+import logging
+from functools import partial
+
+from . import __version__
+from .output import BufferedOutput
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+class Manifest:
+    """
+    Record of the inputs and the configuration every output file of a batch
+    conversion was created from, so that a re-run only needs to convert the
+    documents whose inputs or configuration changed.
+
+    The manifest is a JSON file in the output directory, with for every
+    output file (relative to the output directory):
+     - the version of the tool
+     - a hash of the configuration (the keyword arguments of the task)
+     - the size, modification time and SHA-256 hash of every input file
+
+    An input file is only hashed again if its size or modification time
+    changed.
+
+    A task is a `(name, input_dir, args, kwargs)` tuple, where the first
+    argument is the output file and the other arguments that are not None are
+    input files.
+    """
+    FORMAT_VERSION = 1
+    # Configuration keys that only change what is measured, how the same
+    # output is produced or how it is written to disk
+    UNHASHED_KEYS = frozenset({
+        'instrument',
+        'output_flush_size',
+        'atomic_output',
+    })
+    HASH_CHUNK_SIZE = 1 << 20
+
+    def __init__(self, filename, root, documents=None, version=__version__):
+        self.filename = filename
+        self.root = root
+        self.documents = {} if documents is None else documents
+        self.version = version
+        self.pending = {}
+
+    @classmethod
+    def load(cls, filename, root, version=__version__):
+        """
+        Read the manifest from `filename`. Start an empty one if it does not
+        exist or was written in an other format.
+        """
+        documents = None
+        if os.path.exists(filename):
+            with open(filename) as fd:
+                data = json.load(fd)
+            if data.get('format') == cls.FORMAT_VERSION:
+                documents = data['documents']
+            else:
+                logger.warn(
+                    f"Ignoring {filename}, because it has an unknown format"
+                )
+        return cls(filename, root, documents, version)
+
+    def save(self):
+        """
+        Write the manifest to `self.filename`, replacing it atomically.
+        """
+        with BufferedOutput(self.filename, atomic=True) as fd:
+            json.dump(
+                {'format': self.FORMAT_VERSION, 'documents': self.documents},
+                fd,
+                indent=1,
+                sort_keys=True
+            )
+
+    def key(self, output_file):
+        return os.path.relpath(output_file, self.root)
+
+    def __contains__(self, output_file):
+        return self.key(output_file) in self.documents
+
+    def outdated(self, tasks):
+        """
+        Yield the tasks whose output file is missing or was created from
+        other inputs, an other configuration or by an other version.
+
+        Call `done` for every task that is converted successfully.
+        """
+        # The tasks of a directory share their keyword arguments. Keep them
+        # in here, so their `id` is not reused.
+        config_hashes = {}
+        up_to_date = 0
+        for task in tasks:
+            _, _, args, kwargs = task
+            output_file = args[0]
+            key = self.key(output_file)
+            old = self.documents.get(key, {})
+
+            try:
+                _, config_hash = config_hashes[id(kwargs)]
+            except KeyError:
+                config_hash = self.config_hash(kwargs)
+                config_hashes[id(kwargs)] = kwargs, config_hash
+
+            record = {
+                'version': self.version,
+                'config': config_hash,
+                'inputs': self.input_records(
+                    (
+                        filename
+                        for filename in args[1:]
+                        if filename is not None
+                    ),
+                    old.get('inputs', {})
+                ),
+            }
+            if self.same_content(record, old) and \
+               os.path.exists(output_file):
+                # Remember new modification times
+                self.documents[key] = record
+                up_to_date += 1
+            else:
+                self.pending[key] = record
+                yield task
+        logger.info(f"Skipping {up_to_date} documents that are up to date")
+
+    @staticmethod
+    def same_content(record, old):
+        """
+        Check whether two records are for the same version, configuration and
+        input files with the same content.
+        """
+        return (
+            record['version'] == old.get('version')
+            and record['config'] == old.get('config')
+            and {
+                filename: input_record['sha256']
+                for filename, input_record in record['inputs'].items()
+            } == {
+                filename: input_record['sha256']
+                for filename, input_record in old.get('inputs', {}).items()
+            }
+        )
+
+    def done(self, task):
+        """
+        Record that the output of a task yielded by `outdated` was created.
+        """
+        key = self.key(task[2][0])
+        self.documents[key] = self.pending.pop(key)
+
+    def input_records(self, filenames, old):
+        """
+        Get a `{filename: {size, mtime_ns, sha256}}` map. The old hash is kept
+        if the size and modification time did not change.
+        """
+        records = {}
+        for filename in filenames:
+            stat = os.stat(filename)
+            record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            old_record = old.get(filename, {})
+            if all(old_record.get(k) == v for k, v in record.items()):
+                record['sha256'] = old_record['sha256']
+            else:
+                record['sha256'] = self.file_hash(filename)
+            records[filename] = record
+        return records
+
+    @classmethod
+    def file_hash(cls, filename):
+        """
+        Get the SHA-256 hash of the content of a file.
+        """
+        file_hash = hashlib.sha256()
+        with open(filename, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(cls.HASH_CHUNK_SIZE), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    @classmethod
+    def config_hash(cls, config):
+        """
+        Get the SHA-256 hash of a configuration, which may contain functions
+        (e.g. filters) and sets.
+
+        Keys in `UNHASHED_KEYS` do not change the output and are left out.
+        """
+        config = {
+            key: value
+            for key, value in config.items()
+            if key not in cls.UNHASHED_KEYS
+        }
+        return hashlib.sha256(json.dumps(
+            config,
+            sort_keys=True,
+            default=cls.describe
+        ).encode()).hexdigest()
+
+    @staticmethod
+    def describe(value):
+        """
+        Get a JSON serialisable description of `value` that does not depend
+        on the process it is in.
+        """
+        if isinstance(value, partial):
+            return {
+                'partial': [value.func, value.args, value.keywords]
+            }
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        if callable(value) and not hasattr(value, '__qualname__'):
+            # An object that is called, e.g. a filter with settings
+            cls = type(value)
+            return {f'{cls.__module__}.{cls.__qualname__}': vars(value)}
+        if callable(value):
+            return f'{value.__module__}.{value.__qualname__}'
+        raise TypeError(f"Cannot describe {value!r} in a manifest")
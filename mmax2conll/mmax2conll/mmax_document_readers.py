@@ -1,10 +1,13 @@
 import re
+import zlib
 import logging
-from os import path
 import itertools as it
+from os import path
 
 from . import constants as c
 from .util import ValidationError
+from .token_table import TokenTable, WordIndex
+from .xml_parsers import get_parser_pool
 from .mmax_item_readers import (
     SoNaRWordReader,
     COREAWordReader,
@@ -35,6 +38,96 @@ def document_ID_from_filename(filename, extension):
     return None
 
 
+class CorefFilter:
+    """
+    A filter of markables that lets the markables pass whose type is in
+    `types` and whose level is in `levels`. A markable without a type or a
+    level always passes and None lets every type or level pass.
+
+    `MMAXCorefDocumentReader` uses `types` and `levels` to apply the filter to
+    the XML-elements of the markables before reading them.
+    """
+
+    def __init__(self, types, levels):
+        self.types = types
+        self.levels = levels
+
+    def __call__(self, item):
+        return (
+            self.types is None or 'type' not in item or
+            item['type'] in self.types
+        ) and (
+            self.levels is None or 'level' not in item or
+            item['level'] in self.levels
+        )
+
+
+def compile_coref_filter(type_filter=c.COREF_TYPE_FILTER,
+                         level_filter=c.COREF_LEVEL_FILTER):
+    """
+    Combine the coreference filters named `type_filter` (a key of
+    `c.MMAX_TYPE_FILTER_VALUES`) and `level_filter` (a key of
+    `c.MMAX_LEVEL_FILTER_VALUES`) into one filter of markables, which lets
+    the markables pass that pass both filters.
+
+    Returns a (picklable) `CorefFilter`.
+
+    Raises a ValueError for unknown filter names.
+    """
+    if type_filter not in c.MMAX_TYPE_FILTER_VALUES:
+        raise ValueError(
+            f"Unknown coreference type filter: {type_filter!r}. Known"
+            f" filters are: {sorted(c.MMAX_TYPE_FILTER_VALUES)!r}"
+        )
+    if level_filter not in c.MMAX_LEVEL_FILTER_VALUES:
+        raise ValueError(
+            f"Unknown coreference level filter: {level_filter!r}. Known"
+            f" filters are: {sorted(c.MMAX_LEVEL_FILTER_VALUES)!r}"
+        )
+    return CorefFilter(
+        c.MMAX_TYPE_FILTER_VALUES[type_filter],
+        c.MMAX_LEVEL_FILTER_VALUES[level_filter]
+    )
+
+
+def validation_level(validate):
+    """
+    Get the validation level (see `c.VALIDATION_LEVELS`) for the value of
+    `validate_xml`, which is a level or a boolean: `True` means 'full' and
+    `False` means 'none'.
+
+    Raises a ValueError for an unknown level.
+    """
+    if validate is True:
+        return 'full'
+    if validate is False:
+        return 'none'
+    if validate not in c.VALIDATION_LEVELS:
+        raise ValueError(
+            f"`validate_xml` should be a boolean or one of"
+            f" {c.VALIDATION_LEVELS}, but is {validate!r}"
+        )
+    return validate
+
+
+def document_validation_level(validate, name,
+                              sample_rate=c.VALIDATION_SAMPLE_RATE):
+    """
+    Get the validation level for the document `name`.
+
+    If the level is 'sampled', a document is validated fully if it is one of
+    the fraction `sample_rate` of documents picked by a hash of its name, so
+    the same documents are picked on every run. The others are validated
+    structurally.
+    """
+    level = validation_level(validate)
+    if level != 'sampled':
+        return level
+    if zlib.crc32(name.encode('utf-8')) < sample_rate * 2**32:
+        return 'full'
+    return 'structural'
+
+
 def add_sentence_layer_to_words(words, sentence_items):
     """
     Splits a collection of words into a sequence of sentences using information
@@ -53,6 +146,12 @@ def add_word_numbers(sentences):
     """
     Add word numbers in place
     """
+    if isinstance(sentences, TokenTable):
+        word_numbers = sentences.column('word_number')
+        for sentence in sentences:
+            word_numbers[sentence.start:sentence.stop] = range(len(sentence))
+        return
+
     for sentence in sentences:
         for number, word in enumerate(sentence):
             word['word_number'] = number
@@ -65,25 +164,40 @@ class XMLItemReader:
     Things that are verified if `validate=True`:
      - the tag of the root element is as expected
      - the tag of all the word elements is as expected
+
+    `validate` can also be a validation level (see `validation_level`).
+    Checks like these, that are done while reading the elements, are done
+    from the 'structural' level on. Checks that go over the content of a
+    whole document again are only done at the 'full' level. The
+    'sampled' level should be resolved per document using
+    `document_validation_level` first.
+
+    XML is streamed using the parsers of the `XMLParserPool` of this process
+    for `parser_options` (see `xml_parsers.parser_options`).
     """
 
     def __init__(self, item_reader, validate, expected_child_tag,
-                 expected_root_tag, item_filter=lambda i: True):
+                 expected_root_tag, item_filter=lambda i: True,
+                 parser_options=None):
         self.item_reader = item_reader
-        self.validate = validate
+        self.validation = validation_level(validate)
+        if self.validation == 'sampled':
+            raise ValueError(
+                "Use `document_validation_level` to pick the validation level"
+                " of a document when sampling"
+            )
+        self.validate = self.validation != 'none'
+        self.validate_content = self.validation == 'full'
         self.expected_child_tag = expected_child_tag
         self.expected_root_tag = expected_root_tag
         self.item_filter = item_filter
+        self.parser_pool = get_parser_pool(parser_options)
 
-    def get_child_elements(self, xml):
+    def get_ns_remover(self, root):
         """
-        Get the XML-elements of the direct children of the root and validate:
-         - the tag of the root element
-         - the tag of the child elements
+        Get a function that removes the name space of `root` from a tag if
+        `self.validate` and leaves the tag alone otherwise.
         """
-        root = xml.getroot()
-
-        # Create `rm_ns` function to remove the name space
         if self.validate and None in root.nsmap:
             ns = root.nsmap[None]
             nslen = len(ns)
@@ -97,27 +211,82 @@ class XMLItemReader:
         else:
             def rm_ns(tag):
                 return tag
+        return rm_ns
+
+    def validate_root(self, root, rm_ns):
+        """
+        Validate the tag of the root element
+        """
+        if rm_ns(root.tag) != self.expected_root_tag:
+            raise ValidationError(
+                f"The root element did not have the expected tag"
+                f" {self.expected_root_tag!r}. Found: {root.tag!r} and"
+                f" using: {rm_ns(root.tag)!r}"
+            )
+
+    def validate_child(self, child, rm_ns):
+        """
+        Validate the tag of a child element
+        """
+        if rm_ns(child.tag) != self.expected_child_tag:
+            raise ValidationError(
+                f"One of the children did not have the expected tag"
+                f" {self.expected_child_tag!r}."
+                f" Found: {child.tag!r} and"
+                f" using: {rm_ns(child.tag)!r}"
+            )
+
+    def get_child_elements(self, xml):
+        """
+        Get the XML-elements of the direct children of the root and validate:
+         - the tag of the root element
+         - the tag of the child elements
+        """
+        root = xml.getroot()
+        rm_ns = self.get_ns_remover(root)
 
         if self.validate:
-            if rm_ns(root.tag) != self.expected_root_tag:
-                raise ValidationError(
-                    f"The root element did not have the expected tag"
-                    f" {self.expected_root_tag!r}. Found: {root.tag!r} and"
-                    f" using: {rm_ns(root.tag)!r}"
-                )
+            self.validate_root(root, rm_ns)
 
         children = root.getchildren()
         if self.validate:
             for child in children:
-                if rm_ns(child.tag) != self.expected_child_tag:
-                    raise ValidationError(
-                        f"One of the children did not have the expected tag"
-                        f" {self.expected_child_tag!r}."
-                        f" Found: {child.tag!r} and"
-                        f" using: {rm_ns(child.tag)!r}"
-                    )
+                self.validate_child(child, rm_ns)
         return children
 
+    def iter_child_elements(self, source):
+        """
+        Stream the XML-elements of the direct children of the root of
+        `source`, which is a filename or a file object, and validate on the
+        fly:
+         - the tag of the root element
+         - the tag of the child elements
+
+        Only the element that was yielded last is kept in memory: it is
+        cleared as soon as the next one is requested.
+        """
+        depth = 0
+        root = rm_ns = None
+        for event, element in self.parser_pool.iterparse(source):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    root = element
+                    rm_ns = self.get_ns_remover(root)
+                    if self.validate:
+                        self.validate_root(root, rm_ns)
+                continue
+
+            depth -= 1
+            if depth == 1:
+                if self.validate:
+                    self.validate_child(element, rm_ns)
+                yield element
+                # Free the memory of this and all previous children
+                element.clear()
+                while element.getprevious() is not None:
+                    del root[0]
+
     def extract_all_items(self, xml):
         """
         Extract all information for every item.
@@ -135,6 +304,24 @@ class XMLItemReader:
         """
         return filter(self.item_filter, self.extract_all_items(xml))
 
+    def stream_all_items(self, source):
+        """
+        Extract all information for every item while streaming through
+        `source`, which is a filename or a file object.
+
+        Returns an iterator of things returned by `self.item_reader.read`
+        """
+        return map(self.item_reader.read, self.iter_child_elements(source))
+
+    def stream_items(self, source):
+        """
+        Extract all information for every item while streaming through
+        `source`, filtering items using `self.item_filter`.
+
+        Returns an iterator of things returned by `self.item_reader.read`
+        """
+        return filter(self.item_filter, self.stream_all_items(source))
+
 
 class SoNaRWordsDocumentReader(XMLItemReader):
     """
@@ -158,7 +345,8 @@ class SoNaRWordsDocumentReader(XMLItemReader):
                  validate=c.VALIDATE_XML,
                  expected_child_tag=c.MMAX_WORD_TAG,
                  expected_root_tag=c.MMAX_WORDS_TAG,
-                 item_filter=c.MMAX_WORDS_FILTER):
+                 item_filter=c.MMAX_WORDS_FILTER,
+                 parser_options=None):
         # Default item_reader
         item_reader = item_reader \
             if item_reader is not None \
@@ -169,6 +357,7 @@ class SoNaRWordsDocumentReader(XMLItemReader):
             expected_child_tag=expected_child_tag,
             expected_root_tag=expected_root_tag,
             item_filter=item_filter,
+            parser_options=parser_options,
         )
 
 
@@ -181,7 +370,9 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
      - the tag of the root element is as expected
      - the tag of all the sentence elements is as expected
      - the span of a all sentences are consecutive within a sentence
+       (only at the 'full' validation level)
      - the spans of a all sentences are consecutive between sentences
+       (only at the 'full' validation level)
 
     See
     https://ivdnt.org/downloads/taalmaterialen/tstc-sonar-corpus
@@ -197,22 +388,29 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
                  pos_from_sentence_ID=c.MMAX_POSITION_FROM_ID,
                  expected_child_tag=c.MMAX_MARKABLE_TAG,
                  expected_root_tag=c.MMAX_MARKABLES_TAG,
-                 item_filter=c.MMAX_SENTENCES_FILTER):
-        self.word_ids = [word['id'] for word in words]
-        self.word_indices = dict(
-            (ID, i) for i, ID in enumerate(self.word_ids)
-        )
+                 item_filter=c.MMAX_SENTENCES_FILTER,
+                 parser_options=None):
+        # If `words` is a `WordIndex`, spans are lists of word positions
+        self.span_as_indices = isinstance(words, WordIndex)
+        self.word_index = words \
+            if self.span_as_indices \
+            else WordIndex(word['id'] for word in words)
+        self.word_ids = self.word_index.ids
+        self.word_indices = self.word_index.indices
 
         # Default item_reader
         item_reader = item_reader \
             if item_reader is not None \
-            else MMAXMarkableReader(self.word_ids)
+            else MMAXMarkableReader(
+                self.word_index if self.span_as_indices else self.word_ids
+            )
         super(SoNaRSentencesDocumentReader, self).__init__(
             item_reader=item_reader,
             validate=validate,
             expected_child_tag=expected_child_tag,
             expected_root_tag=expected_root_tag,
             item_filter=item_filter,
+            parser_options=parser_options,
         )
         self.pos_from_sentence_ID = pos_from_sentence_ID
 
@@ -221,51 +419,76 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
         Extract and optionally validate a sequence of sentence items sorted by
         position, which is taken from the ID.
         """
-        items = super(SoNaRSentencesDocumentReader, self).extract_items(xml)
+        return self.sort_and_validate(
+            super(SoNaRSentencesDocumentReader, self).extract_items(xml)
+        )
+
+    def stream_items(self, source):
+        """
+        Extract and optionally validate a sequence of sentence items sorted by
+        position, which is taken from the ID, while streaming through
+        `source`, which is a filename or a file object.
+        """
+        return self.sort_and_validate(
+            super(SoNaRSentencesDocumentReader, self).stream_items(source)
+        )
+
+    def sort_and_validate(self, items):
+        """
+        Sort sentence items by position, which is taken from the ID, and
+        optionally validate them.
+
+        Returns a list of sentence items.
+        """
         items = sorted(items, key=lambda s: self.pos_from_sentence_ID(s['id']))
-        if self.validate:
+        if self.validate_content:
             self.validate_sentence_spans(items)
         return items
 
     def validate_sentence_spans(self, sentence_items):
+        spans = [item['span'] for item in sentence_items]
+        if not self.span_as_indices:
+            spans = [
+                [self.word_indices.get(ID) for ID in span]
+                for span in spans
+            ]
+
         first_span = []
         index = 0
-        while not first_span and len(sentence_items) > index:
-            first_span = sentence_items[index]['span']
+        while not first_span and len(spans) > index:
+            first_span = spans[index]
             index += 1
         index -= 1
-        if self.word_ids and first_span[0] != self.word_ids[0]:
+        if self.word_ids and first_span[0] != 0:
             raise ValidationError(
                 "The first non-empty sentence does not start with the first"
                 f" word (id: {self.word_ids[0]}): {sentence_items[index]}"
             )
 
-        prev_last_id = first_span[-1]
-        for item in sentence_items[index + 1:]:
-            span = item['span']
-            first = self.word_indices[span[0]]
-            last = self.word_indices[span[-1]]
+        prev_last = first_span[-1]
+        for item, span in zip(sentence_items[index + 1:], spans[index + 1:]):
+            first = span[0]
+            last = span[-1]
             if first > last:
                 raise ValueError(
                     "Illegal span specification: the first ID of a span"
                     " abbreviation must appear in the words before the"
-                    f" last ID: {span}"
+                    f" last ID: {item['span']}"
                 )
-            correct_span = self.word_ids[first:last + 1]
 
-            if span != correct_span:
+            if span != list(range(first, last + 1)):
                 raise ValidationError(
-                    f"The span of this sentence should be {correct_span}:"
-                    f" {item!r}"
+                    "The span of this sentence should be"
+                    f" {self.word_ids[first:last + 1]}: {item!r}"
                 )
-            if self.word_indices[prev_last_id] != first - 1:
+            if prev_last != first - 1:
                 raise ValidationError(
-                    f"The first word of this sentence ({span[0]}) is not"
-                    " directly after the last word of the previous sentence"
-                    f" ({prev_last_id}): {item}"
+                    f"The first word of this sentence ({self.word_ids[first]})"
+                    " is not directly after the last word of the previous"
+                    f" sentence ({self.word_ids[prev_last]}): {item}"
                 )
             else:
-                prev_last_id = span[-1]
+                prev_last = last
 
 
 class COREAWordsDocumentReader(XMLItemReader):
@@ -276,8 +499,8 @@ class COREAWordsDocumentReader(XMLItemReader):
     Things that are verified if `validate=True`:
      - the tag of the root element is as expected
      - the tag of all the word elements is as expected
-     - the word numbers are consistent
-     - the part numbers are consistent
+     - the word numbers are consistent (only at the 'full' validation level)
+     - the part numbers are consistent (only at the 'full' validation level)
 
     See Ch. 7 of Essential Speech and Language Technology for Dutch
     COREA: Coreference Resolution for Extracting Answers for Dutch
@@ -294,7 +517,8 @@ class COREAWordsDocumentReader(XMLItemReader):
                  sent_start_word_number=c.MMAX_SENTENCE_STARTING_WORD_NUMBER,
                  expected_child_tag=c.MMAX_WORD_TAG,
                  expected_root_tag=c.MMAX_WORDS_TAG,
-                 item_filter=c.MMAX_WORDS_FILTER):
+                 item_filter=c.MMAX_WORDS_FILTER,
+                 parser_options=None):
         # Default item_reader
         item_reader = item_reader \
             if item_reader is not None \
@@ -305,6 +529,7 @@ class COREAWordsDocumentReader(XMLItemReader):
             expected_child_tag=expected_child_tag,
             expected_root_tag=expected_root_tag,
             item_filter=item_filter,
+            parser_options=parser_options,
         )
         self.document_id_attr = document_id_attr
         self.sent_start_word_number = sent_start_word_number
@@ -320,11 +545,51 @@ class COREAWordsDocumentReader(XMLItemReader):
         COREA: Coreference Resolution for Extracting Answers for Dutch
         https://link.springer.com/book/10.1007/978-3-642-30910-6
         """
-        rough_id = next(xml.getroot().iterchildren()).attrib.get(
-            self.document_id_attr,
-            ''
+        return self.document_ID_from_element(
+            next(xml.getroot().iterchildren())
         )
 
+    def stream_document_ID(self, source):
+        """
+        Extract the document ID (or None) from a COREA file, which is a
+        filename or a file object, by only reading up to its first word.
+
+        See `extract_document_ID`.
+        """
+        elements = self.iter_child_elements(source)
+        try:
+            return self.document_ID_from_element(next(elements))
+        finally:
+            elements.close()
+
+    def stream_document_ID_and_words(self, source):
+        """
+        Start streaming through the word elements of a COREA file, which is
+        a filename or a file object, so its document ID and its sentences can
+        be read while parsing it once.
+
+        Returns the document ID (or None) from the first word (see
+        `extract_document_ID`) and an iterator of the XML-elements of all
+        words, for `stream_sentences_from_elements`.
+        """
+        elements = self.iter_child_elements(source)
+        first = next(elements, None)
+        if first is None:
+            return None, elements
+        return (
+            self.document_ID_from_element(first),
+            it.chain([first], elements)
+        )
+
+    def document_ID_from_element(self, element):
+        """
+        Extract the document ID (or None) from the first word element of a
+        COREA document.
+
+        See `extract_document_ID`.
+        """
+        rough_id = element.attrib.get(self.document_id_attr, '')
+
         if rough_id.startswith('comp'):
             # This is part of the CGN part of COREA
             # The id looks like this:
@@ -346,59 +611,65 @@ class COREAWordsDocumentReader(XMLItemReader):
         """
         Extract all sentences and validate them.
 
-        Returns a list of sentences, where a sentence is a list of things
-        returned by `self.item_reader.read`.
+        Returns a `TokenTable` filled with the things returned by
+        `self.item_reader.read`.
         """
-        words = self.extract_items(xml)
-        sentences = []
-        sentence = None
+        return self.split_sentences(self.extract_items(xml))
 
-        # Because sentence is None, an error will be raised if the first word
-        # has a word_number different from '0'
-        while True:
-            # Get the next word or stop if there isn't one
-            try:
-                word = next(words)
-            except StopIteration:
-                break
+    def stream_sentences(self, source):
+        """
+        Extract all sentences while streaming through `source`, which is a
+        filename or a file object, and validate them.
+
+        Returns a `TokenTable` filled with the things returned by
+        `self.item_reader.read`.
+        """
+        return self.split_sentences(self.stream_items(source))
+
+    def stream_sentences_from_elements(self, elements):
+        """
+        Like `stream_sentences`, but for the word elements of
+        `stream_document_ID_and_words`.
+        """
+        return self.split_sentences(filter(
+            self.item_filter,
+            map(self.item_reader.read, elements)
+        ))
 
+    def split_sentences(self, words):
+        """
+        Split an iterator of words into sentences using the word numbers and
+        validate them.
+
+        Returns a `TokenTable` filled with the things returned by
+        `self.item_reader.read`.
+        """
+        sentences = TokenTable()
+
+        for word in words:
             # Check if we should start a new sentence and use `continue` if
             # we should not start a new sentence.
             if word['word_number'] != self.sent_start_word_number:
-                # I'm using try-catch because this is an edge case and checking
-                # every time is therefore more costly than catching once.
-                try:
-                    sentence.append(word)
-                except AttributeError as e:
-                    if sentence is None:
-                        # We know what's wrong!
-                        # Ignore if we're not validating
-                        if self.validate:
-                            raise ValidationError(
-                                f"The first word ({word['word']!r}) does not"
-                                f" have 'word_number' =="
-                                f" {self.sent_start_word_number!r}. Found:"
-                                f" {word['word_number']!r}"
-                            ) from e
-                        # else ignore this problem and fix it by starting a new
-                        # sentence. The program flow will end up in the piece
-                        # of code below that creates a new sentence.
-                    else:
-                        # We don't know what's wrong :(
-                        raise e
-                else:
-                    # Adding the word to the existing sentence worked just fine
-                    # So prevent creating a new sentence.
+                if sentences:
+                    sentences.append(word)
                     continue
+                # There is no sentence yet, so this is the first word.
+                # Ignore if we're not validating and fix it by starting a new
+                # sentence.
+                if self.validate:
+                    raise ValidationError(
+                        f"The first word ({word['word']!r}) does not"
+                        f" have 'word_number' =="
+                        f" {self.sent_start_word_number!r}. Found:"
+                        f" {word['word_number']!r}"
+                    )
 
             # This is the start of a new sentence, because the previous code
             # block would have called `continue` if it wasn't.
-            # This is to prevent duplication of the following two lines.
-            # The word_number is now validated
-            sentence = [word]
-            sentences.append(sentence)
+            sentences.start_sentence()
+            sentences.append(word)
 
-        if self.validate:
+        if self.validate_content:
             self.validate_sentences(sentences)
 
         return sentences
@@ -407,32 +678,66 @@ class COREAWordsDocumentReader(XMLItemReader):
     def validate_sentences(cls, sentences):
         """
         Validate `word_number` and `part_number` of these sentences
+
+        The numbers are gathered in one pass over the words and shared by
+        both validations (see `number_columns`).
         """
-        cls.validate_word_number(sentences)
-        cls.validate_part_number(sentences)
+        columns = cls.number_columns(sentences)
+        cls.validate_word_number(sentences, columns)
+        cls.validate_part_number(sentences, columns)
 
     @staticmethod
-    def validate_word_number(sentences):
+    def number_columns(sentences):
+        """
+        Get a `(word_numbers, part_numbers)` tuple of lists for every sentence,
+        where a missing number is `None`.
+        """
+        if isinstance(sentences, TokenTable):
+            word_numbers = sentences.column('word_number')
+            part_numbers = sentences.column('part_number')
+            return [
+                (
+                    word_numbers[sentence.start:sentence.stop],
+                    part_numbers[sentence.start:sentence.stop],
+                )
+                for sentence in sentences
+            ]
+        return [
+            (
+                [word.get('word_number') for word in sentence],
+                [word.get('part_number') for word in sentence],
+            )
+            for sentence in sentences
+        ]
+
+    @classmethod
+    def validate_word_number(cls, sentences, columns=None):
         """
         Validate word number of these sentences
 
         `word_number` must:
          - correspond to `range(len(sentence))`
+
+        `columns` are the `number_columns` of `sentences`.
         """
+        if columns is None:
+            columns = cls.number_columns(sentences)
         expected_msg = 'invalid literal for int() with base 10: '
+        # Word numbers are almost always written exactly like this
+        expected = [
+            str(i)
+            for i in range(max((len(wns) for wns, _ in columns), default=0))
+        ]
 
-        for senti, sentence in enumerate(sentences):
-            # First quickly check
-            word_numbers = map(
-                int,
-                map(
-                    dict.get,
-                    sentence,
-                    it.repeat('word_number')
-                )
-            )
+        for senti, (word_numbers, _) in enumerate(columns):
+            if word_numbers == expected[:len(word_numbers)]:
+                continue
+
+            # Then quickly check the value
             try:
-                problem = any(i != wn for i, wn in enumerate(word_numbers))
+                problem = any(
+                    i != wn for i, wn in enumerate(map(int, word_numbers))
+                )
             except ValueError as e:
                 if e.args[0].startswith(expected_msg):
                     problem = True
@@ -441,6 +746,7 @@ class COREAWordsDocumentReader(XMLItemReader):
 
             # Find out what's wrong.
             if problem:
+                sentence = sentences[senti]
                 index = 0
                 for word in sentence:
                     try:
@@ -464,8 +770,8 @@ class COREAWordsDocumentReader(XMLItemReader):
                             )
                         index += 1
 
-    @staticmethod
-    def validate_part_number(sentences):
+    @classmethod
+    def validate_part_number(cls, sentences, columns=None):
         """
         Validate part number of these sentences
 
@@ -475,47 +781,55 @@ class COREAWordsDocumentReader(XMLItemReader):
          - an integer, None or missing
          - increasing or (missing or None) everywhere
          - the same within a sentence
+
+        `columns` are the `number_columns` of `sentences`.
         """
-        prev_part_number = None
-        for senti, sentence in enumerate(sentences):
-            if len(sentence) == 0:
-                logger.warn(f"Sentence #{senti} is empty")
+        if columns is None:
+            columns = cls.number_columns(sentences)
 
-            for word in sentence:
-                part_number = word.get('part_number', None)
-                if part_number is None:
-                    break
-                try:
-                    part_number = int(part_number)
-                except ValueError as e:
-                    raise ValidationError(
-                        f"The part number of {word['word']!r} is not a"
-                        f" number but {word['part_number']!r}."
-                        f" This is in sentence #{senti}: {sentence!r}."
-                    ) from e
-                if word['word_number'] == '0':
-                    prev_part_number = part_number
-                elif prev_part_number != part_number:
-                    raise ValidationError(
-                        f"The part number of {word['word']!r} is different"
-                        f" from the part number of the first word of the"
-                        f" sentence. Expected {prev_part_number}, found:"
-                        f" {part_number}."
-                        f" This is in sentence #{senti}: {sentence!r}."
+        prev_part_number = part_number = None
+        for senti, (word_numbers, part_numbers) in enumerate(columns):
+            if len(part_numbers) == 0:
+                logger.warn(f"Sentence #{senti} is empty")
+            elif word_numbers[0] == '0' and part_numbers[0] is not None and \
+                    part_numbers.count(part_numbers[0]) == len(part_numbers):
+                # The same part number everywhere: only check it once
+                part_number = cls.part_number_to_int(
+                    sentences, senti, 0, part_numbers[0]
+                )
+                prev_part_number = part_number
+            else:
+                for index, part_number in enumerate(part_numbers):
+                    if part_number is None:
+                        break
+                    part_number = cls.part_number_to_int(
+                        sentences, senti, index, part_number
                     )
+                    if word_numbers[index] == '0':
+                        prev_part_number = part_number
+                    elif prev_part_number != part_number:
+                        sentence = sentences[senti]
+                        raise ValidationError(
+                            f"The part number of {sentence[index]['word']!r}"
+                            f" is different from the part number of the first"
+                            f" word of the sentence. Expected"
+                            f" {prev_part_number}, found: {part_number}."
+                            f" This is in sentence #{senti}: {sentence!r}."
+                        )
 
             if part_number is None:
                 # The first part number was None, which means _all_ part
-                # numbers should be None
-                others_have_number = (
-                    word.get('part_number', None) is not None
-                    for sentence in sentences
-                    for word in sentence
+                # numbers should be None. This either raises or ends the
+                # validation, so the part numbers are only searched once.
+                any_part_number = any(
+                    part_number is not None
+                    for _, part_numbers in columns
+                    for part_number in part_numbers
                 )
-                if prev_part_number is not None or any(others_have_number):
+                if prev_part_number is not None or any_part_number:
                     raise ValidationError(
                         f"Sentence #{senti} is missing a part number:"
-                        f" {sentence!r}."
+                        f" {sentences[senti]!r}."
                     )
                 else:
                     # Everything is None, so we're Done!
@@ -529,6 +843,22 @@ class COREAWordsDocumentReader(XMLItemReader):
                         f" Found: {part_number}"
                     )
 
+    @staticmethod
+    def part_number_to_int(sentences, senti, index, part_number):
+        """
+        Convert the part number of word `index` of sentence `senti` to an
+        integer or raise a ValidationError.
+        """
+        try:
+            return int(part_number)
+        except ValueError as e:
+            sentence = sentences[senti]
+            raise ValidationError(
+                f"The part number of {sentence[index]['word']!r} is not a"
+                f" number but {part_number!r}."
+                f" This is in sentence #{senti}: {sentence!r}."
+            ) from e
+
 
 class MMAXCorefDocumentReader(XMLItemReader):
     """
@@ -547,17 +877,27 @@ class MMAXCorefDocumentReader(XMLItemReader):
                  validate=c.VALIDATE_XML,
                  expected_child_tag=c.MMAX_MARKABLE_TAG,
                  expected_root_tag=c.MMAX_MARKABLES_TAG,
-                 item_filter=c.MMAX_COREF_FILTER):
-                # Default item_reader
+                 item_filter=None,
+                 parser_options=None):
+        # Default filter: `c.COREF_TYPE_FILTER` and `c.COREF_LEVEL_FILTER`
+        if item_filter is None:
+            item_filter = compile_coref_filter()
+        # Default item_reader
+        # If `words` is a `WordIndex`, spans are lists of word positions
         item_reader = item_reader \
             if item_reader is not None \
-            else MMAXCorefReader(word['id'] for word in words)
+            else MMAXCorefReader(
+                words
+                if isinstance(words, WordIndex)
+                else (word['id'] for word in words)
+            )
         super(MMAXCorefDocumentReader, self).__init__(
             item_reader=item_reader,
             validate=validate,
             expected_child_tag=expected_child_tag,
             expected_root_tag=expected_root_tag,
             item_filter=item_filter,
+            parser_options=parser_options,
         )
 
     def extract_coref_sets(self, xml):
@@ -566,52 +906,233 @@ class MMAXCorefDocumentReader(XMLItemReader):
 
         !! NB !! Returns a list because dicts are not hashable
         """
-        all_markables = {m['id']: m for m in self.extract_all_items(xml)}
-        markables = {
-            ID: m
-            for ID, m in filter(
-                lambda tup: self.item_filter(tup[1]),
-                all_markables.items()
+        return self.coref_sets_from_elements(self.get_child_elements(xml))
+
+    def stream_coref_sets(self, source):
+        """
+        Extract the sets of markables that refer to the same entity while
+        streaming through `source`, which is a filename or a file object.
+
+        !! NB !! Returns a list because dicts are not hashable
+        """
+        return self.coref_sets_from_elements(self.iter_child_elements(source))
+
+    def element_filter(self):
+        """
+        Get a filter of markable XML-elements that lets the same markables
+        pass as `self.item_filter`, or None if `self.item_filter` does not
+        have the `types` and `levels` of a `CorefFilter`.
+
+        The filter only looks at the reference, the type and the level of a
+        markable, so the span of a markable that is filtered out is never
+        read.
+        """
+        try:
+            types = self.item_filter.types
+            levels = self.item_filter.levels
+        except AttributeError:
+            return None
+        if not isinstance(self.item_reader, MMAXCorefReader):
+            return None
+
+        reader = self.item_reader
+        ref_attr = reader.ref_attr
+        empty_ref_value = reader.empty_ref_value
+        type_attr = reader.type_attr
+        level_attr = reader.level_attr
+
+        # `MMAXCorefReader.read` only adds a type and a level to markables
+        # that refer to another markable
+        def element_filter(element):
+            get = element.get
+            ref = get(ref_attr)
+            return ref is None or ref == empty_ref_value or (
+                (types is None or get(type_attr) in types) and
+                (levels is None or get(level_attr) in levels)
+            )
+        return element_filter
+
+    def coref_sets_from_elements(self, elements):
+        """
+        Extract the sets of markables that refer to the same entity from an
+        iterator of the XML-elements of all markables.
+
+        If `self.element_filter()` gives a filter, the markables that are
+        filtered out are not read: only their ID is extracted.
+
+        !! NB !! Returns a list because dicts are not hashable
+        """
+        element_filter = self.element_filter()
+        if element_filter is None:
+            return self.coref_sets_from_items(
+                map(self.item_reader.read, elements)
             )
-        }
+        extract_id = self.item_reader.extract_id
+        read = self.item_reader.read
+        return self.coref_sets_from_markables(
+            (extract_id(element), read(element))
+            if element_filter(element)
+            else (extract_id(element), None)
+            for element in elements
+        )
+
+    def coref_sets_from_items(self, items):
+        """
+        Extract the sets of markables that refer to the same entity from an
+        iterator of all markables (including the ones that should be
+        filtered out).
+
+        !! NB !! Returns a list because dicts are not hashable
+        """
+        item_filter = self.item_filter
+        return self.coref_sets_from_markables(
+            (markable['id'], markable if item_filter(markable) else None)
+            for markable in items
+        )
+
+    def coref_sets_from_markables(self, items):
+        """
+        Extract the sets of markables that refer to the same entity from an
+        iterator of `(ID, markable)` tuples of all markables, where `markable`
+        is None if it is filtered out.
 
-        # Create a ID -> [markables referring to ID]
-        forward_refs = {}
+        Only the markables that passed the filter are kept in memory. Of the
+        others only the ID is kept, to validate references.
 
-        for markable in markables.values():
+        A markable that refers to nothing, to a markable that was filtered
+        out or (if not `self.validate`) to an unknown markable starts a new
+        set. Markables that refer to each other in a cycle are logged and
+        the cycle is broken at its first markable in the document, which then
+        starts a set (see `break_cycles`).
+
+        Every set starts with its first markable, followed by the markables
+        referring to it, depth first.
+
+        !! NB !! Returns a list because dicts are not hashable
+        """
+        markables = []
+        # ID -> position in `markables`
+        positions = {}
+        filtered_ids = set()
+
+        for ID, markable in items:
+            if markable is None:
+                filtered_ids.add(ID)
+            elif ID in positions:
+                markables[positions[ID]] = markable
+            else:
+                positions[ID] = len(markables)
+                markables.append(markable)
+
+        # The position of the markable every markable refers to, or -1
+        refs = [-1] * len(markables)
+        for position, markable in enumerate(markables):
             ref = markable.get('ref', None)
             # If ref is None, this markable does not refer to anything
-            if ref is not None:
-                if self.validate:
-                    if ref not in all_markables:
-                        raise ValidationError(
-                            f"Reference to unknown markable ({ref!r}):"
-                            f" {markable}"
-                        )
-                forward_refs.setdefault(ref, []).append(markable['id'])
-
-        sets = []
-        for root in markables.values():
-            if root.get('ref', None) is None or root['ref'] not in markables:
-                refset = []
-                stack = [root['id']]
-                while stack:
-                    ID = stack.pop()
-                    refset.append(markables[ID])
-                    if ID in forward_refs:
-                        stack.extend(forward_refs[ID])
-                sets.append(refset)
-        if markables and not any(sets):
-            raise ValueError("You lost all your markables!")
-        if self.validate:
-            input_total = len(markables)
-            output_total = sum(map(len, sets))
-            if output_total != input_total:
-                out_ids = set(m['id'] for refset in sets for m in refset)
-                in_ids = set(markables)
-                missing = in_ids - out_ids
+            if ref is None:
+                continue
+            ref_position = positions.get(ref, None)
+            if ref_position is not None:
+                refs[position] = ref_position
+            elif self.validate and ref not in filtered_ids:
                 raise ValidationError(
-                    f"Expected {input_total} markables in output, found:"
-                    f" {output_total}. Missing markable IDs: {sorted(missing)}"
+                    f"Reference to unknown markable ({ref!r}):"
+                    f" {markable}"
                 )
-        return sets
+        del positions, filtered_ids
+
+        for cycle in self.break_cycles(refs):
+            logger.warn(
+                "Markables refer to each other in a cycle, so the first one"
+                " is taken to refer to nothing: "
+                + ' -> '.join(markables[position]['id'] for position in cycle)
+            )
+
+        return [
+            [markables[position] for position in chain]
+            for chain in self.chains_from_refs(refs)
+        ]
+
+    @staticmethod
+    def break_cycles(refs):
+        """
+        Find the cycles in the graph where `refs[position]` is the position
+        of the node that node `position` refers to (or -1) and break them, by
+        setting the `refs` of the first (lowest) position of every cycle to
+        -1.
+
+        Every node refers to at most one other node, so every connected part
+        of the graph contains at most one cycle. Adding the references one by
+        one to a union-find structure, the reference that connects two nodes
+        that were already connected is the one that closes that cycle.
+
+        !! NB !! Changes `refs` in-place.
+
+        Returns a list of the cycles as lists of positions, starting with the
+        first position and following the references.
+        """
+        parent = list(range(len(refs)))
+
+        def find(node):
+            while parent[node] != node:
+                # Path halving
+                parent[node] = node = parent[parent[node]]
+            return node
+
+        closing = []
+        for node, ref in enumerate(refs):
+            if ref < 0:
+                continue
+            root, ref_root = find(node), find(ref)
+            if root == ref_root:
+                closing.append(node)
+            else:
+                parent[root] = ref_root
+
+        cycles = []
+        for node in closing:
+            # Until now, `node` referred to nothing, so every other node in
+            # its connected part leads to it
+            cycle = [node]
+            ref = refs[node]
+            while ref != node:
+                cycle.append(ref)
+                ref = refs[ref]
+            first = cycle.index(min(cycle))
+            cycle = cycle[first:] + cycle[:first]
+            refs[cycle[0]] = -1
+            cycles.append(cycle)
+        return cycles
+
+    @staticmethod
+    def chains_from_refs(refs):
+        """
+        Get the chains of the forest where `refs[position]` is the position
+        of the parent of node `position` (or -1 for a root).
+
+        Yields a list of positions for every root, in order. A chain starts
+        with its root, followed by the nodes referring to it, depth first and
+        the last node first.
+        """
+        # The children of every node as linked lists, in order
+        first_child = [-1] * len(refs)
+        next_sibling = [-1] * len(refs)
+        for node in range(len(refs) - 1, -1, -1):
+            ref = refs[node]
+            if ref >= 0:
+                next_sibling[node] = first_child[ref]
+                first_child[ref] = node
+
+        for root, ref in enumerate(refs):
+            if ref >= 0:
+                continue
+            chain = []
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                chain.append(node)
+                child = first_child[node]
+                while child >= 0:
+                    stack.append(child)
+                    child = next_sibling[child]
+            yield chain
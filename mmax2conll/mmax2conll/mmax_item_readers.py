@@ -1,6 +1,7 @@
 import re
 
 from . import constants as c
+from .token_table import WordIndex
 
 
 class SoNaRWordReader:
@@ -144,6 +145,9 @@ class MMAXMarkableReader:
     """
     Reads data from an ElementTree Element from a MMAX markables document.
 
+    If `referred_ids` is a `WordIndex`, spans are lists of word positions in
+    that index instead of lists of word IDs.
+
     See `MMAX-specification.md` and
     http://www.speech.cs.cmu.edu/sigdial2003/proceedings/07_LONG_strube_paper.pdf
     for a description of the MMAX format.
@@ -153,10 +157,12 @@ class MMAXMarkableReader:
                  id_attr=c.MMAX_MARKABLE_ID_ATTRIBUTE,
                  span_attr=c.MMAX_SPAN_ATTRIBUTE,
                  mmax_level_attr=c.MMAX_LEVEL_ATTRIBUTE):
-        self.referred_ids = list(referred_ids)
-        self.referred_indices = dict(
-            (ID, i) for i, ID in enumerate(self.referred_ids)
-        )
+        self.span_as_indices = isinstance(referred_ids, WordIndex)
+        if not self.span_as_indices:
+            referred_ids = WordIndex(referred_ids)
+        self.word_index = referred_ids
+        self.referred_ids = referred_ids.ids
+        self.referred_indices = referred_ids.indices
         self.id_attr = id_attr
         self.span_attr = span_attr
         self.mmax_level_attr = mmax_level_attr
@@ -172,6 +178,8 @@ class MMAXMarkableReader:
         Extract the span from an XML-element.
         """
         span_text = xml.attrib.get(self.span_attr, None)
+        if self.span_as_indices:
+            return self.indices_from_text(span_text)
         return self.span_from_text(span_text)
 
     def span_from_text(self, text):
@@ -211,6 +219,40 @@ class MMAXMarkableReader:
             parts.extend(new_parts)
         return parts
 
+    def indices_from_text(self, text):
+        """
+        Expand and split a possibly abbreviated span specification into a
+        list of word positions:
+            span="word_1..word_5,word_7"
+        """
+        indices = []
+        for part in text.split(','):
+            split = part.split('..')
+            if len(split) > 2:
+                raise ValueError(
+                    "Illegal span specification: only one '..' is allowed:"
+                    f" between every pair of ',': {text!r}")
+
+            positions = list(map(self.referred_indices.get, split))
+            for ID, position in zip(split, positions):
+                if position is None:
+                    raise ValueError(
+                        f"Unknown ID ({ID!r}) in span: {text!r}"
+                    )
+
+            if len(positions) > 1:
+                first, last = positions
+                if first > last:
+                    raise ValueError(
+                        "Illegal span specification: the first ID of a span"
+                        " abbreviation must appear in the words before the"
+                        f" second ID: {text}"
+                    )
+                indices.extend(range(first, last + 1))
+            else:
+                indices.extend(positions)
+        return indices
+
     def extract_mmax_level(self, xml):
         """
         Extract the annotation level from an XML-element.
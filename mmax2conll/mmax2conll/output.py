@@ -0,0 +1,134 @@
+import os
+import locale
+import tempfile
+
+from . import constants as c
+
+
+def _default_file_mode():
+    # The umask can only be read by setting it, which is done once, when the
+    # module is imported, instead of for every file: another thread could
+    # create a file while the umask is 0
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# The mode `open` gives new files
+DEFAULT_FILE_MODE = _default_file_mode()
+
+
+def encode_output(text, encoding=None):
+    """
+    Encode `text` the way a file opened in text mode would: using
+    `encoding` (the preferred encoding by default) and the line separator of
+    the platform.
+    """
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode(encoding or locale.getpreferredencoding(False))
+
+
+class BufferedOutput:
+    """
+    Text file for writing that gathers everything that is written in memory
+    and writes it to disk in chunks of at least `flush_size` characters,
+    with one write call per chunk.
+
+    If `flush_size` is 0 or None, everything is written when the file is
+    closed.
+
+    If `atomic`, the data is written to a temporary file in the same folder,
+    which replaces `filename` when the file is closed. If an exception is
+    raised within a `with` block, the temporary file is removed and
+    `filename` is left as it was.
+    """
+
+    def __init__(self, filename, flush_size=c.OUTPUT_FLUSH_SIZE,
+                 atomic=c.ATOMIC_OUTPUT, encoding=None):
+        self.filename = filename
+        self.flush_size = flush_size or 0
+        self.atomic = atomic
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.buffer = []
+        self.buffered = 0
+
+        if atomic:
+            directory, name = os.path.split(filename)
+            fd, self.path = tempfile.mkstemp(
+                dir=directory or None,
+                prefix=f'.{name}.',
+                suffix='.tmp'
+            )
+            self.file = os.fdopen(fd, 'wb', buffering=0)
+        else:
+            self.path = filename
+            self.file = open(filename, 'wb', buffering=0)
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.flush_size and self.buffered >= self.flush_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        """
+        Write everything in the buffer to disk.
+        """
+        if not self.buffer:
+            return
+        data = memoryview(encode_output(''.join(self.buffer), self.encoding))
+        self.buffer.clear()
+        self.buffered = 0
+        while data:
+            data = data[self.file.write(data):]
+
+    def close(self):
+        """
+        Write the buffer to disk and close the file. If `self.atomic`, move
+        the temporary file to `self.filename`.
+        """
+        if self.file.closed:
+            return
+        try:
+            self.flush()
+        except BaseException:
+            self.discard()
+            raise
+        self.file.close()
+        if self.atomic:
+            # `mkstemp` only gives the owner access: use the mode of the file
+            # that is replaced, or the mode a new file would get
+            try:
+                mode = os.stat(self.filename).st_mode & 0o777
+            except FileNotFoundError:
+                mode = DEFAULT_FILE_MODE
+            os.chmod(self.path, mode)
+            os.replace(self.path, self.filename)
+
+    def discard(self):
+        """
+        Close the file without writing the buffer. If `self.atomic`, remove
+        the temporary file, otherwise keep what has been written so far.
+        """
+        if self.file.closed:
+            return
+        self.buffer.clear()
+        self.buffered = 0
+        self.file.close()
+        if self.atomic:
+            os.remove(self.path)
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None or not self.atomic:
+            self.close()
+        else:
+            self.discard()
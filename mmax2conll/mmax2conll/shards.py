@@ -0,0 +1,169 @@
+import os
+import json
+import logging
+from collections import namedtuple
+
+from . import constants as c
+from .conll_index import index_parts, index_filename, index_line
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+# What `Main.single_main` returns when it has no output file: the CoNLL
+# output of the document as encoded bytes and its `Instrumentation` record
+DocumentOutput = namedtuple(
+    'DocumentOutput',
+    ['document_id', 'data', 'record']
+)
+
+
+class ShardWriter:
+    """
+    Writes the CoNLL output of many documents into shards in `directory`:
+    files that contain the `#begin document` ... `#end document` blocks of
+    the documents one after another.
+
+    A new shard is started when adding a document to the current one would
+    make it larger than `max_bytes` bytes or give it more than
+    `max_documents` documents. None means no limit. A document that is
+    larger than `max_bytes` on its own gets a shard of its own.
+
+    Every document gets a line in the index file `index_name` in `directory`
+    (JSON lines) with its document ID, the name of its shard and the byte
+    offset and length of its output in that shard.
+
+    If `part_index`, every shard also gets an index of the byte offsets of
+    the parts of its documents (see `CoNLLIndex`).
+
+    Small documents are gathered into writes of `flush_size` bytes. If
+    `flush_size` is 0 or None, the default buffer size is used.
+
+    Shards (and their indexes) of an earlier conversion to `directory` are
+    removed, so all shards in `directory` are in the index.
+    """
+
+    def __init__(self, directory, max_bytes=c.SHARD_SIZE,
+                 max_documents=c.SHARD_DOCUMENTS,
+                 extension=c.CONLL_EXTENSION,
+                 index_name=c.SHARD_INDEX,
+                 part_index=c.CONLL_INDEX,
+                 flush_size=c.OUTPUT_FLUSH_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_documents = max_documents
+        self.extension = extension
+        self.part_index = part_index
+        self.flush_size = flush_size or -1
+        self.part_index_file = None
+        self.remove_old_shards()
+        self.index = open(os.path.join(directory, index_name), 'w')
+        self.shards = 0
+        self.file = None
+        self.shard = None
+        self.size = 0
+        self.documents = 0
+        self.document_ids = set()
+        self.total_documents = 0
+
+    def remove_old_shards(self):
+        """
+        Remove the shards and their indexes from `self.directory`.
+        """
+        extensions = (
+            self.extension,
+            self.extension + c.CONLL_INDEX_EXTENSION,
+        )
+        old = [
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith(c.SHARD_PREFIX) and name.endswith(extensions)
+        ]
+        if old:
+            logger.warn(
+                f"Removing {len(old)} shards and indexes of an earlier"
+                f" conversion from {self.directory}"
+            )
+        for name in old:
+            os.remove(os.path.join(self.directory, name))
+
+    def add(self, document_id, data, **info):
+        """
+        Write the output `data` (bytes) of document `document_id` to the
+        current shard, or to a new one if it is full, and add it to the index.
+
+        `info`, e.g. the name and input folder of the document, is saved in
+        the index as well.
+        """
+        if document_id in self.document_ids:
+            logger.warn(
+                f"Document {document_id} is written to the shards more than"
+                " once"
+            )
+        self.document_ids.add(document_id)
+
+        if self.file is None or self.is_full(len(data)):
+            self.next_shard()
+
+        offset = self.size
+        self.file.write(data)
+        if self.part_index:
+            for part in index_parts(data, offset):
+                self.part_index_file.write(index_line(*part))
+        self.size += len(data)
+        self.documents += 1
+        self.total_documents += 1
+
+        self.index.write(json.dumps(dict(
+            info,
+            document=document_id,
+            shard=self.shard,
+            offset=offset,
+            length=len(data),
+        ), sort_keys=True) + '\n')
+
+    def is_full(self, size):
+        """
+        Whether a document of `size` bytes does not fit in the current shard.
+        """
+        if not self.documents:
+            return False
+        if self.max_documents is not None and \
+           self.documents >= self.max_documents:
+            return True
+        return self.max_bytes is not None and \
+            self.size + size > self.max_bytes
+
+    def next_shard(self):
+        """
+        Close the current shard and start a new one.
+        """
+        self.close_shard()
+        self.shard = c.SHARD_NAME.format(self.shards) + self.extension
+        self.shards += 1
+        filename = os.path.join(self.directory, self.shard)
+        self.file = open(filename, 'wb', buffering=self.flush_size)
+        if self.part_index:
+            self.part_index_file = open(index_filename(filename), 'w')
+        self.size = 0
+        self.documents = 0
+
+    def close_shard(self):
+        if self.file is not None:
+            self.file.close()
+        if self.part_index_file is not None:
+            # Closed after the shard, so it is not older than the shard
+            self.part_index_file.close()
+
+    def close(self):
+        self.close_shard()
+        self.index.close()
+        logger.info(
+            f"Saved {self.total_documents} documents in {self.shards}"
+            f" shards in {self.directory}"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
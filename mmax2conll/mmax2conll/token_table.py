@@ -0,0 +1,291 @@
+import sys
+import itertools as it
+from array import array
+from collections.abc import Mapping, MutableMapping, Sequence
+
+
+class WordIndex:
+    """
+    Maps the word IDs of a document to their (dense, 0-based) position in the
+    document and back.
+
+    Create one per document and share it between readers and converters, so
+    spans can be handled as positions instead of as word IDs.
+    """
+    __slots__ = ('ids', 'indices')
+
+    def __init__(self, ids):
+        self.ids = ids if isinstance(ids, list) else list(ids)
+        self.indices = {ID: i for i, ID in enumerate(self.ids)}
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """
+        Create a word index for a `TokenTable` or a list of lists of words.
+        """
+        if isinstance(sentences, TokenTable):
+            return cls(sentences.column('id'))
+        return cls(word['id'] for word in it.chain(*sentences))
+
+    def index(self, ID):
+        """
+        Get the position of a word ID. Raises a KeyError if it is unknown.
+        """
+        return self.indices[ID]
+
+    def indices_of(self, span):
+        """
+        Get a list of the positions of the word IDs in `span`.
+        """
+        indices = self.indices
+        return [indices[ID] for ID in span]
+
+    def ids_of(self, span):
+        """
+        Get a tuple of the word IDs at the positions in `span`.
+        """
+        ids = self.ids
+        return tuple(ids[i] for i in span)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class TokenTable(Sequence):
+    """
+    Columnar store of the words of one document, split into sentences.
+
+    Instead of a dictionary per word, every column (`word`, `id`,
+    `word_number`, ...) is one list with a value for every word of the
+    document, where `None` means the value is missing. Word IDs are interned.
+
+    A `TokenTable` is a sequence of sentences and every sentence is a
+    sequence of words, so it can be used where a list of lists of word
+    dictionaries is expected: a sentence is a `SentenceView` and a word is a
+    `TokenView`, which behaves like a dictionary. Code that knows about
+    `TokenTable` can use the columns directly using `column`.
+    """
+    COLUMNS = ('word', 'id', 'word_number', 'part_number', 'coref', 'problem')
+
+    def __init__(self, columns=COLUMNS):
+        self.columns = {column: [] for column in columns}
+        self.sentence_starts = array('l')
+        self.n_words = 0
+
+    def column(self, name):
+        """
+        Get the list of values of a column, adding the column if it does not
+        exist yet.
+        """
+        try:
+            return self.columns[name]
+        except KeyError:
+            values = self.columns[name] = [None] * self.n_words
+            return values
+
+    def start_sentence(self):
+        """
+        Start a new sentence: the next word will be its first word.
+        """
+        self.sentence_starts.append(self.n_words)
+
+    def append(self, word):
+        """
+        Add a word, which is a dictionary, to the last sentence.
+
+        Starts a sentence if there is none yet.
+        """
+        if not self.sentence_starts:
+            self.start_sentence()
+        for name, values in self.columns.items():
+            values.append(word.get(name, None))
+        for name in word.keys() - self.columns.keys():
+            self.column(name).append(word[name])
+        ids = self.columns['id']
+        if ids[-1] is not None:
+            ids[-1] = sys.intern(ids[-1])
+        self.n_words += 1
+
+    def extend(self, words):
+        """
+        Add words to the last sentence.
+        """
+        for word in words:
+            self.append(word)
+
+    def append_sentence(self, words):
+        """
+        Add a sentence, which is an iterable of words.
+        """
+        self.start_sentence()
+        self.extend(words)
+
+    def select(self, spans):
+        """
+        Create a new table with a sentence for every span, where a span is a
+        sequence of word IDs.
+
+        Raises a ValueError if a span contains an unknown ID.
+        """
+        indices = WordIndex(self.columns['id']).indices
+
+        def span_indices(span):
+            try:
+                return [indices[ID] for ID in span]
+            except KeyError as e:
+                raise ValueError(
+                    f"Unknown word ID ({e.args[0]!r}) in span: {span!r}"
+                ) from e
+
+        return self.take(map(span_indices, spans))
+
+    def take(self, spans):
+        """
+        Create a new table with a sentence for every span, where a span is a
+        sequence of word positions in this table.
+        """
+        table = TokenTable(self.columns)
+        columns = [
+            (values, table.columns[name])
+            for name, values in self.columns.items()
+        ]
+        for span in spans:
+            table.start_sentence()
+            for index in span:
+                for values, new_values in columns:
+                    new_values.append(values[index])
+                table.n_words += 1
+        return table
+
+    def sentence_bounds(self, index):
+        """
+        Get the start and stop index of the words of a sentence
+        """
+        start = self.sentence_starts[index]
+        if index + 1 < len(self.sentence_starts):
+            stop = self.sentence_starts[index + 1]
+        else:
+            stop = self.n_words
+        return start, stop
+
+    def words(self):
+        """
+        Iterate over all words of all sentences
+        """
+        return (TokenView(self, i) for i in range(self.n_words))
+
+    def __len__(self):
+        return len(self.sentence_starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sentence index out of range")
+        return SentenceView(self, *self.sentence_bounds(index))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(map(list, self)) == list(map(list, other))
+
+    def __repr__(self):
+        return repr(self[:])
+
+
+class SentenceView(Sequence):
+    """
+    The words `start` up to `stop` of a `TokenTable`
+    """
+    __slots__ = ('table', 'start', 'stop')
+
+    def __init__(self, table, start, stop):
+        self.table = table
+        self.start = start
+        self.stop = stop
+
+    def column(self, name):
+        """
+        Get a list of the values of a column for the words of this sentence.
+        """
+        return self.table.column(name)[self.start:self.stop]
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("word index out of range")
+        return TokenView(self.table, self.start + index)
+
+    def __iter__(self):
+        return (TokenView(self.table, i) for i in range(self.start, self.stop))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class TokenView(MutableMapping):
+    """
+    Dictionary-like view on the word at `index` of a `TokenTable`.
+
+    Keys whose value is `None` are treated as missing.
+    """
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def get(self, key, default=None):
+        values = self.table.columns.get(key, None)
+        if values is None:
+            return default
+        value = values[self.index]
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key, None)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.table.column(key)[self.index] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.table.columns[key][self.index] = None
+
+    def __contains__(self, key):
+        return self.get(key, None) is not None
+
+    def __iter__(self):
+        return (
+            name
+            for name, values in self.table.columns.items()
+            if values[self.index] is not None
+        )
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
@@ -0,0 +1,88 @@
+from lxml import etree
+
+from . import constants as c
+
+# One pool per set of options in every process, so worker processes reuse
+# their parsers for all documents they convert.
+_pools = {}
+
+
+def parser_options(options=None):
+    """
+    Get the parser options to use: `c.XML_PARSER_OPTIONS` updated with
+    `options`.
+
+    Raises a ValueError for options that are not in `c.XML_PARSER_OPTIONS`.
+    """
+    if not options:
+        return dict(c.XML_PARSER_OPTIONS)
+    unknown = set(options) - set(c.XML_PARSER_OPTIONS)
+    if unknown:
+        raise ValueError(
+            f"Unknown XML parser options: {sorted(unknown)!r}. Known options"
+            f" are: {sorted(c.XML_PARSER_OPTIONS)!r}"
+        )
+    return dict(c.XML_PARSER_OPTIONS, **options)
+
+
+def get_parser_pool(options=None):
+    """
+    Get the `XMLParserPool` of this process for `options` (see
+    `parser_options`), creating it the first time.
+    """
+    options = parser_options(options)
+    key = tuple(sorted(options.items()))
+    try:
+        return _pools[key]
+    except KeyError:
+        pool = _pools[key] = XMLParserPool(**options)
+        return pool
+
+
+class XMLParserPool:
+    """
+    Pool of lxml parsers that all use the same `options`.
+
+    Creating a parser is not free and the options of `etree.iterparse` cannot
+    be set once for all files, so a pool hands out parsers to parse one
+    document at a time and takes them back when the document was parsed
+    completely. A parser whose document was not parsed completely (because of
+    an error or because streaming stopped early) is thrown away instead.
+
+    Like lxml parsers, a pool should not be shared between threads.
+    """
+    CHUNK_SIZE = 1 << 16  # bytes
+
+    def __init__(self, **options):
+        self.options = options
+        self.pull_parsers = {}
+
+    def iterparse(self, source, events=('start', 'end')):
+        """
+        Like `etree.iterparse`: iterate over `(event, element)` tuples of
+        `source`, which is a filename or a file object opened in binary mode.
+        """
+        free = self.pull_parsers.setdefault(events, [])
+        parser = free.pop() if free else \
+            etree.XMLPullParser(events=events, **self.options)
+
+        if hasattr(source, 'read'):
+            yield from self._feed(parser, source)
+        else:
+            with open(source, 'rb') as fd:
+                yield from self._feed(parser, fd)
+
+        # Only reached when the document was parsed completely
+        free.append(parser)
+
+    def _feed(self, parser, fd):
+        read = fd.read
+        read_events = parser.read_events
+        while True:
+            chunk = read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            yield from read_events()
+        parser.close()
+        yield from read_events()
@@ -3,13 +3,12 @@
 import os
 import logging
 
-from lxml import etree
-
 import mmax2conll.constants as c
 from mmax2conll.util import file_exists, directory_exists
 
 from mmax2conll.mmax_document_readers import (
     SoNaRWordsDocumentReader,
+    document_validation_level,
 )
 
 from mmax2conll.main import Main as CoNLLMain
@@ -19,28 +18,34 @@ logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 class Main(CoNLLMain):
     @classmethod
-    def dir_main(cls, input_dir, output_dir,
-                 basedata_dir=c.WORDS_DIR,
-                 allow_overwriting=c.ALLOW_OVERWRITING,
-                 raw_extension=c.RAW_EXTENSION,
-                 words_files_extension=c.WORDS_FILES_EXTENSION,
-                 log_on_error=c.LOG_ON_ERROR,
-                 **kwargs):
+    def dir_tasks(cls, input_dir, output_dir,
+                  basedata_dir=c.WORDS_DIR,
+                  allow_overwriting=c.ALLOW_OVERWRITING,
+                  raw_extension=c.RAW_EXTENSION,
+                  words_files_extension=c.WORDS_FILES_EXTENSION,
+                  basedata_files=None,
+                  **kwargs):
         """
-        Batch convert all files in a directory containing a `basedata_dir`.
+        Find all files to convert in a directory containing a `basedata_dir`.
+
+        Yields `(name, input_dir, args, kwargs)` tuples, see
+        `CoNLLMain.dir_tasks`.
         """
         basedata_dir = os.path.join(input_dir, basedata_dir)
-        # Remove this keyword argument, which is a remnant of using
+        # Remove these keyword arguments, which are a remnant of using
         # CoNLLMain.super_dir_main
         kwargs.pop('markables_dir', None)
+        kwargs.pop('markables_files', None)
+        if basedata_files is None:
+            basedata_files = os.listdir(basedata_dir)
 
         words_files = {
             filename
-            for filename in os.listdir(basedata_dir)
+            for filename in basedata_files
             if filename.endswith(words_files_extension)
         }
 
-        for name in words_files:
+        for name in sorted(words_files):
             words_file = os.path.join(basedata_dir, name)
             output_file = os.path.join(
                 output_dir,
@@ -52,30 +57,17 @@ class Main(CoNLLMain):
                     logger.warn(f"Overwriting {output_file}")
                 else:
                     raise IOError(f"Will not overwrite: {output_file}")
-            try:
-                cls.single_main(
-                    output_file,
-                    words_file,
-                    **kwargs
-                )
-            except Exception as e:
-                if log_on_error:
-                    logger.error(
-                        f"{name} from {input_dir} is skipped: "
-                        + e.args[0]
-                    )
-                else:
-                    e.args = (
-                        f"While processing {name} from {input_dir}: " +
-                        e.args[0],
-                    ) + e.args[1:]
-                    raise e
+
+            yield name, input_dir, (output_file, words_file), kwargs
 
     @classmethod
     def single_main(cls, output_file, words_file, validate_xml=c.VALIDATE_XML):
         words = cls.read_words(
             filename=words_file,
-            validate_xml=validate_xml
+            validate_xml=document_validation_level(
+                validate_xml,
+                os.path.basename(words_file)
+            )
         )
         with open(output_file, 'w') as fd:
             fd.write(" ".join(word['word'] for word in words))
@@ -87,9 +79,7 @@ class Main(CoNLLMain):
         logger.debug(f"Read words from {filename}")
         words = SoNaRWordsDocumentReader(
             validate=validate_xml
-        ).extract_items(
-            etree.parse(filename)
-        )
+        ).stream_items(filename)
         return words
 
     @classmethod
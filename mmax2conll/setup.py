@@ -1,12 +1,19 @@
+import re
+
 from setuptools import setup, find_packages
 
 
 with open('README.md') as f:
     readme = f.read()
 
+# The version is only set in the package, which also uses it (e.g. to
+# invalidate the manifests of incremental conversions)
+with open('mmax2conll/__init__.py') as f:
+    version = re.search(r"^__version__ = '(.*)'$", f.read(), re.M).group(1)
+
 setup(
     name='mmax2conll',
-    version='1.0.1',
+    version=version,
     description='Script to convert data in MMAX format to CoNLL format',
     long_description=readme,
     long_description_content_type="text/markdown",
@@ -18,6 +25,9 @@ setup(
         "lxml>=4.2.1",
         "pyaml>=17.12.1",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     classifiers=[
         'Intended Audience :: Developers',
         'License :: OSI Approved :: Apache Software License',
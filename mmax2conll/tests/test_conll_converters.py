@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+
+from mmax2conll.token_table import TokenTable, WordIndex
+from mmax2conll.conll_converters import CorefConverter
+
+
+def test_coref_converter_index_spans_match_id_spans():
+    def table():
+        table = TokenTable()
+        table.extend({'word': str(i), 'id': f'word_{i}'} for i in range(12))
+        return table
+
+    coref_sets = [
+        [['word_10', 'word_11'], ['word_2']],
+        [['word_0', 'word_1', 'word_3']],
+        [['word_9']],
+    ]
+    by_id = table()
+    CorefConverter(by_id, fill_spans=True).add_data_from_coref_sets(
+        coref_sets
+    )
+    by_index = table()
+    index = WordIndex.from_sentences(by_index)
+    CorefConverter(
+        by_index, fill_spans=True, word_index=index
+    ).add_data_from_index_sets(
+        [index.indices_of(span) for span in refset] for refset in coref_sets
+    )
+    assert by_id == by_index
+    assert by_index.column('coref')[:4] == ['(0', None, '(1)', '0)']
+    assert by_index.column('problem')[2] == '0'
+
+
+def test_uniqueyfy(caplog):
+    a, b, c, d = (0, 0), (1, 1), (2, 2), (3, 3)
+    sets = [
+        [a, b, c],
+        [],
+        [a, b],         # subset of the first
+        [c, b, a],      # duplicate of the first
+        [c, d],         # shares c with the first
+    ]
+    with caplog.at_level(logging.WARNING):
+        refsets = CorefConverter.uniqueyfy(sets)
+    assert refsets == {frozenset([a, b, c]), frozenset([c, d])}
+    assert caplog.messages == [
+        "Span in multiple reference sets that are quite different:"
+        " (2, 2). Sets: [[(0, 0), (1, 1)], [(3, 3)]]"
+    ]
+
+
+def test_uniqueyfy_sub_chains(caplog):
+    a, b, c, d, e = (0, 0), (1, 1), (2, 2), (3, 3), (4, 4)
+    sets = [
+        [a, b],         # subset of all chains below
+        [a, b, c, d],
+        [b, c, d],      # subset of the one above
+        [a, b, c],      # subset of the second, as big as the one below
+        [c, d, e],
+    ]
+    with caplog.at_level(logging.WARNING):
+        refsets = CorefConverter.uniqueyfy(sets)
+    assert refsets == {frozenset([a, b, c, d]), frozenset([c, d, e])}
+    assert caplog.messages == [
+        "Span in multiple reference sets that are quite different:"
+        " (2, 2). Sets: [[(0, 0), (1, 1)], [(0, 0), (1, 1), (3, 3)],"
+        " [(1, 1), (3, 3)], [(3, 3), (4, 4)]]",
+        "Span in multiple reference sets that are quite different:"
+        " (3, 3). Sets: [[(0, 0), (1, 1), (2, 2)], [(1, 1), (2, 2)],"
+        " [(2, 2), (4, 4)]]",
+    ]
+
+
+def test_check_and_fill_spans_numpy():
+    pytest.importorskip('numpy')
+    converter = CorefConverter(
+        [], fill_spans=True, word_index=WordIndex(map(str, range(10)))
+    )
+    sets = [[[0, 2, 3], [5]], [[4, 7], [5, 6]], [[2, 3]]]
+    spans = [[(0, 3), (5, 5)], [(4, 7), (5, 6)], [(2, 3)]]
+    problems = {(0, 3): [1], (4, 7): [5, 6]}
+    for check in (converter.check_and_fill_spans_numpy,
+                  converter.check_and_fill_spans_python):
+        out, problem_map = check(sets)
+        assert out == spans
+        assert {k: sorted(v) for k, v in problem_map.items()} == problems
+
+    converter.should_fill_spans = False
+    with pytest.raises(ValueError, match="must be consecutive"):
+        converter.check_and_fill_spans_numpy(sets)
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from mmax2conll.conll_index import (
+    CoNLLIndex,
+    CoNLLReader,
+    index_filename,
+    index_parts,
+)
+
+CONLL = (
+    b'#begin document (doc_a); part 000\n'
+    b'doc_a   0   Hallo   (1)\n'
+    b'doc_a   1   wereld    -\n'
+    b'\n'
+    b'#end document\n'
+    b'#begin document (doc_a); part 001\n'
+    b'doc_a   0   Hij   (1)\n'
+    b'\n'
+    b'#end document\n'
+    b'#begin document (doc_b);\n'
+    b'doc_b\t0\tZij\t-\n'
+    b'\n'
+    b'doc_b\t0\tdag\t-\n'
+    b'\n'
+    b'#end document\n'
+)
+
+
+@pytest.fixture
+def conll_file(tmp_path):
+    filename = tmp_path / 'data.conll'
+    filename.write_bytes(CONLL)
+    return str(filename)
+
+
+def test_index_parts():
+    parts = list(index_parts(CONLL, offset=10, encoding='utf-8'))
+    assert [(d, p) for d, p, _, _ in parts] == \
+        [('doc_a', 0), ('doc_a', 1), ('doc_b', 0)]
+    for _, _, offset, length in parts:
+        data = CONLL[offset - 10:offset - 10 + length]
+        assert data.startswith(b'#begin document')
+        assert data.endswith(b'#end document\n')
+    assert sum(length for _, _, _, length in parts) == len(CONLL)
+
+
+def test_index_parts_unfinished():
+    with pytest.raises(ValueError):
+        list(index_parts(CONLL[:-len(b'#end document\n')]))
+    with pytest.raises(ValueError):
+        list(index_parts(b'#end document\n'))
+
+
+def test_save_and_load(conll_file):
+    index = CoNLLIndex.build(conll_file, encoding='utf-8')
+    index.save(index_filename(conll_file))
+    assert CoNLLIndex.for_file(conll_file).parts == index.parts
+    assert sorted(index) == ['doc_a', 'doc_b']
+
+
+def test_reader(conll_file):
+    with CoNLLReader(conll_file, encoding='utf-8') as reader:
+        assert 'doc_b' in reader
+        assert reader.sentences('doc_a', 1) == [[['doc_a', '0', 'Hij', '(1)']]]
+        assert reader.sentences('doc_a') == [
+            [['doc_a', '0', 'Hallo', '(1)'], ['doc_a', '1', 'wereld', '-']],
+            [['doc_a', '0', 'Hij', '(1)']],
+        ]
+        assert len(reader.sentences('doc_b')) == 2
+        assert reader.raw('doc_b').startswith(b'#begin document (doc_b);')
+        with pytest.raises(KeyError):
+            reader.sentences('doc_c')
+
+
+def test_stale_index_is_rebuilt(conll_file):
+    CoNLLIndex().save(index_filename(conll_file))
+    # Make the file newer than its (empty) index
+    stat = os.stat(index_filename(conll_file))
+    os.utime(conll_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert sorted(CoNLLIndex.for_file(conll_file, 'utf-8')) == \
+        ['doc_a', 'doc_b']
@@ -0,0 +1,33 @@
+import copy
+
+import pytest
+
+from mmax2conll.token_table import TokenTable
+from mmax2conll.conll_writers import CoNLLWriter
+
+
+def test_format_sentence_does_not_change_sentence():
+    sentence = [
+        {'word': 'Hallo', 'word_number': 0, 'coref': '(0)'},
+        {'word': '!', 'word_number': 1},
+    ]
+    original = copy.deepcopy(sentence)
+    table = TokenTable()
+    table.append_sentence(sentence)
+
+    writer = CoNLLWriter()
+    expected = (
+        'doc   0   0   Hallo      (0)\n'
+        'doc   0   1       !        -\n'
+        '\n'
+    )
+    assert writer.format_sentence('doc', sentence) == expected
+    assert writer.format_sentence('doc', table[0]) == expected
+    assert sentence == original
+    assert table.column('coref') == ['(0)', None]
+
+
+def test_format_sentence_throws_on_missing():
+    writer = CoNLLWriter()
+    with pytest.raises(ValueError, match="'word_number' is missing"):
+        writer.format_sentence('doc', [{'word': 'Hallo'}])
@@ -0,0 +1,79 @@
+import os
+
+from mmax2conll.document_index import DocumentIndex
+
+
+def test_document_index(tmp_path, resources_dir, sonar_dir, corea_dir):
+    index = DocumentIndex()
+    data_dirs = index.data_dirs(resources_dir)
+    assert data_dirs == [corea_dir, sonar_dir]
+    assert index.changed
+
+    basedata_files, markables_files = index.files(resources_dir, data_dirs[1])
+    assert basedata_files == sorted(
+        os.listdir(os.path.join(sonar_dir, 'Basedata'))
+    )
+    assert markables_files == sorted(
+        os.listdir(os.path.join(sonar_dir, 'Markables'))
+    )
+    assert index.data_dirs(resources_dir, ['SONAR_1_COREF']) == \
+        data_dirs[:1]
+
+    filename = str(tmp_path / 'index.json')
+    index.save(filename)
+    loaded = DocumentIndex.load(filename)
+    assert loaded.roots == index.roots
+    assert loaded.data_dirs(resources_dir) == data_dirs
+    assert not loaded.changed
+
+    # Made for other data directory names
+    assert DocumentIndex.load(filename, basedata_dir='Words').roots == {}
+
+
+def write_document(data_dir, name):
+    (data_dir / 'Basedata' / (name + '_words.xml')).write_text('<words/>')
+    (data_dir / 'Markables' / (name + '_np_level.xml')).write_text('<m/>')
+
+
+def test_stale_document_index(tmp_path, monkeypatch):
+    root = tmp_path / 'corpus'
+    data_dir = root / 'part_1'
+    (data_dir / 'Basedata').mkdir(parents=True)
+    (data_dir / 'Markables').mkdir()
+    write_document(data_dir, 'doc_1')
+    write_document(data_dir, 'doc_2')
+
+    filename = str(tmp_path / 'index.json')
+    index = DocumentIndex()
+    assert index.data_dirs(str(root)) == [str(data_dir)]
+    index.save(filename)
+
+    # Add and remove a document and add a data directory
+    write_document(data_dir, 'doc_3')
+    os.remove(data_dir / 'Basedata' / 'doc_1_words.xml')
+    os.remove(data_dir / 'Markables' / 'doc_1_np_level.xml')
+    new_data_dir = root / 'part_2'
+    (new_data_dir / 'Basedata').mkdir(parents=True)
+    (new_data_dir / 'Markables').mkdir()
+    write_document(new_data_dir, 'doc_4')
+
+    # Same tree, through an other relative path
+    monkeypatch.chdir(tmp_path)
+    loaded = DocumentIndex.load(filename)
+    assert loaded.data_dirs('corpus') == \
+        [os.path.join('corpus', 'part_1'), os.path.join('corpus', 'part_2')]
+    assert loaded.changed
+    assert loaded.files('corpus', os.path.join('corpus', 'part_1')) == (
+        ['doc_2_words.xml', 'doc_3_words.xml'],
+        ['doc_2_np_level.xml', 'doc_3_np_level.xml'],
+    )
+    loaded.save(filename)
+
+    # Only the listing of a changed Basedata directory is updated
+    write_document(data_dir, 'doc_5')
+    loaded = DocumentIndex.load(filename)
+    dirs = loaded.roots[str(root)]['dirs']
+    assert loaded.data_dirs(str(root)) == [str(data_dir), str(new_data_dir)]
+    assert loaded.roots[str(root)]['dirs'] is dirs
+    assert 'doc_5_words.xml' in \
+        loaded.files(str(root), str(data_dir))[0]
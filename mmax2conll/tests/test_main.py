@@ -1,8 +1,11 @@
 import os
+import json
 import shutil
 import logging
 
+import mmax2conll.constants as c
 from mmax2conll.main import Main
+from mmax2conll.conll_index import CoNLLReader
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -113,3 +116,198 @@ def test_sonar(caplog, sonar_dir, sonar_config):
             shutil.rmtree(output_dir)
     for record in caplog.records:
         assert record.levelno <= logging.INFO
+
+
+def test_sonar_jobs(sonar_dir, sonar_config):
+    output_dir = 'output_dir'
+    parallel_output_dir = 'parallel_output_dir'
+    try:
+        Main.main([
+            sonar_config,
+            output_dir,
+            "-d",
+            sonar_dir
+        ])
+        Main.main([
+            sonar_config,
+            parallel_output_dir,
+            "-d",
+            sonar_dir,
+            "--jobs",
+            "2"
+        ])
+        assert os.listdir(output_dir) == os.listdir(parallel_output_dir)
+        for name in os.listdir(output_dir):
+            with open(os.path.join(output_dir, name)) as fd:
+                expected = fd.read()
+            with open(os.path.join(parallel_output_dir, name)) as fd:
+                assert fd.read() == expected
+    finally:
+        for directory in [output_dir, parallel_output_dir]:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+
+
+class EchoMain(Main):
+    @staticmethod
+    def single_main(number):
+        return number
+
+
+def test_run_tasks_window(monkeypatch):
+    monkeypatch.setattr(c, 'TASKS_PER_WORKER', 2)
+    submitted = []
+    done = []
+
+    def tasks():
+        for number in range(20):
+            submitted.append(number)
+            yield str(number), 'dir', (number,), {}
+
+    def on_done(task, result):
+        # At most 2 tasks per worker wait to be handled
+        assert len(submitted) - len(done) <= 2 * 2
+        done.append(result)
+
+    EchoMain.run_tasks(tasks(), jobs=2, on_done=on_done)
+    assert done == list(range(20))
+
+
+def test_sonar_incremental(caplog, sonar_dir, sonar_config):
+    caplog.set_level(logging.INFO)
+    output_dir = 'output_dir'
+    try:
+        Main.main([sonar_config, output_dir, "-d", sonar_dir, "-i"])
+        assert "Skipping 0 documents that are up to date" in caplog.messages
+        outputs = {
+            name: os.stat(os.path.join(output_dir, name)).st_mtime_ns
+            for name in os.listdir(output_dir)
+            if name.endswith('.conll')
+        }
+        assert outputs
+
+        caplog.clear()
+        Main.main([sonar_config, output_dir, "-d", sonar_dir, "-i"])
+        assert f"Skipping {len(outputs)} documents that are up to date" in \
+            caplog.messages
+        for name, mtime in outputs.items():
+            assert os.stat(os.path.join(output_dir, name)).st_mtime_ns == \
+                mtime
+    finally:
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+
+
+def test_sonar_stats(sonar_dir, sonar_config):
+    output_dir = 'output_dir'
+    stats_file = 'stats.jsonl'
+    try:
+        Main.main([
+            sonar_config,
+            output_dir,
+            "-d",
+            sonar_dir,
+            "--jobs",
+            "2",
+            "--stats",
+            stats_file
+        ])
+        with open(stats_file) as fd:
+            lines = [json.loads(line) for line in fd]
+        *documents, summary = lines
+        assert documents
+        assert all(line['type'] == 'document' for line in documents)
+        assert summary['type'] == 'summary'
+        assert summary['documents'] == len(documents)
+        for line in documents:
+            assert set(line['stages']) >= \
+                {'read', 'read_coref', 'convert', 'uniqueyfy', 'write'}
+            assert line['counts']['words'] > 0
+        assert summary['counts']['words'] == \
+            sum(line['counts']['words'] for line in documents)
+    finally:
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        if os.path.exists(stats_file):
+            os.remove(stats_file)
+
+
+def test_sonar_profile(sonar_dir, sonar_config):
+    output_dir = 'output_dir'
+    profile_dir = 'profile_dir'
+    try:
+        Main.main([
+            sonar_config,
+            output_dir,
+            "-d",
+            sonar_dir,
+            "--jobs",
+            "2",
+            "--profile",
+            profile_dir
+        ])
+        profiles = [
+            name
+            for name in os.listdir(profile_dir)
+            if name.endswith('.prof')
+        ]
+        assert len(profiles) == \
+            len([n for n in os.listdir(output_dir) if n.endswith('.conll')])
+        with open(os.path.join(profile_dir, 'report.txt')) as fd:
+            report = fd.read()
+        assert f"Merged profile of {len(profiles)} documents" in report
+        assert "single_main" in report
+    finally:
+        for directory in [output_dir, profile_dir]:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+
+
+def test_sonar_shards(sonar_dir, sonar_config):
+    output_dir = 'output_dir'
+    sharded_output_dir = 'sharded_output_dir'
+    config_file = 'shard_config.yml'
+    try:
+        Main.main([sonar_config, output_dir, "-d", sonar_dir])
+        with open(sonar_config) as fd:
+            config = fd.read()
+        with open(config_file, 'w') as fd:
+            fd.write(config.replace('shard_size: null', 'shard_size: 1')
+                     .replace('conll_index: false', 'conll_index: true'))
+        Main.main([
+            config_file,
+            sharded_output_dir,
+            "-d",
+            sonar_dir,
+            "--jobs",
+            "2"
+        ])
+
+        with open(os.path.join(sharded_output_dir, 'index.jsonl')) as fd:
+            index = [json.loads(line) for line in fd]
+        # Every document is larger than a shard, so it gets its own
+        assert sorted(os.listdir(sharded_output_dir)) == sorted(
+            ['index.jsonl'] +
+            [entry['shard'] for entry in index] +
+            [entry['shard'] + '.idx' for entry in index]
+        )
+        assert sorted(entry['name'] + '.conll' for entry in index) == \
+            sorted(os.listdir(output_dir))
+        for entry in index:
+            with open(os.path.join(sharded_output_dir, entry['shard']),
+                      'rb') as fd:
+                fd.seek(entry['offset'])
+                data = fd.read(entry['length'])
+            with open(os.path.join(output_dir, entry['name'] + '.conll'),
+                      'rb') as fd:
+                assert data == fd.read()
+            with CoNLLReader(
+                os.path.join(sharded_output_dir, entry['shard'])
+            ) as reader:
+                assert reader.raw(entry['document']) == data
+    finally:
+        for directory in [output_dir, sharded_output_dir]:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+        if os.path.exists(config_file):
+            os.remove(config_file)
@@ -0,0 +1,267 @@
+import os
+import io
+import pickle
+import itertools as it
+
+import pytest
+from lxml import etree
+
+from mmax2conll.mmax_document_readers import (
+    CorefFilter,
+    compile_coref_filter,
+    validation_level,
+    document_validation_level,
+    SoNaRWordsDocumentReader,
+    COREAWordsDocumentReader,
+    SoNaRSentencesDocumentReader,
+    MMAXCorefDocumentReader,
+)
+from mmax2conll.mmax_item_readers import COREAMedWordReader
+from mmax2conll.token_table import TokenTable
+from mmax2conll.util import ValidationError
+
+
+def test_sonar_stream_items(sonar_dir):
+    words_file = os.path.join(
+        sonar_dir,
+        'Basedata',
+        'WR-P-E-E-0000000018_words.xml'
+    )
+    reader = SoNaRWordsDocumentReader()
+    expected = list(reader.extract_items(etree.parse(words_file)))
+    assert expected
+    assert list(reader.stream_items(words_file)) == expected
+
+
+def test_corea_stream_sentences(corea_dir):
+    words_file = os.path.join(corea_dir, 'Basedata', 's2_words.xml')
+    # s2 is from the Med part of COREA
+    reader = COREAWordsDocumentReader(item_reader=COREAMedWordReader())
+    xml = etree.parse(words_file)
+    assert reader.stream_document_ID(words_file) == \
+        reader.extract_document_ID(xml)
+    expected = reader.extract_sentences(xml)
+    assert expected
+    assert reader.stream_sentences(words_file) == expected
+
+
+def test_corea_stream_document_ID_and_words(corea_dir):
+    words_file = os.path.join(corea_dir, 'Basedata', 's2_words.xml')
+    reader = COREAWordsDocumentReader(item_reader=COREAMedWordReader())
+    document_id = reader.stream_document_ID(words_file)
+    sentences = reader.stream_sentences(words_file)
+    pool = reader.parser_pool
+    pool.pull_parsers.clear()
+    for _ in range(2):
+        found_id, words = reader.stream_document_ID_and_words(words_file)
+        assert found_id == document_id
+        assert reader.stream_sentences_from_elements(words) == sentences
+    # The file is parsed completely, so the parser is reused
+    assert len(pool.pull_parsers[('start', 'end')]) == 1
+
+
+def test_sonar_stream_markables(sonar_dir):
+    words_file = os.path.join(
+        sonar_dir,
+        'Basedata',
+        'WR-P-E-E-0000000018_words.xml'
+    )
+    markables_dir = os.path.join(sonar_dir, 'Markables')
+    sentences_file = os.path.join(
+        markables_dir,
+        'WR-P-E-E-0000000018_sentence_level.xml'
+    )
+    coref_file = os.path.join(
+        markables_dir,
+        'WR-P-E-E-0000000018_np_level.xml'
+    )
+    words = list(SoNaRWordsDocumentReader().stream_items(words_file))
+
+    reader = SoNaRSentencesDocumentReader(words)
+    expected = reader.extract_items(etree.parse(sentences_file))
+    assert expected
+    assert reader.stream_items(sentences_file) == expected
+
+    reader = MMAXCorefDocumentReader(words)
+    expected = reader.extract_coref_sets(etree.parse(coref_file))
+    assert expected
+    assert reader.stream_coref_sets(coref_file) == expected
+
+
+def corea_sentences(part_numbers):
+    sentences = TokenTable()
+    for senti, part_number in enumerate(part_numbers):
+        sentences.append_sentence(
+            {
+                'word': f'w{senti}_{i}',
+                'id': f'word_{senti}_{i}',
+                'word_number': str(i),
+                'part_number': part_number,
+            }
+            for i in range(3)
+        )
+    return sentences
+
+
+def test_corea_validate_sentences():
+    validate = COREAWordsDocumentReader.validate_sentences
+
+    validate(corea_sentences(['1', '1', '2']))
+    validate(corea_sentences([None] * 3))
+
+    with pytest.raises(ValidationError, match='missing a part number'):
+        validate(corea_sentences(['1', None, None]))
+    with pytest.raises(ValidationError, match='missing a part number'):
+        validate(corea_sentences([None, None, '1']))
+    with pytest.raises(ValidationError, match='is not a number'):
+        validate(corea_sentences(['1', 'x', '1']))
+
+    sentences = corea_sentences(['1', '1'])
+    sentences[1][2]['part_number'] = '2'
+    with pytest.raises(ValidationError, match='is different from'):
+        validate(sentences)
+
+    sentences = corea_sentences(['1', '1'])
+    sentences[1][2]['word_number'] = '3'
+    with pytest.raises(ValidationError, match='wrong value. Expected 2'):
+        validate(sentences)
+
+
+def test_validation_levels():
+    assert validation_level(True) == 'full'
+    assert validation_level(False) == 'none'
+    assert validation_level('structural') == 'structural'
+    with pytest.raises(ValueError):
+        validation_level('some')
+
+    names = [f'WR-P-E-E-{i:010}_words.xml' for i in range(1000)]
+    assert {document_validation_level('sampled', n, 0) for n in names} == \
+        {'structural'}
+    assert {document_validation_level('sampled', n, 1) for n in names} == \
+        {'full'}
+    sampled = [n for n in names
+               if document_validation_level('sampled', n, 0.1) == 'full']
+    assert 50 < len(sampled) < 150
+    # The same documents every time
+    assert sampled == [n for n in names
+                       if document_validation_level('sampled', n, 0.1) ==
+                       'full']
+    assert document_validation_level('structural', names[0], 1) == \
+        'structural'
+
+
+def test_corea_structural_validation(corea_dir):
+    words_file = os.path.join(corea_dir, 'Basedata', 's2_words.xml')
+    xml = etree.parse(words_file)
+    # Make the word numbers of a sentence inconsistent
+    word = next(w for w in xml.getroot().iterchildren() if w.get('pos') == '1')
+    word.set('pos', '7')
+
+    full = COREAWordsDocumentReader(item_reader=COREAMedWordReader())
+    with pytest.raises(ValidationError):
+        full.extract_sentences(xml)
+
+    reader = COREAWordsDocumentReader(
+        item_reader=COREAMedWordReader(),
+        validate='structural'
+    )
+    assert reader.extract_sentences(xml)
+    with pytest.raises(ValueError):
+        COREAWordsDocumentReader(validate='sampled')
+
+
+def test_compile_coref_filter():
+    markables = [{'id': 'markable_1'}] + [
+        {'id': 'markable_2', 'ref': 'markable_1', 'type': t, 'level': level}
+        for t, level in it.product(
+            ['ident', 'bound', 'bridge', 'pref'],
+            ['reference', 'sense']
+        )
+    ]
+    compiled = compile_coref_filter('ident_or_bridge', 'reference')
+    unpickled = pickle.loads(pickle.dumps(compiled))
+    assert (unpickled.types, unpickled.levels) == \
+        (compiled.types, compiled.levels)
+    assert [
+        (markable.get('type'), markable.get('level'))
+        for markable in markables
+        if compiled(markable)
+    ] == [(None, None), ('ident', 'reference'), ('bound', 'reference')]
+    compiled = compile_coref_filter('none', 'sense')
+    assert [
+        (markable.get('type'), markable.get('level'))
+        for markable in markables
+        if compiled(markable)
+    ] == [
+        (None, None),
+        ('ident', 'sense'),
+        ('bound', 'sense'),
+        ('bridge', 'sense'),
+        ('pref', 'sense'),
+    ]
+    with pytest.raises(ValueError):
+        compile_coref_filter('unknown', 'none')
+
+
+def test_coref_filter_skips_reading_markables():
+    words = [{'id': f'word_{i}'} for i in range(1, 4)]
+    xml = (
+        b'<markables>'
+        b'<markable id="markable_1" span="word_1..word_2" ref="empty"/>'
+        b'<markable id="markable_2" span="word_3" ref="markable_1"'
+        b' type="ident" level="reference"/>'
+        # Filtered out, so its unknown word is not noticed
+        b'<markable id="markable_3" span="word_1..word_9"'
+        b' ref="markable_1" type="bridge" level="reference"/>'
+        b'</markables>'
+    )
+    reader = MMAXCorefDocumentReader(words, expected_root_tag='markables')
+    coref_set, = reader.stream_coref_sets(io.BytesIO(xml))
+    assert [m['id'] for m in coref_set] == ['markable_1', 'markable_2']
+
+    reader = MMAXCorefDocumentReader(
+        words,
+        expected_root_tag='markables',
+        item_filter=lambda markable: True
+    )
+    with pytest.raises(ValueError):
+        reader.stream_coref_sets(io.BytesIO(xml))
+
+    # Any filter with types and levels is applied to the XML-elements
+    reader = MMAXCorefDocumentReader(
+        words,
+        expected_root_tag='markables',
+        item_filter=CorefFilter({'ident'}, None)
+    )
+    coref_set, = reader.stream_coref_sets(io.BytesIO(xml))
+    assert [m['id'] for m in coref_set] == ['markable_1', 'markable_2']
+
+
+def test_coref_sets_with_cycles(caplog):
+    reader = MMAXCorefDocumentReader([], validate=False)
+    markables = [
+        {'id': 'markable_1', 'ref': 'markable_3'},
+        {'id': 'markable_2', 'ref': 'markable_1'},
+        {'id': 'markable_3', 'ref': 'markable_2'},
+        {'id': 'markable_4', 'ref': 'markable_2'},
+        {'id': 'markable_5', 'ref': 'markable_5'},
+        {'id': 'markable_6', 'ref': 'unknown'},
+        {'id': 'markable_7'},
+        {'id': 'markable_8', 'ref': 'markable_7'},
+    ]
+    sets = reader.coref_sets_from_markables(
+        (markable['id'], markable) for markable in markables
+    )
+    assert [[m['id'] for m in refset] for refset in sets] == [
+        ['markable_1', 'markable_2', 'markable_4', 'markable_3'],
+        ['markable_5'],
+        ['markable_6'],
+        ['markable_7', 'markable_8'],
+    ]
+    assert [
+        record.getMessage().split(': ')[1]
+        for record in caplog.records
+    ] == [
+        'markable_1 -> markable_3 -> markable_2',
+        'markable_5',
+    ]
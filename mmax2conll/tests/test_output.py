@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from mmax2conll.output import BufferedOutput, DEFAULT_FILE_MODE
+
+
+def test_buffered_output_writes_in_chunks(tmp_path):
+    filename = tmp_path / 'out.conll'
+    with BufferedOutput(str(filename), flush_size=10) as output:
+        output.write('12345')
+        assert output.buffered == 5
+        assert filename.read_text() == ''
+        output.write('67890')
+        assert output.buffered == 0
+        assert filename.read_text() == '1234567890'
+        output.write('end\n')
+    assert filename.read_text() == '1234567890end\n'
+
+
+def test_atomic_output(tmp_path):
+    filename = tmp_path / 'out.conll'
+    filename.write_text('old\n')
+
+    with pytest.raises(RuntimeError):
+        with BufferedOutput(str(filename), atomic=True) as output:
+            output.write('new\n')
+            raise RuntimeError()
+    assert filename.read_text() == 'old\n'
+    assert os.listdir(tmp_path) == ['out.conll']
+
+    with BufferedOutput(str(filename), atomic=True) as output:
+        output.write('new\n')
+        assert filename.read_text() == 'old\n'
+    assert filename.read_text() == 'new\n'
+    assert os.listdir(tmp_path) == ['out.conll']
+
+
+def test_atomic_output_mode(tmp_path):
+    filename = tmp_path / 'out.conll'
+    with BufferedOutput(str(filename), atomic=True) as output:
+        output.write('new\n')
+    assert filename.stat().st_mode & 0o777 == DEFAULT_FILE_MODE
+
+    os.chmod(filename, 0o640)
+    with BufferedOutput(str(filename), atomic=True) as output:
+        output.write('newer\n')
+    assert filename.stat().st_mode & 0o777 == 0o640
@@ -0,0 +1,68 @@
+import json
+
+from mmax2conll.shards import ShardWriter
+
+
+def read_index(directory):
+    with open(directory / 'index.jsonl') as fd:
+        return [json.loads(line) for line in fd]
+
+
+def test_shards_by_size(tmp_path):
+    with ShardWriter(str(tmp_path), max_bytes=10) as shards:
+        shards.add('a', b'12345')
+        shards.add('b', b'67890')
+        shards.add('c', b'1')
+        shards.add('d', b'this does not fit anywhere')
+    assert (tmp_path / 'shard-00000.conll').read_bytes() == b'1234567890'
+    assert (tmp_path / 'shard-00001.conll').read_bytes() == b'1'
+    assert (tmp_path / 'shard-00002.conll').read_bytes() == \
+        b'this does not fit anywhere'
+    assert [
+        (entry['document'], entry['shard'], entry['offset'], entry['length'])
+        for entry in read_index(tmp_path)
+    ] == [
+        ('a', 'shard-00000.conll', 0, 5),
+        ('b', 'shard-00000.conll', 5, 5),
+        ('c', 'shard-00001.conll', 0, 1),
+        ('d', 'shard-00002.conll', 0, 26),
+    ]
+
+
+def test_shards_by_documents(tmp_path):
+    with ShardWriter(str(tmp_path), max_documents=2) as shards:
+        for document_id in 'abc':
+            shards.add(document_id, document_id.encode(), name=document_id)
+    assert (tmp_path / 'shard-00000.conll').read_bytes() == b'ab'
+    assert (tmp_path / 'shard-00001.conll').read_bytes() == b'c'
+    assert [entry['name'] for entry in read_index(tmp_path)] == \
+        ['a', 'b', 'c']
+
+
+def test_fewer_shards_than_before(tmp_path):
+    with ShardWriter(str(tmp_path), max_documents=1, part_index=True) \
+            as shards:
+        for document_id in 'abc':
+            shards.add(document_id, document_id.encode())
+    (tmp_path / 'other.conll').write_bytes(b'kept')
+
+    with ShardWriter(str(tmp_path), max_documents=2, part_index=True) \
+            as shards:
+        for document_id in 'ab':
+            shards.add(document_id, document_id.encode())
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'index.jsonl',
+        'other.conll',
+        'shard-00000.conll',
+        'shard-00000.conll.idx',
+    ]
+    assert (tmp_path / 'shard-00000.conll').read_bytes() == b'ab'
+
+
+def test_flush_size(tmp_path):
+    with ShardWriter(str(tmp_path), flush_size=4) as shards:
+        shards.add('a', b'12')
+        assert (tmp_path / 'shard-00000.conll').read_bytes() == b''
+        shards.add('b', b'34567')
+        # Written as soon as the buffer of 4 bytes is full
+        assert (tmp_path / 'shard-00000.conll').read_bytes() == b'1234567'
@@ -0,0 +1,43 @@
+from mmax2conll import constants as c
+from mmax2conll.token_table import TokenTable, WordIndex
+
+
+def test_token_table_behaves_like_list_of_dicts():
+    sentences = [
+        [{'word': 'Hallo', 'id': 'word_1'}, {'word': '!', 'id': 'word_2'}],
+        [{'word': 'Dag', 'id': 'word_3', 'problem': '0'}],
+    ]
+    table = TokenTable()
+    for sentence in sentences:
+        table.append_sentence(sentence)
+
+    assert table == sentences
+    assert len(table) == 2
+    assert table[-1][0]['word'] == 'Dag'
+    assert table[0][1].get('problem') is None
+    assert 'problem' not in table[0][1]
+    assert list(filter(c.SENTENCE_FILTERS['has_problem'], table)) == \
+        sentences[1:]
+    assert list(filter(c.SENTENCE_FILTERS['no_problem'], table)) == \
+        sentences[:1]
+
+    table[0][0]['coref'] = '(0)'
+    assert table.column('coref') == ['(0)', None, None]
+
+
+def test_token_table_select():
+    table = TokenTable()
+    table.extend(
+        {'word': str(i), 'id': f'word_{i}'}
+        for i in range(5)
+    )
+    selected = table.select([['word_0', 'word_1'], [], ['word_2']])
+    assert [[w['word'] for w in sentence] for sentence in selected] == \
+        [['0', '1'], [], ['2']]
+
+
+def test_word_index():
+    index = WordIndex(['word_1', 'word_2', 'word_10'])
+    assert index.indices_of(['word_10', 'word_1']) == [2, 0]
+    assert index.ids_of([1, 2]) == ('word_2', 'word_10')
+    assert len(index) == 3
@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+from mmax2conll.xml_parsers import XMLParserPool, get_parser_pool
+
+XML = b'<words>\n  <word id="word_1">Een</word>\n  <word id="word_2">test</word>\n</words>\n'  # noqa
+
+
+def ends(events):
+    return [
+        (event, element.tag)
+        for event, element in events
+        if event == 'end'
+    ]
+
+
+def test_pool_reuses_parsers_of_complete_documents():
+    pool = XMLParserPool(remove_blank_text=True)
+    expected = [('end', 'word'), ('end', 'word'), ('end', 'words')]
+
+    assert ends(pool.iterparse(io.BytesIO(XML))) == expected
+    parser, = pool.pull_parsers[('start', 'end')]
+    assert ends(pool.iterparse(io.BytesIO(XML))) == expected
+    assert pool.pull_parsers[('start', 'end')] == [parser]
+
+
+def test_pool_drops_parsers_of_incomplete_documents():
+    pool = XMLParserPool()
+
+    # Interleaved documents get their own parser
+    first = pool.iterparse(io.BytesIO(XML))
+    next(first)
+    assert ends(pool.iterparse(io.BytesIO(XML)))[-1] == ('end', 'words')
+    first.close()
+    assert len(pool.pull_parsers[('start', 'end')]) == 1
+
+    with pytest.raises(Exception):
+        list(pool.iterparse(io.BytesIO(b'<words><word></words>')))
+    assert pool.pull_parsers[('start', 'end')] == []
+    assert ends(pool.iterparse(io.BytesIO(XML)))[-1] == ('end', 'words')
+
+
+def test_get_parser_pool():
+    assert get_parser_pool() is get_parser_pool({})
+    assert get_parser_pool({'huge_tree': True}).options['huge_tree']
+    assert get_parser_pool({'huge_tree': True}) is not get_parser_pool()
+    with pytest.raises(ValueError):
+        get_parser_pool({'recover': True})
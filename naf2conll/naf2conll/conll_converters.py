@@ -3,6 +3,7 @@ import itertools as it
 from collections import Counter
 
 from . import constants as c
+from .instrumentation import NO_INSTRUMENTATION
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -11,12 +12,17 @@ class CorefConverter:
     """
     Convert coreference information to a format writeable by
     `.conll_writers.CoNLLWriter`
+
+    Checking the spans and `uniqueyfy` are timed as the stages `check_spans`
+    and `uniqueyfy` of `instrumentation` (see `Instrumentation`).
     """
 
     def __init__(self, sentences, uniqueyfy=c.UNIQUEYFY,
                  fill_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS,
-                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID):
+                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID,
+                 instrumentation=NO_INSTRUMENTATION):
         self.sentences = sentences
+        self.instrumentation = instrumentation
         self.should_uniqueyfy = uniqueyfy
         self.should_fill_spans = fill_spans
         self.sort_key = sort_key
@@ -141,10 +147,12 @@ class CorefConverter:
 
         Incrementally assigns a reference ID to reference sets.
         """
-        sets, set_problem_map = self.check_and_fill_spans(sets)
+        with self.instrumentation.stage('check_spans'):
+            sets, set_problem_map = self.check_and_fill_spans(sets)
 
         if self.should_uniqueyfy:
-            sets = self.uniqueyfy(sets)
+            with self.instrumentation.stage('uniqueyfy'):
+                sets = self.uniqueyfy(sets)
 
         word_id_map = {}
         word_problem_map = {}
@@ -0,0 +1,291 @@
+import os
+import re
+import mmap
+import json
+import locale
+import logging
+
+from . import constants as c
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+# The first and the last line of a part (see `CoNLLWriter`). The part number
+# is optional, because not every CoNLL file has one. Not anchored to the
+# start of a line, because a pattern that starts with a literal is searched
+# for much faster: `index_parts` skips matches in the middle of a line.
+PART_BOUNDARY = re.compile(
+    rb'#(?:begin document \((.*?)\);(?: part (\d+))?|end document)'
+    rb'[^\n]*\n?'
+)
+NEWLINE = ord('\n')
+
+
+def index_parts(data, offset=0, encoding=None):
+    """
+    Find the parts in CoNLL `data` (bytes in `encoding`, or a memory map of
+    a file).
+
+    Yields a `(document_id, part, offset, length)` tuple for every part,
+    where `offset` and `length` are in bytes and `offset` counts from
+    `offset`. A part without a part number is part 0.
+
+    Raises a ValueError if a part does not end before the next begins or
+    before the end of `data`.
+    """
+    encoding = encoding or locale.getpreferredencoding(False)
+    begin = None
+    for match in PART_BOUNDARY.finditer(data):
+        if match.start() and data[match.start() - 1] != NEWLINE:
+            continue
+        document_id, part = match.group(1, 2)
+        if document_id is not None:
+            if begin is not None:
+                raise ValueError(
+                    f"Part {begin[1]} of {begin[0]} at byte"
+                    f" {offset + begin[2]} does not end before the next part"
+                    " begins"
+                )
+            begin = (
+                document_id.decode(encoding),
+                0 if part is None else int(part),
+                match.start()
+            )
+        elif begin is None:
+            raise ValueError(
+                f"Found the end of a part at byte {offset + match.start()},"
+                " but no part began"
+            )
+        else:
+            document_id, part, start = begin
+            yield document_id, part, offset + start, match.end() - start
+            begin = None
+    if begin is not None:
+        raise ValueError(
+            f"Part {begin[1]} of {begin[0]} at byte {offset + begin[2]} does"
+            " not end"
+        )
+
+
+def index_filename(filename):
+    """
+    Get the name of the index file of CoNLL file `filename`.
+    """
+    return filename + c.CONLL_INDEX_EXTENSION
+
+
+def index_line(document_id, part, offset, length):
+    """
+    Get the line of the part of a document in an index file.
+    """
+    return json.dumps({
+        'document': document_id,
+        'part': part,
+        'offset': offset,
+        'length': length,
+    }, sort_keys=True) + '\n'
+
+
+class CoNLLIndex:
+    """
+    Byte offsets of the parts of the documents in a CoNLL file:
+    `{document_id: {part: (offset, length)}}`.
+
+    The index is saved next to the CoNLL file (see `index_filename`) as JSON
+    lines, with one line for every part.
+    """
+
+    def __init__(self, parts=None):
+        self.parts = {} if parts is None else parts
+
+    def add(self, document_id, part, offset, length):
+        parts = self.parts.setdefault(document_id, {})
+        if part in parts:
+            logger.warn(
+                f"Part {part} of {document_id} is in the CoNLL file more"
+                " than once. Only the first one is indexed"
+            )
+            return
+        parts[part] = (offset, length)
+
+    @classmethod
+    def build(cls, filename, encoding=None):
+        """
+        Index CoNLL file `filename` by searching it for the first and last
+        line of every part.
+        """
+        index = cls()
+        with open(filename, 'rb') as fd:
+            if os.fstat(fd.fileno()).st_size == 0:
+                # An empty file cannot be mapped
+                return index
+            with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for part in index_parts(data, encoding=encoding):
+                    index.add(*part)
+        return index
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read the index saved in `filename`.
+        """
+        index = cls()
+        with open(filename) as fd:
+            for line in fd:
+                entry = json.loads(line)
+                index.add(
+                    entry['document'],
+                    entry['part'],
+                    entry['offset'],
+                    entry['length']
+                )
+        return index
+
+    @classmethod
+    def for_file(cls, filename, encoding=None):
+        """
+        Get the index of CoNLL file `filename`: the one saved next to it if
+        it is not older than the file, or a new one otherwise.
+        """
+        saved = index_filename(filename)
+        if os.path.exists(saved) and \
+           os.path.getmtime(saved) >= os.path.getmtime(filename):
+            return cls.load(saved)
+        logger.info(f"Indexing {filename}")
+        return cls.build(filename, encoding)
+
+    def save(self, filename):
+        with open(filename, 'w') as fd:
+            for line in self.lines():
+                fd.write(line)
+
+    def lines(self):
+        """
+        Get the JSON lines of the index, in the order of the file.
+        """
+        parts = sorted(
+            (offset, length, document_id, part)
+            for document_id, document_parts in self.parts.items()
+            for part, (offset, length) in document_parts.items()
+        )
+        for offset, length, document_id, part in parts:
+            yield index_line(document_id, part, offset, length)
+
+    def __contains__(self, document_id):
+        return document_id in self.parts
+
+    def __iter__(self):
+        return iter(self.parts)
+
+    def __len__(self):
+        return len(self.parts)
+
+
+class CoNLLReader:
+    """
+    Random access to the documents in a (large) CoNLL file.
+
+    The file is mapped into memory and the parts of a document are looked
+    up in a `CoNLLIndex` (by default the one of `CoNLLIndex.for_file`), so
+    getting one document does not read the rest of the file.
+    """
+
+    def __init__(self, filename, index=None, encoding=None):
+        self.filename = filename
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.index = CoNLLIndex.for_file(filename, self.encoding) \
+            if index is None else index
+        self.file = open(filename, 'rb')
+        self.data = b'' if os.fstat(self.file.fileno()).st_size == 0 \
+            else mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def raw(self, document_id, part=None):
+        """
+        Get the lines of one part of a document, or of all its parts if
+        `part` is None, as bytes.
+
+        Raises a KeyError if the document or the part is not in the file.
+        """
+        parts = self.index.parts[document_id]
+        if part is not None:
+            offset, length = parts[part]
+            return self.data[offset:offset + length]
+        return b''.join(
+            self.data[offset:offset + length]
+            for _, (offset, length) in sorted(parts.items())
+        )
+
+    def text(self, document_id, part=None):
+        """
+        Like `raw`, but decoded.
+        """
+        return self.raw(document_id, part).decode(self.encoding)
+
+    def sentences(self, document_id, part=None):
+        """
+        Get the sentences of one part of a document, or of all its parts if
+        `part` is None.
+
+        Every sentence is a list of rows and every row is a list of the
+        values of the columns.
+        """
+        sentences = []
+        sentence = []
+        for line in self.text(document_id, part).splitlines():
+            if line.startswith('#'):
+                continue
+            row = line.split()
+            if row:
+                sentence.append(row)
+            elif sentence:
+                sentences.append(sentence)
+                sentence = []
+        if sentence:
+            sentences.append(sentence)
+        return sentences
+
+    def __contains__(self, document_id):
+        return document_id in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(cmdline_args=None):
+    """
+    Build and save the index of existing CoNLL files.
+    """
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(
+        description="Save an index of the byte offsets of the parts of the"
+        " documents in CoNLL files next to the files, for `CoNLLReader`"
+    )
+    parser.add_argument('-l', '--log-level', default='INFO',
+                        help="Logging level")
+    parser.add_argument('conll_files', nargs='+',
+                        help="CoNLL files to index")
+    args = parser.parse_args(cmdline_args)
+    logging.basicConfig(level=args.log_level)
+
+    for filename in args.conll_files:
+        index = CoNLLIndex.build(filename)
+        index.save(index_filename(filename))
+        logger.info(
+            f"Indexed {len(index)} documents of {filename} in"
+            f" {index_filename(filename)}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -92,6 +92,25 @@ class CoNLLWriter:
         self.defaults = defaults
         self.on_missing = on_missing
         self.columns = columns
+        self.column_policies = self.compile_column_policies()
+
+    def compile_column_policies(self):
+        """
+        Get a `(column, on_missing, default)` tuple for every column, so the
+        policy for missing data is looked up once per writer instead of once
+        per sentence.
+        """
+        policies = []
+        for column in self.columns:
+            on_missing = self.on_missing[column]
+            if on_missing not in ('nothing', 'warn', 'throw'):
+                raise ValueError(
+                    f"`on_missing` should be either 'nothing', 'warn' or"
+                    f" 'throw', but `on_missing[{column!r}]` is {on_missing!r}"
+                )
+            default = None if on_missing == 'throw' else self.defaults[column]
+            policies.append((column, on_missing, default))
+        return policies
 
     def write(self, writeable, document_id, sentences):
         """
@@ -158,80 +177,64 @@ class CoNLLWriter:
 
         Take the specified action when something is missing.
         """
-        self.clean_sentence(sentence)
-        column_sizes = self.get_column_sizes(sentence)
-        for word in sentence:
-            self.write_word(writeable, document_id, word, column_sizes)
-        # Sentences are delimited by a newline.
-        writeable.write('\n')
-
-    def write_word(self, writeable, document_id, word, column_sizes):
-        """
-        Write a row for a word
-
-        Always raises an exception if something is missing.
-        """
-        writeable.write(document_id)
-        for column in self.columns:
-            writeable.write(self.min_column_spacing * ' ')
-            value = word[column]
-            writeable.write((column_sizes[column] - len(value)) * ' ')
-            writeable.write(value)
-        writeable.write('\n')
+        writeable.write(self.format_sentence(document_id, sentence))
 
-    def clean_sentence(self, sentence):
+    def format_sentence(self, document_id, sentence):
         """
-        Make sure all columns are present in all words of the sentence and
-        all values are strings.
+        Get the CoNLL rows of a sentence as one string, including the empty
+        line that ends the sentence.
 
-        Changes the sentence in place!
+        Does not change the sentence.
         Complains according to self.on_missing if data is missing.
         """
-        self.add_missing_data_to_sentence(sentence)
-        self.convert_values_to_string(sentence)
+        spacing = self.min_column_spacing * ' '
+        columns = []
+        for column, on_missing, default in self.column_policies:
+            values = self.get_values(sentence, column)
+            if None in values:
+                values = self.fill_missing(
+                    sentence, column, values, on_missing, default
+                )
+            values = [
+                str(value) if value is not None else ''
+                for value in values
+            ]
+            width = self.get_max_length(values)
+            columns.append([value.rjust(width) for value in values])
 
-    def convert_values_to_string(self, sentence):
-        """
-        Make sure all values are strings.
+        # Sentences are delimited by a newline.
+        return ''.join(
+            document_id + spacing + spacing.join(row) + '\n'
+            for row in zip(*columns)
+        ) + '\n'
 
-        Changes the sentence in place!
+    @staticmethod
+    def get_values(sentence, column):
         """
-        for word in sentence:
-            for column in self.columns:
-                value = word[column]
-                word[column] = str(value) if value is not None else ''
+        Get a new list of the values of a column for the words of a sentence,
+        where `None` means the value is missing.
+        """
+        return [word.get(column, None) for word in sentence]
 
-    def add_missing_data_to_sentence(self, sentence):
+    def fill_missing(self, sentence, column, values, on_missing, default):
         """
-        Make sure all columns are present in all words of the sentence.
+        Get `values` with the missing values replaced by `default`.
 
-        Changes the sentence in place!
-        Complains according to self.on_missing if data is missing.
+        Complains according to `on_missing`.
         """
-        for column in self.columns:
-            on_missing = self.on_missing[column]
-            if on_missing == 'nothing':
-                default = self.defaults[column]
-                for word in sentence:
-                    if word.get(column, None) is None:
-                        word[column] = default
-            elif on_missing == 'warn':
-                default = self.defaults[column]
-                for word in sentence:
-                    if word.get(column, None) is None:
-                        word[column] = default
-                        logger.warn(self.get_missing_message(column, word))
-            elif on_missing == 'throw':
-                for word in sentence:
-                    if word.get(column, None) is None:
-                        raise ValueError(
-                            self.get_missing_message(column, word)
-                        )
-            else:
-                raise ValueError(
-                    f"`on_missing` should be either 'nothing', 'warn' or"
-                    f" 'throw', but `on_missing[{column!r}]` is {on_missing!r}"
-                )
+        if on_missing == 'throw':
+            raise ValueError(self.get_missing_message(
+                column,
+                sentence[values.index(None)]
+            ))
+        if on_missing == 'warn':
+            for index, value in enumerate(values):
+                if value is None:
+                    logger.warn(self.get_missing_message(
+                        column,
+                        sentence[index]
+                    ))
+        return [default if value is None else value for value in values]
 
     @staticmethod
     def get_missing_message(column, word):
@@ -240,17 +243,6 @@ class CoNLLWriter:
         """
         return f"The column {column!r} is missing from the word: {word!r}"
 
-    def get_column_sizes(self, sentence):
-        """
-        Calculate the size of the columns for this sentence
-        """
-        return {
-            column: self.get_max_length(
-                word[column] for word in sentence
-            )
-            for column in self.columns
-        }
-
     @staticmethod
     def get_max_length(iterable):
         """
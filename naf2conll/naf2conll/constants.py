@@ -4,11 +4,40 @@ VALIDATE = True
 UNIQUEYFY = False
 FILL_NON_CONSECUTIVE_COREF_SPANS = False
 SENTENCE_FILTER = 'none'
+# 'stream' only reads the layers that are needed (see `NAFStreamReader`),
+# 'kafnafparser' reads the whole document using KafNafParser
+NAF_READER = 'stream'
+NAF_READERS = ('stream', 'kafnafparser')
 
 # Reporting
 ALLOW_OVERWRITING = False
 LOG_ON_ERROR = True
 
+# Performance
+JOBS = 1
+# Tasks that are submitted to the worker processes at a time, per worker
+TASKS_PER_WORKER = 4
+OUTPUT_FLUSH_SIZE = 1 << 20  # characters
+ATOMIC_OUTPUT = False
+INCREMENTAL = False
+STATS_FILE = None
+PROFILE_DIR = None
+PROFILE_EXTENSION = '.prof'
+PROFILE_REPORT = 'report.txt'
+PROFILE_TOP = 30  # functions
+# Sharded output: at most SHARD_SIZE bytes and SHARD_DOCUMENTS documents
+# per shard. Both None writes one output file per document.
+SHARD_SIZE = None
+SHARD_DOCUMENTS = None
+SHARD_PREFIX = 'shard-'
+SHARD_NAME = SHARD_PREFIX + '{:05d}'
+SHARD_INDEX = 'index.jsonl'
+# Save an index of the byte offsets of the parts of the documents next to
+# every output file (see `CoNLLIndex`)
+CONLL_INDEX = False
+CONLL_INDEX_EXTENSION = '.idx'
+MANIFEST_FILENAME = '.naf2conll-manifest.json'
+
 # NAF
 NAF_EXTENSION = '.naf'
 DIRS_TO_IGNORE = []
@@ -67,10 +96,24 @@ CONLL_DEFAULTS = {
 
 SENTENCE_START_NUMBER = 1
 
+
+# The filters are plain functions (not lambdas) so that they can be pickled
+# and sent to worker processes when converting in parallel.
+def SENTENCE_NONE_FILTER(sentence): return sentence
+
+
+def SENTENCE_HAS_PROBLEM_FILTER(sentence):
+    return any('problem' in w for w in sentence)
+
+
+def SENTENCE_NO_PROBLEM_FILTER(sentence):
+    return all('problem' not in w for w in sentence)
+
+
 SENTENCE_FILTERS = {
-    'none': lambda x: x,
-    'has_problem': lambda s: any('problem' in w for w in s),
-    'no_problem': lambda s: all('problem' not in w for w in s),
+    'none': SENTENCE_NONE_FILTER,
+    'has_problem': SENTENCE_HAS_PROBLEM_FILTER,
+    'no_problem': SENTENCE_NO_PROBLEM_FILTER,
 }
 SENTENCE_DEFAULT_FILTER = SENTENCE_FILTERS[SENTENCE_FILTER]
 
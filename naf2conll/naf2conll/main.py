@@ -1,9 +1,12 @@
 #! /usr/bin/env python3
 
+import io
 import os
+import pickle
 import logging
-
-from KafNafParserPy import KafNafParser
+import itertools as it
+from functools import partial
+from collections import deque
 
 from . import constants as c
 from .util import (
@@ -11,15 +14,29 @@ from .util import (
     directory_exists,
     document_ID_from_filename,
     add_word_numbers,
+    WorkerError,
 )
-from .naf_readers import NAFReader
+from .naf_readers import NAFReader, NAFStreamReader
 from .conll_converters import CorefConverter
 from .conll_writers import CoNLLWriter
+from .output import BufferedOutput, encode_output
+from .shards import DocumentOutput, ShardWriter
+from .conll_index import CoNLLIndex, index_filename
+from .manifest import Manifest
+from .instrumentation import Instrumentation, NO_INSTRUMENTATION, Statistics
+from .profiling import Profiles, run_profiled
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 
 class Main:
+    # State of this (worker) process that is reused for all documents it
+    # converts: readers per `(naf_reader, validate)`, the last writer and
+    # the keyword arguments shared by all tasks (see `init_worker`)
+    _readers = {}
+    _writer = None
+    worker_kwargs = {}
+
     @classmethod
     def find_data_dirs(cls, directory,
                        naf_extension=c.NAF_EXTENSION,
@@ -43,8 +60,60 @@ class Main:
                        naf_extension=c.NAF_EXTENSION,
                        dirs_to_ignore=c.DIRS_TO_IGNORE,
                        allow_overwriting=c.ALLOW_OVERWRITING,
+                       log_on_error=c.LOG_ON_ERROR,
+                       jobs=c.JOBS,
+                       incremental=c.INCREMENTAL,
+                       stats_file=c.STATS_FILE,
+                       profile_dir=c.PROFILE_DIR,
+                       shard_size=c.SHARD_SIZE,
+                       shard_documents=c.SHARD_DOCUMENTS,
                        **kwargs):
+        """
+        Batch convert all directories containing NAF files found in
+        `directories`.
+
+        The documents of all data directories are put in one queue. If `jobs`
+        is not 1 and the output is not sharded, the largest documents are
+        scheduled first, so that one big directory or document does not end
+        up being converted on its own at the end of the run.
+
+        If `incremental`, only the documents whose input files or
+        configuration changed since they were last converted are converted
+        (see `Manifest`).
+
+        If `stats_file` is a filename, the conversion of every document is
+        instrumented and the statistics are saved there (see `Statistics`).
+
+        If `profile_dir` is a directory name, the conversion of every document
+        is profiled and the profiles and a report of the functions that took
+        the most time are saved there (see `Profiles`).
+
+        If `shard_size` or `shard_documents` is not None, the output of all
+        documents is written to shards of at most `shard_size` bytes and
+        `shard_documents` documents in `output_dir`, with an index of where
+        every document is (see `ShardWriter`). The workers send the output to
+        this process, which writes it in the order of the documents. The
+        documents are not reordered by size then, so the shards and their
+        index do not depend on `jobs`.
+        """
         logger.debug(f"output_dir: {output_dir}")
+        sharded = shard_size is not None or shard_documents is not None
+        if sharded and incremental:
+            raise ValueError(
+                "Incremental conversion needs one output file per document,"
+                " so it cannot be combined with `shard_size` or"
+                " `shard_documents`"
+            )
+        if stats_file is not None:
+            kwargs['instrument'] = True
+        if incremental:
+            os.makedirs(output_dir, exist_ok=True)
+            manifest = Manifest.load(
+                os.path.join(output_dir, c.MANIFEST_FILENAME),
+                root=output_dir
+            )
+            kwargs['manifest'] = manifest
+        tasks = []
         for directory in directories:
             data_dirs = sorted(cls.find_data_dirs(
                 directory=directory,
@@ -52,11 +121,21 @@ class Main:
                 dirs_to_ignore=dirs_to_ignore
             ))
             for data_dir in data_dirs:
+                if sharded:
+                    tasks.append(cls.dir_tasks(
+                        input_dir=data_dir,
+                        output_dir=None,
+                        naf_extension=naf_extension,
+                        **kwargs
+                    ))
+                    continue
+
                 cur_output_dir = os.path.join(
                     output_dir,
                     data_dir[len(directory):]
                 )
-                if not allow_overwriting and os.path.exists(cur_output_dir):
+                if not allow_overwriting and not incremental and \
+                   os.path.exists(cur_output_dir):
                     logger.warn(
                         f"Merging output converted from {data_dir} into"
                         f" {cur_output_dir}"
@@ -69,23 +148,98 @@ class Main:
                         f" {cur_output_dir}"
                     )
 
-                cls.dir_main(
+                tasks.append(cls.dir_tasks(
                     input_dir=data_dir,
                     output_dir=cur_output_dir,
                     naf_extension=naf_extension,
                     allow_overwriting=allow_overwriting,
                     **kwargs
+                ))
+
+        tasks = it.chain.from_iterable(tasks)
+        if incremental:
+            tasks = manifest.outdated(tasks)
+        if jobs != 1 and not sharded:
+            tasks = sorted(tasks, key=cls.task_size, reverse=True)
+
+        statistics = None if stats_file is None else Statistics(stats_file)
+        profiles = None if profile_dir is None else Profiles(profile_dir)
+        shards = None if not sharded else ShardWriter(
+            output_dir,
+            max_bytes=shard_size,
+            max_documents=shard_documents,
+            extension=kwargs.get('conll_extension', c.CONLL_EXTENSION),
+            part_index=kwargs.get('conll_index', c.CONLL_INDEX),
+            flush_size=kwargs.get('output_flush_size', c.OUTPUT_FLUSH_SIZE)
+        )
+
+        def on_done(task, record):
+            name, input_dir, _, _ = task
+            if shards is not None:
+                shards.add(
+                    record.document_id,
+                    record.data,
+                    name=name,
+                    input_dir=input_dir
                 )
+                record = record.record
+            if incremental:
+                manifest.done(task)
+            if statistics is not None:
+                statistics.add(name, input_dir, record)
+
+        try:
+            cls.run_tasks(
+                tasks,
+                jobs=jobs,
+                log_on_error=log_on_error,
+                on_done=on_done,
+                profiles=profiles
+            )
+        finally:
+            if incremental:
+                manifest.save()
+            if statistics is not None:
+                statistics.close()
+            if profiles is not None:
+                profiles.report()
+            if shards is not None:
+                shards.close()
 
     @classmethod
     def dir_main(cls, input_dir, output_dir,
-                 allow_overwriting=c.ALLOW_OVERWRITING,
-                 conll_extension=c.CONLL_EXTENSION,
-                 naf_extension=c.NAF_EXTENSION,
                  log_on_error=c.LOG_ON_ERROR,
+                 jobs=c.JOBS,
                  **kwargs):
         """
         Batch convert all NAF files in `input_dir`.
+
+        Uses `jobs` worker processes if `jobs` is not 1 (see `run_tasks`).
+        """
+        cls.run_tasks(
+            cls.dir_tasks(input_dir, output_dir, **kwargs),
+            jobs=jobs,
+            log_on_error=log_on_error
+        )
+
+    @staticmethod
+    def dir_tasks(input_dir, output_dir,
+                  allow_overwriting=c.ALLOW_OVERWRITING,
+                  conll_extension=c.CONLL_EXTENSION,
+                  naf_extension=c.NAF_EXTENSION,
+                  manifest=None,
+                  **kwargs):
+        """
+        Find all NAF files to convert in `input_dir`.
+
+        Yields `(name, input_dir, args, kwargs)` tuples, sorted by name, where
+        `Main.single_main(*args, **kwargs)` converts the file `name`.
+
+        Raises an IOError when an output file already exists and overwriting
+        is not allowed, unless it is in `manifest`.
+
+        If `output_dir` is None, the tasks have no output file and return
+        their output instead (see `single_main`).
         """
         files = sorted(
             filename
@@ -95,34 +249,203 @@ class Main:
 
         for name in files:
             naf_file = os.path.join(input_dir, name)
+            if output_dir is None:
+                yield name, input_dir, (None, naf_file), kwargs
+                continue
+
             output_file = os.path.join(
                 output_dir,
                 name[:-len(naf_extension)]
             ) + conll_extension
 
-            if os.path.exists(output_file):
+            if os.path.exists(output_file) and \
+               (manifest is None or output_file not in manifest):
                 if allow_overwriting:
                     logger.warn(f"Overwriting {output_file}")
                 else:
                     raise IOError(f"Will not overwrite: {output_file}")
-            try:
-                cls.single_main(
-                    output_file,
-                    naf_file,
-                    **kwargs
-                )
-            except Exception as e:
-                if log_on_error:
-                    logger.error(
-                        f"{name} from {input_dir} is skipped: "
-                        + e.args[0]
+
+            yield name, input_dir, (output_file, naf_file), kwargs
+
+    @staticmethod
+    def task_size(task):
+        """
+        Get the total size in bytes of the input files of a
+        `(name, input_dir, args, kwargs)` task.
+
+        The first argument is the output file, the other arguments that are
+        not None are input files.
+        """
+        _, _, args, _ = task
+        return sum(
+            os.path.getsize(filename)
+            for filename in args[1:]
+            if filename is not None
+        )
+
+    @classmethod
+    def run_tasks(cls, tasks, jobs=c.JOBS, log_on_error=c.LOG_ON_ERROR,
+                  on_done=None, profiles=None):
+        """
+        Run `cls.single_main` for every `(name, input_dir, args, kwargs)` task.
+
+        If `jobs` is 1, the tasks are run one after another in this process.
+        Otherwise they are distributed over `jobs` worker processes, or over
+        one worker process per CPU if `jobs` is 0 or None. Every task writes
+        its own output file, or returns its output to `on_done`, which is
+        called in the order of `tasks`, so the output does not depend on the
+        order in which the workers finish. At most `c.TASKS_PER_WORKER` tasks
+        per worker are submitted at a time, so the results that wait for an
+        earlier task to finish do not fill up the memory.
+
+        Errors are handled per task, in the order of `tasks`: if
+        `log_on_error`, the error is logged and the task is skipped, otherwise
+        the error is re-raised with the name of the task in its message and
+        all tasks that have not started yet are cancelled.
+
+        `on_done(task, result)` is called for every task that finished without
+        errors, where `result` is what `cls.single_main` returned.
+
+        If `profiles` is a `Profiles`, every task is profiled and its
+        statistics are saved to `profiles.filename(name)`.
+
+        Keyword arguments that all tasks share are sent to every worker
+        process once (see `init_worker`) instead of with every task.
+        """
+        if jobs == 1:
+            for task in tasks:
+                name, input_dir, args, kwargs = task
+                try:
+                    result = run_profiled(
+                        cls.profile_file(profiles, name),
+                        cls.single_main,
+                        *args,
+                        **kwargs
                     )
+                except Exception as e:
+                    cls.handle_task_error(e, name, input_dir, log_on_error)
                 else:
-                    e.args = (
-                        f"While processing {name} from {input_dir}: " +
-                        e.args[0],
-                    ) + e.args[1:]
-                    raise e
+                    if on_done is not None:
+                        on_done(task, result)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = list(tasks)
+        shared_kwargs = cls.shared_kwargs(tasks)
+        workers = jobs or os.cpu_count() or 1
+        remaining = iter(tasks)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=partial(
+                cls.init_worker,
+                logging.getLogger().getEffectiveLevel(),
+                shared_kwargs
+            )
+        ) as executor:
+            def submit(task):
+                return task, executor.submit(
+                    cls.worker_single_main,
+                    *task[2],
+                    profile_file=cls.profile_file(profiles, task[0]),
+                    **({} if shared_kwargs else task[3])
+                )
+
+            futures = deque(map(
+                submit,
+                it.islice(remaining, workers * c.TASKS_PER_WORKER)
+            ))
+            # Handled tasks are dropped, so their results (which can be the
+            # output of a whole document) do not stay in memory
+            while futures:
+                task, future = futures.popleft()
+                name, input_dir, _, _ = task
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not log_on_error:
+                        for _, other in futures:
+                            other.cancel()
+                    cls.handle_task_error(e, name, input_dir, log_on_error)
+                else:
+                    if on_done is not None:
+                        on_done(task, result)
+                futures.extend(map(submit, it.islice(remaining, 1)))
+
+    @staticmethod
+    def shared_kwargs(tasks):
+        """
+        Get the keyword arguments of `tasks` if all tasks have the same
+        keyword arguments, and an empty dictionary otherwise.
+        """
+        if not tasks:
+            return {}
+        shared = tasks[0][3]
+        for _, _, _, kwargs in tasks:
+            if kwargs is not shared and kwargs != shared:
+                return {}
+        return shared
+
+    @classmethod
+    def init_worker(cls, log_level, kwargs):
+        """
+        Initialise a worker process: use the same logging level as the main
+        process, which workers that do not inherit the logging configuration
+        (i.e. spawned workers) need, and save the keyword arguments that all
+        tasks share.
+        """
+        logging.basicConfig(level=log_level)
+        cls.worker_kwargs = kwargs
+
+    @classmethod
+    def worker_single_main(cls, *args, profile_file=None, **kwargs):
+        """
+        Run `cls.single_main` in a worker process, profiled if `profile_file`
+        is not None (see `run_profiled`), with the keyword arguments of this
+        worker (see `init_worker`) updated with `kwargs`.
+
+        Exceptions that cannot be pickled (e.g. the ones from lxml) are
+        replaced by a `WorkerError` with the same message.
+        """
+        try:
+            return run_profiled(
+                profile_file,
+                cls.single_main,
+                *args,
+                **dict(cls.worker_kwargs, **kwargs)
+            )
+        except Exception as e:
+            try:
+                pickle.dumps(e)
+            except Exception:
+                raise WorkerError(str(e)) from None
+            raise e
+
+    @staticmethod
+    def profile_file(profiles, name):
+        """
+        Get the file to save the profile of task `name` to, or None if
+        `profiles` is None.
+        """
+        return None if profiles is None else profiles.filename(name)
+
+    @staticmethod
+    def handle_task_error(error, name, input_dir,
+                          log_on_error=c.LOG_ON_ERROR):
+        """
+        Log `error` if `log_on_error` and re-raise it with the name of the
+        document in its message otherwise.
+        """
+        if log_on_error:
+            logger.error(
+                f"{name} from {input_dir} is skipped: " + error.args[0]
+            )
+        else:
+            error.args = (
+                f"While processing {name} from {input_dir}: " +
+                error.args[0],
+            ) + error.args[1:]
+            raise error
 
     @classmethod
     def single_main(
@@ -138,7 +461,29 @@ class Main:
            conll_defaults=c.CONLL_DEFAULTS,
            min_column_spacing=c.MIN_COLUMN_SPACING,
            on_missing=c.CONLL_ON_MISSING,
+           output_flush_size=c.OUTPUT_FLUSH_SIZE,
+           atomic_output=c.ATOMIC_OUTPUT,
+           conll_index=c.CONLL_INDEX,
+           naf_reader=c.NAF_READER,
+           instrument=False,
            ):
+        """
+        Convert one document.
+
+        `naf_reader` is one of `c.NAF_READERS`: 'stream' reads the NAF file
+        using `NAFStreamReader` and 'kafnafparser' using `KafNafParser` and
+        `NAFReader`. Both give the same output.
+
+        If `instrument`, returns the `Instrumentation` record of the
+        conversion, with the stages `parse`, `read`, `read_coref`, `convert`
+        (which contains `check_spans` and `uniqueyfy`) and `write`.
+
+        If `output_file` is None, the output is not written but returned
+        (encoded) in a `DocumentOutput` together with the record.
+        """
+        instrumentation = Instrumentation() if instrument \
+            else NO_INSTRUMENTATION
+
         # Read document ID
         document_id = document_ID_from_filename(
             naf_file,
@@ -147,37 +492,96 @@ class Main:
         cls.check_document_id(document_id, naf_file, on_missing['document_id'])
 
         # Read data
-        reader = NAFReader(validate=validate)
-        nafobj = KafNafParser(naf_file)
-        sentences = reader.extract_sentences(nafobj)
-        coref_sets = reader.extract_coref_sets(nafobj)
+        reader = cls.get_reader(naf_reader, validate)
+        with instrumentation.stage('parse'):
+            nafobj = reader.parse(naf_file)
+        with instrumentation.stage('read'):
+            sentences = reader.extract_sentences(nafobj)
+        with instrumentation.stage('read_coref'):
+            coref_sets = reader.extract_coref_sets(nafobj)
+            if instrument:
+                # Extracting is lazy: count what there is and time it here
+                coref_sets = list(coref_sets)
+                instrumentation.count('chains', len(coref_sets))
+                instrumentation.count('markables', sum(map(len, coref_sets)))
         del reader, nafobj
+        instrumentation.count('sentences', len(sentences))
+        instrumentation.count('words', sum(map(len, sentences)))
 
         add_word_numbers(sentences)
 
-        CorefConverter(
-            sentences,
-            uniqueyfy=uniqueyfy,
-            fill_spans=fill_non_consecutive_coref_spans,
-        ).add_data_from_coref_sets(
-            coref_sets
-        )
+        with instrumentation.stage('convert'):
+            CorefConverter(
+                sentences,
+                uniqueyfy=uniqueyfy,
+                fill_spans=fill_non_consecutive_coref_spans,
+                instrumentation=instrumentation,
+            ).add_data_from_coref_sets(
+                coref_sets
+            )
         del coref_sets
 
         sentences = filter(sentence_filter, sentences)
 
         # Save the data to CoNLL
-        cls.write_conll(
-            filename=output_file,
-            writer=CoNLLWriter(
-                defaults=conll_defaults,
-                min_column_spacing=min_column_spacing,
-                on_missing=on_missing,
-                columns=conll_columns
-            ),
-            document_id=document_id,
-            sentences=sentences
-        )
+        with instrumentation.stage('write'):
+            data = cls.write_conll(
+                filename=output_file,
+                writer=cls.get_writer(
+                    defaults=conll_defaults,
+                    min_column_spacing=min_column_spacing,
+                    on_missing=on_missing,
+                    columns=conll_columns
+                ),
+                document_id=document_id,
+                sentences=sentences,
+                flush_size=output_flush_size,
+                atomic=atomic_output,
+                index=conll_index,
+            )
+
+        if output_file is None:
+            return DocumentOutput(document_id, data, instrumentation.record())
+        return instrumentation.record()
+
+    @classmethod
+    def get_reader(cls, naf_reader=c.NAF_READER, validate=c.VALIDATE):
+        """
+        Get the reader of this process for `naf_reader` (one of
+        `c.NAF_READERS`) and `validate`, creating it the first time.
+        """
+        key = (naf_reader, validate)
+        reader = cls._readers.get(key, None)
+        if reader is None:
+            if naf_reader == 'stream':
+                reader = NAFStreamReader(validate=validate)
+            elif naf_reader == 'kafnafparser':
+                reader = NAFReader(validate=validate)
+            else:
+                raise ValueError(
+                    f"Unknown NAF reader: {naf_reader!r}. Known readers are:"
+                    f" {c.NAF_READERS!r}"
+                )
+            cls._readers[key] = reader
+        return reader
+
+    @classmethod
+    def get_writer(cls, **kwargs):
+        """
+        Get a `CoNLLWriter(**kwargs)`, reusing the previous writer of this
+        process if it was created with the same (identical) arguments, as is
+        the case for all documents of a batch in a worker process.
+        """
+        if cls._writer is not None:
+            previous_kwargs, writer = cls._writer
+            if previous_kwargs.keys() == kwargs.keys() and all(
+                previous_kwargs[key] is value
+                for key, value in kwargs.items()
+            ):
+                return writer
+        writer = CoNLLWriter(**kwargs)
+        cls._writer = (kwargs, writer)
+        return writer
 
     @staticmethod
     def check_document_id(document_id, filename,
@@ -200,15 +604,34 @@ class Main:
                 )
 
     @staticmethod
-    def write_conll(filename, writer, document_id, sentences):
+    def write_conll(filename, writer, document_id, sentences,
+                    flush_size=c.OUTPUT_FLUSH_SIZE, atomic=c.ATOMIC_OUTPUT,
+                    index=c.CONLL_INDEX):
         """
         Write sentence data to a file in CoNLL format.
+
+        The output is written in chunks of `flush_size` characters (see
+        `BufferedOutput`). If `atomic`, it is written to a temporary file
+        that replaces `filename` once everything is written.
+
+        If `index`, the byte offsets of the parts are saved next to the file
+        (see `CoNLLIndex`).
+
+        If `filename` is None, the output is returned as bytes, encoded as it
+        would be in a file (see `encode_output`), instead.
         """
-        with open(filename, 'w') as fd:
+        if filename is None:
+            fd = io.StringIO()
+            writer.write(fd, document_id, sentences)
+            return encode_output(fd.getvalue())
+        with BufferedOutput(filename, flush_size, atomic) as fd:
             writer.write(fd, document_id, sentences)
+        if index:
+            CoNLLIndex.build(filename).save(index_filename(filename))
 
     @staticmethod
-    def can_output_to(output, batch, allow_overwriting=None):
+    def can_output_to(output, batch, allow_overwriting=None,
+                      incremental=False):
         """
         Check whether the specified output location is legal.
 
@@ -221,12 +644,14 @@ class Main:
         :param allow_overwriting:   whether to allow overwriting existing
                                     files or directories. Defaults to
                                     c.ALLOW_OVERWRITING if `None`.
+        :param incremental:         whether an existing output folder is
+                                    updated incrementally
         """
         if allow_overwriting is None:
             allow_overwriting = c.ALLOW_OVERWRITING
 
         if os.path.exists(output):
-            if not allow_overwriting:
+            if not allow_overwriting and not (batch and incremental):
                 thing = "folder" if batch else "file"
                 raise ValueError(
                     "The configuration specifies overwriting is not allowed,"
@@ -308,6 +733,29 @@ class Main:
                             help="Directory to batch convert files from")
         parser.add_argument('-c', '--config', help="YAML configuration file",
                             type=file_exists)
+        parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help="Number of worker processes to use when"
+                            " batch converting. 0 means one per CPU."
+                            " Overrides `jobs` from the configuration file")
+        parser.add_argument('-i', '--incremental', action='store_true',
+                            default=None,
+                            help="Only convert the files that changed, or"
+                            " whose configuration changed, since the last"
+                            " batch conversion to the same output folder."
+                            " Overrides `incremental` from the configuration"
+                            " file")
+        parser.add_argument('--stats', default=None, dest='stats_file',
+                            help="File to save statistics about the"
+                            " conversion of every document in, as JSON lines"
+                            " with the time spent per stage and the number of"
+                            " words, sentences, chains and markables."
+                            " Overrides `stats_file` from the configuration"
+                            " file")
+        parser.add_argument('--profile', default=None, dest='profile_dir',
+                            help="Directory to save a cProfile profile of the"
+                            " conversion of every document in, together with"
+                            " a report of the functions that took the most"
+                            " time over all documents")
         parser.add_argument('output',
                             help="Where to save the CoNLL output")
         parser.add_argument('naf_file', type=file_exists, nargs='?',
@@ -333,6 +781,8 @@ class Main:
                 )
         else:
             del args['directories']
+            del args['jobs']
+            del args['incremental']
             args['output_file'] = output
             if args['naf_file'] is None:
                 parser.error(
@@ -342,13 +792,24 @@ class Main:
                 )
 
         if batch:
-            args_from_config.extend(batch_args_from_config)
+            # Not `extend`: that would change the default list and with it
+            # every later call in this process
+            args_from_config = args_from_config + batch_args_from_config
             del batch_args_from_config
 
         cls.process_config(args, args_from_config)
+        if batch and args['jobs'] is None:
+            args['jobs'] = c.JOBS
+        if batch and args['incremental'] is None:
+            args['incremental'] = c.INCREMENTAL
 
         # Verify the output location
-        cls.can_output_to(output, batch, args.get('allow_overwriting', None))
+        cls.can_output_to(
+            output,
+            batch,
+            args.get('allow_overwriting', None),
+            incremental=args.get('incremental', False)
+        )
 
         return batch, args
 
@@ -374,6 +835,38 @@ class Main:
                 args['sentence_filter']
             ]
 
+            # Optional, so configuration files without them keep working
+            if 'jobs' in args and args['jobs'] is None:
+                args['jobs'] = config.get('jobs', c.JOBS)
+            if 'incremental' in args and args['incremental'] is None:
+                args['incremental'] = config.get(
+                    'incremental',
+                    c.INCREMENTAL
+                )
+            args['output_flush_size'] = config.get(
+                'output_flush_size',
+                c.OUTPUT_FLUSH_SIZE
+            )
+            args['atomic_output'] = config.get(
+                'atomic_output',
+                c.ATOMIC_OUTPUT
+            )
+            args['conll_index'] = config.get('conll_index', c.CONLL_INDEX)
+            if args['stats_file'] is None:
+                args['stats_file'] = config.get('stats_file', c.STATS_FILE)
+            if 'output_dir' in args:
+                args['shard_size'] = config.get('shard_size', c.SHARD_SIZE)
+                args['shard_documents'] = config.get(
+                    'shard_documents',
+                    c.SHARD_DOCUMENTS
+                )
+            args['naf_reader'] = config.get('naf_reader', c.NAF_READER)
+            if args['naf_reader'] not in c.NAF_READERS:
+                raise ValueError(
+                    f"Unknown NAF reader: {args['naf_reader']!r}. Known"
+                    f" readers are: {c.NAF_READERS!r}"
+                )
+
     @staticmethod
     def keys_from_config(config, keys, filename):
         """
@@ -410,7 +903,25 @@ class Main:
         if batch:
             cls.super_dir_main(**args)
         else:
-            cls.single_main(**args)
+            stats_file = args.pop('stats_file')
+            profile_dir = args.pop('profile_dir')
+            profiles = None if profile_dir is None else Profiles(profile_dir)
+            name = os.path.basename(args['naf_file'])
+            record = run_profiled(
+                cls.profile_file(profiles, name),
+                cls.single_main,
+                instrument=stats_file is not None,
+                **args
+            )
+            if stats_file is not None:
+                with Statistics(stats_file) as statistics:
+                    statistics.add(
+                        name,
+                        os.path.dirname(args['naf_file']),
+                        record
+                    )
+            if profiles is not None:
+                profiles.report()
         logger.info("Done!")
 
 
@@ -1,9 +1,32 @@
 import itertools as it
 
-from KafNafParserPy import Cterm
+from lxml import etree
+from KafNafParserPy import Cterm, KafNafParser
 
 from . import constants as c
-from .util import split_on_numbering
+from .util import split_on_numbering, ValidationError
+
+
+class TermIndex(dict):
+    """
+    Dictionary from term ID to the tuple of the IDs of the tokens in the span
+    of that term, for the terms of the KafNafParser `nafobj`.
+
+    A term is looked up in `nafobj` the first time it is needed, so every
+    term is resolved once per document, however many spans it is in, and
+    terms that are never needed are not resolved at all.
+    """
+
+    def __init__(self, nafobj):
+        super(TermIndex, self).__init__()
+        self.nafobj = nafobj
+
+    def __missing__(self, term_id):
+        term = self.nafobj.get_term(term_id)
+        if term is None:
+            raise KeyError(term_id)
+        token_ids = self[term_id] = tuple(term.get_span_ids())
+        return token_ids
 
 
 class NAFReader:
@@ -12,6 +35,13 @@ class NAFReader:
         self.validate = validate
         self.sentence_start_number = sentence_start_number
 
+    @staticmethod
+    def parse(naf_file):
+        """
+        Read a NAF file into a `KafNafParser`.
+        """
+        return KafNafParser(naf_file)
+
     @staticmethod
     def extract_words(nafobj):
         return (
@@ -39,30 +69,233 @@ class NAFReader:
 
         A coreference set is a list of spans referring to the same thing
         A span is a list of word IDs
+
+        The terms of all spans are resolved using one
+        `cls.term_index(nafobj)`.
         """
+        term_index = cls.term_index(nafobj)
         # Return an iterator of [ [word ID, word Id, ...], ...]
         return (
             # One reference "set" is a list of spans
             [
                 # One span is a list of word IDs
-                list(cls.token_ids_from_term_ids(
-                    refspan.get_span_ids(),
-                    nafobj
-                ))
-                for refspan in ref.get_spans()
+                cls.token_ids_from_term_ids(span, nafobj, term_index)
+                for span in spans
             ]
+            for spans in cls.coref_spans(nafobj)
+        )
+
+    @staticmethod
+    def coref_spans(nafobj):
+        """
+        Iterate over the coreferences as lists of spans, where a span is a
+        list of term IDs.
+        """
+        return (
+            [refspan.get_span_ids() for refspan in ref.get_spans()]
             for ref in nafobj.get_corefs()
         )
 
     @staticmethod
-    def token_ids_from_term_ids(term_ids, nafobj):
+    def term_index(nafobj):
+        """
+        Get a term ID -> token IDs index of the terms of `nafobj` (see
+        `TermIndex`).
+        """
+        return TermIndex(nafobj)
+
+    @staticmethod
+    def token_ids_from_term_ids(term_ids, nafobj, term_index=None):
         """
         Get a token IDs, given a list of term IDs
+
+        If a `term_index` (see `term_index`) is given, the terms are looked
+        up there and a list is returned. Raises a ValidationError for unknown
+        terms in that case.
+        """
+        if term_index is None:
+            return it.chain(*map(           # Flatten
+                Cterm.get_span_ids,         # Get token IDs
+                map(
+                    nafobj.get_term,        # Get term object
+                    term_ids
+                )
+            ))
+
+        token_ids = []
+        for term_id in term_ids:
+            try:
+                token_ids.extend(term_index[term_id])
+            except KeyError:
+                raise ValidationError(
+                    f"Reference to unknown term ({term_id!r}) in a"
+                    " coreference span"
+                ) from None
+        return token_ids
+
+
+class NAFLayers:
+    """
+    The parts of the text, terms and coreferences layers of a NAF (or KAF)
+    document that naf2conll needs, as read by `NAFStreamReader.parse`:
+     - `words`: a list of `{'id': ..., 'word': ..., 'sentence': ...}`
+       dictionaries, one per token, like `NAFReader.extract_words` returns.
+     - `terms`: a dictionary from term ID to the tuple of token IDs of its
+       span, like a `TermIndex`.
+     - `corefs`: a list with for every coreference a list of spans, where a
+       span is a list of term IDs.
+    """
+
+    def __init__(self):
+        self.words = []
+        self.terms = {}
+        self.corefs = []
+
+
+class NAFStreamReader(NAFReader):
+    """
+    Reads the same data from a NAF (or KAF) file as `NAFReader`, without
+    building a `KafNafParser` object of the whole document.
+
+    `parse` streams through the file and only keeps the tokens, the spans of
+    the terms and the spans of the coreferences. Like `KafNafParser`, it only
+    reads the first text, terms and coreferences layer, so it stops reading
+    the file once it has read those. All other layers are freed as soon as
+    the next layer starts.
+
+    Use `extract_sentences` and `extract_coref_sets` on the `NAFLayers` that
+    `parse` returns.
+    """
+    LAYERS = ('text', 'terms', 'coreferences')
+    ITEMS = {'text': 'wf', 'terms': 'term', 'coreferences': 'coref'}
+
+    def parse(self, source):
         """
-        return it.chain(*map(           # Flatten
-            Cterm.get_span_ids,         # Get token IDs
-            map(
-                nafobj.get_term,        # Get term object
-                term_ids
-            )
-        ))
+        Read the layers naf2conll needs from `source`, which is a filename or
+        a file object opened in binary mode.
+
+        Returns a `NAFLayers`.
+        """
+        layers = NAFLayers()
+        todo = set(self.LAYERS)
+        root = None
+        # The first of each of `self.LAYERS` that is being read
+        layer = None
+        # Token and term IDs are called `wid` and `tid` in KAF
+        token_id = term_id = 'id'
+
+        if not hasattr(source, 'read'):
+            with open(source, 'rb') as fd:
+                return self.parse(fd)
+
+        events = etree.iterparse(
+            source,
+            events=('start', 'end'),
+            tag=self.LAYERS + tuple(self.ITEMS.values()),
+            remove_blank_text=True,
+        )
+        for event, element in events:
+            tag = element.tag
+            if tag in todo:
+                # The tags of the items only occur in their layers, but
+                # better safe than sorry
+                parent = element.getparent()
+                if parent is None or parent.getparent() is not None:
+                    continue
+                if event == 'start':
+                    if root is None:
+                        root = parent
+                        if root.tag == 'KAF':
+                            token_id, term_id = 'wid', 'tid'
+                    layer = element
+                    # Free all layers before this one
+                    while element.getprevious() is not None:
+                        del root[0]
+                else:
+                    todo.remove(tag)
+                    layer = None
+                    element.clear()
+                    if not todo:
+                        break
+                continue
+
+            if event != 'end' or layer is None or \
+               element.getparent() is not layer or \
+               tag != self.ITEMS[layer.tag]:
+                continue
+
+            if tag == 'wf':
+                layers.words.append({
+                    'id': element.get(token_id),
+                    'word': element.text,
+                    'sentence': self.sentence_number(
+                        element,
+                        token_id,
+                        source
+                    ),
+                })
+            elif tag == 'term':
+                span = element.find('span')
+                layers.terms[element.get(term_id)] = () if span is None \
+                    else tuple(self.span_ids(span))
+            else:
+                layers.corefs.append(
+                    list(map(self.span_ids, element.iterfind('span')))
+                )
+            # Free the memory of this and all previous items
+            element.clear()
+            while element.getprevious() is not None:
+                del layer[0]
+        del events
+        return layers
+
+    @staticmethod
+    def sentence_number(element, token_id, source):
+        """
+        Get the sentence number of a `wf` element of `source`.
+
+        Raises a ValidationError if it is missing or not a number.
+        """
+        sentence = element.get('sent')
+        try:
+            return int(sentence)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                f"The token {element.get(token_id)!r} on line"
+                f" {element.sourceline} of {getattr(source, 'name', source)}"
+                f" should have a sentence number (`sent`), found: {sentence!r}"
+            ) from None
+
+    @staticmethod
+    def span_ids(span):
+        """
+        Get the IDs of the targets of a span element
+        """
+        return [target.get('id') for target in span.iterfind('target')]
+
+    @staticmethod
+    def extract_words(layers):
+        return iter(layers.words)
+
+    @staticmethod
+    def coref_spans(layers):
+        return iter(layers.corefs)
+
+    @staticmethod
+    def term_index(layers):
+        """
+        Get the term ID -> token IDs index that `parse` built while reading
+        the terms layer.
+        """
+        return layers.terms
+
+    @classmethod
+    def token_ids_from_term_ids(cls, term_ids, layers, term_index=None):
+        """
+        Get a token IDs, given a list of term IDs
+        """
+        return super(NAFStreamReader, cls).token_ids_from_term_ids(
+            term_ids,
+            layers,
+            layers.terms if term_index is None else term_index
+        )
@@ -0,0 +1,87 @@
+import io
+import os
+import pstats
+import cProfile
+import logging
+
+from . import constants as c
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+def run_profiled(filename, function, *args, **kwargs):
+    """
+    Call `function(*args, **kwargs)` and return its result.
+
+    If `filename` is not None, the call is profiled using cProfile and the
+    statistics are saved to `filename`, also when `function` raises an error.
+    """
+    if filename is None:
+        return function(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        profiler.dump_stats(filename)
+
+
+class Profiles:
+    """
+    The cProfile statistics files of the documents converted in one run,
+    which are saved in `directory`.
+
+    Every document gets its own file (see `filename`), whether it is
+    converted in this process or in a worker process. `report` merges the
+    files into one report of the functions that took the most time.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.files = []
+        self._used = set()
+
+    def filename(self, name):
+        """
+        Get a new file to save the statistics of document `name` to.
+        """
+        filename = os.path.join(self.directory, name + c.PROFILE_EXTENSION)
+        number = 1
+        # Documents in different directories can have the same name
+        while filename in self._used:
+            number += 1
+            filename = os.path.join(
+                self.directory,
+                f'{name}.{number}{c.PROFILE_EXTENSION}'
+            )
+        self._used.add(filename)
+        self.files.append(filename)
+        return filename
+
+    def report(self, top=c.PROFILE_TOP, filename=c.PROFILE_REPORT):
+        """
+        Merge the statistics of all documents and save the `top` functions
+        by own time and by cumulative time to `filename` in `directory`.
+
+        Returns the path of the report, or None if no document was profiled.
+        """
+        files = [f for f in self.files if os.path.exists(f)]
+        if not files:
+            logger.info("No documents were profiled")
+            return None
+
+        out = io.StringIO()
+        stats = pstats.Stats(*files, stream=out).strip_dirs()
+        out.write(
+            f"Merged profile of {len(files)} documents,"
+            f" saved in {self.directory}\n"
+        )
+        for sort_key in ['tottime', 'cumulative']:
+            out.write(f"\n=== Top {top} functions by {sort_key} ===\n")
+            stats.sort_stats(sort_key).print_stats(top)
+
+        report = os.path.join(self.directory, filename)
+        with open(report, 'w') as fd:
+            fd.write(out.getvalue())
+        logger.info(f"Profile report saved in {report}")
+        return report
@@ -9,6 +9,14 @@ class ValidationError(ValueError):
     pass
 
 
+class WorkerError(Exception):
+    """
+    Replaces an exception raised in a worker process that cannot be pickled
+    and therefore cannot be sent to the main process as is.
+    """
+    pass
+
+
 def file_exists(filename):
     """
     Ensure a path exists
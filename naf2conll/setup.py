@@ -1,12 +1,19 @@
+import re
+
 from setuptools import setup, find_packages
 
 
 with open('README.md') as f:
     readme = f.read()
 
+# The version is only set in the package, which also uses it (e.g. to
+# invalidate the manifests of incremental conversions)
+with open('naf2conll/__init__.py') as f:
+    version = re.search(r"^__version__ = '(.*)'$", f.read(), re.M).group(1)
+
 setup(
     name='naf2conll',
-    version='1.0.1',
+    version=version,
     description='Script to convert files in NAF format to CoNLL format',
     long_description=readme,
     long_description_content_type="text/markdown",
@@ -16,6 +23,7 @@ setup(
     packages=find_packages(exclude=('tests', 'docs')),
     install_requires=[
         "KafNafParserPy>=1.88",
+        "lxml",
         "pyaml>=17.12.1",
     ],
     classifiers=[
@@ -1,9 +1,12 @@
 import os
+import json
 import sys
+import shutil
 import logging
 import subprocess
 
 from naf2conll.main import Main
+from naf2conll.conll_index import CoNLLReader
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -139,3 +142,208 @@ def test_not_fill_spans(caplog, naffile_not_consec_coref):
         if os.path.exists(output_file):
             os.remove(output_file)
     assert res.returncode != 0
+
+
+def test_jobs(caplog, resources_dir):
+    caplog.set_level(logging.DEBUG)
+    output_dir = 'output_dir'
+    parallel_output_dir = 'parallel_output_dir'
+    try:
+        Main.main([output_dir, '-d', resources_dir])
+        Main.main([parallel_output_dir, '-d', resources_dir, '--jobs', '2'])
+        assert sorted(os.listdir(output_dir)) == \
+            sorted(os.listdir(parallel_output_dir))
+        for name in os.listdir(output_dir):
+            with open(os.path.join(output_dir, name)) as fd:
+                expected = fd.read()
+            with open(os.path.join(parallel_output_dir, name)) as fd:
+                assert fd.read() == expected
+    finally:
+        for directory in [output_dir, parallel_output_dir]:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+
+
+def test_incremental(caplog, resources_dir):
+    caplog.set_level(logging.INFO)
+    output_dir = 'output_dir'
+    try:
+        Main.main([output_dir, '-d', resources_dir, '-i'])
+        assert "Skipping 0 documents that are up to date" in caplog.messages
+        outputs = sorted(
+            name
+            for name in os.listdir(output_dir)
+            if name.endswith('.conll')
+        )
+
+        caplog.clear()
+        Main.main([output_dir, '-d', resources_dir, '-i'])
+        assert f"Skipping {len(outputs)} documents that are up to date" in \
+            caplog.messages
+    finally:
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+
+
+def test_stats(caplog, resources_dir):
+    output_dir = 'output_dir'
+    stats_file = 'stats.jsonl'
+    try:
+        Main.main([output_dir, '-d', resources_dir, '--stats', stats_file])
+        with open(stats_file) as fd:
+            *documents, summary = [json.loads(line) for line in fd]
+        assert documents
+        assert all(line['type'] == 'document' for line in documents)
+        assert summary['type'] == 'summary'
+        assert summary['documents'] == len(documents)
+        for line in documents:
+            assert set(line['stages']) >= \
+                {'parse', 'read', 'read_coref', 'convert', 'write'}
+        assert summary['counts']['chains'] == \
+            sum(line['counts']['chains'] for line in documents)
+    finally:
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        if os.path.exists(stats_file):
+            os.remove(stats_file)
+
+
+def test_profile(caplog, naffile_coref):
+    output_file = 'output.conll'
+    profile_dir = 'profile_dir'
+    try:
+        Main.main([output_file, naffile_coref, '--profile', profile_dir])
+        assert sorted(os.listdir(profile_dir)) == [
+            os.path.basename(naffile_coref) + '.prof',
+            'report.txt'
+        ]
+        with open(os.path.join(profile_dir, 'report.txt')) as fd:
+            assert "single_main" in fd.read()
+    finally:
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        if os.path.exists(profile_dir):
+            shutil.rmtree(profile_dir)
+
+
+def test_reuse_reader_and_writer():
+    assert Main.get_reader('stream', True) is Main.get_reader('stream', True)
+    assert Main.get_reader('stream', True) is not \
+        Main.get_reader('stream', False)
+    columns = ['word_number', 'word']
+    writer = Main.get_writer(columns=columns)
+    assert Main.get_writer(columns=columns) is writer
+    assert Main.get_writer(columns=list(columns)) is not writer
+
+
+def test_shared_kwargs():
+    kwargs = {'validate': True}
+    tasks = [('a', 'dir', ('a.conll', 'a.naf'), kwargs),
+             ('b', 'dir', ('b.conll', 'b.naf'), kwargs)]
+    assert Main.shared_kwargs(tasks) is kwargs
+    tasks.append(('c', 'dir', ('c.conll', 'c.naf'), {'validate': False}))
+    assert Main.shared_kwargs(tasks) == {}
+
+
+def test_shards(resources_dir, default_config):
+    output_dir = 'output_dir'
+    sharded_output_dir = 'sharded_output_dir'
+    config_file = 'shard_config.yml'
+    try:
+        Main.main(['-c', default_config, output_dir, '-d', resources_dir])
+        with open(default_config) as fd:
+            config = fd.read()
+        with open(config_file, 'w') as fd:
+            fd.write(config.replace('shard_documents: null',
+                                    'shard_documents: 1'))
+        Main.main(['-c', config_file, sharded_output_dir,
+                   '-d', resources_dir, '--jobs', '2'])
+
+        with open(os.path.join(sharded_output_dir, 'index.jsonl')) as fd:
+            index = [json.loads(line) for line in fd]
+        # Documents that cannot be converted are skipped in both cases
+        assert sorted(entry['name'] for entry in index) == sorted(
+            name[:-len('.conll')] + '.naf' for name in os.listdir(output_dir)
+        )
+        assert len(index) == 2
+        assert sorted(os.listdir(sharded_output_dir)) == \
+            ['index.jsonl', 'shard-00000.conll', 'shard-00001.conll']
+        for entry in index:
+            with open(os.path.join(sharded_output_dir, entry['shard']),
+                      'rb') as fd:
+                fd.seek(entry['offset'])
+                data = fd.read(entry['length'])
+            output_file = os.path.join(
+                output_dir,
+                entry['name'][:-len('.naf')] + '.conll'
+            )
+            with open(output_file, 'rb') as fd:
+                assert data == fd.read()
+    finally:
+        for directory in [output_dir, sharded_output_dir]:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+        if os.path.exists(config_file):
+            os.remove(config_file)
+
+
+def test_shards_jobs(tmp_path, resources_dir, default_config):
+    output_dirs = ['sharded_output_dir_1', 'sharded_output_dir_2']
+    config_file = 'shard_config.yml'
+    # The larger document comes last, so scheduling the largest documents
+    # first would change the order
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    shutil.copy(os.path.join(resources_dir, 'no_coref.naf'),
+                input_dir / 'a.naf')
+    shutil.copy(os.path.join(resources_dir, 'coref.naf'),
+                input_dir / 'b.naf')
+    try:
+        with open(default_config) as fd:
+            config = fd.read()
+        with open(config_file, 'w') as fd:
+            fd.write(config.replace('shard_documents: null',
+                                    'shard_documents: 1'))
+        for jobs, output_dir in zip(['1', '2'], output_dirs):
+            Main.main(['-c', config_file, output_dir,
+                       '-d', str(input_dir), '--jobs', jobs])
+
+        # The shards do not depend on the number of jobs
+        names = sorted(os.listdir(output_dirs[0]))
+        assert sorted(os.listdir(output_dirs[1])) == names
+        for name in names:
+            contents = []
+            for output_dir in output_dirs:
+                with open(os.path.join(output_dir, name), 'rb') as fd:
+                    contents.append(fd.read())
+            assert contents[0] == contents[1]
+    finally:
+        for directory in output_dirs:
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+        if os.path.exists(config_file):
+            os.remove(config_file)
+
+
+def test_conll_index(naffile_coref, default_config):
+    output_file = 'output.conll'
+    config_file = 'index_config.yml'
+    try:
+        with open(default_config) as fd:
+            config = fd.read()
+        with open(config_file, 'w') as fd:
+            fd.write(config.replace('conll_index: false',
+                                    'conll_index: true'))
+        Main.main(['-c', config_file, output_file, naffile_coref])
+        assert os.path.exists(output_file + '.idx')
+        with open(output_file, 'rb') as fd:
+            data = fd.read()
+        with CoNLLReader(output_file) as reader:
+            assert list(reader) == ['coref']
+            assert reader.raw('coref') == data
+            assert len(reader.sentences('coref')) == \
+                data.count(b'\n\n')
+    finally:
+        for filename in [output_file, output_file + '.idx', config_file]:
+            if os.path.exists(filename):
+                os.remove(filename)
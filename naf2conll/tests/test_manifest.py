@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+
+from naf2conll import __version__
+from naf2conll.manifest import Manifest
+
+
+def convert(manifest, kwargs, tmp_path):
+    """
+    Get the names of the tasks `manifest` says are outdated and record
+    them as converted.
+    """
+    output_file = tmp_path / 'doc.conll'
+    input_file = tmp_path / 'doc.xml'
+    input_file.write_text('<doc/>')
+    task = ('doc', str(tmp_path), (str(output_file), str(input_file)), kwargs)
+    outdated = list(manifest.outdated([task]))
+    for task in outdated:
+        output_file.write_text('output\n')
+        manifest.done(task)
+    return [name for name, _, _, _ in outdated]
+
+
+def test_unhashed_keys(tmp_path):
+    manifest = Manifest(str(tmp_path / 'manifest.json'), str(tmp_path))
+    kwargs = {
+        'uniqueyfy': True,
+        'output_flush_size': 1 << 20,
+        'atomic_output': False,
+    }
+    assert convert(manifest, kwargs, tmp_path) == ['doc']
+
+    kwargs = dict(kwargs, output_flush_size=0, atomic_output=True)
+    assert convert(manifest, kwargs, tmp_path) == []
+
+    kwargs = dict(kwargs, uniqueyfy=False)
+    assert convert(manifest, kwargs, tmp_path) == ['doc']
+
+
+def test_version():
+    # setup.py takes the version that invalidates the manifests from the
+    # package
+    setup_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    res = subprocess.run(
+        [sys.executable, 'setup.py', '--version'],
+        cwd=setup_dir,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    assert res.stdout.split()[-1] == __version__
@@ -1,4 +1,11 @@
-from naf2conll.naf_readers import NAFReader
+import io
+import os
+
+import pytest
+from lxml import etree
+
+from naf2conll.naf_readers import NAFReader, NAFStreamReader, TermIndex
+from naf2conll.util import ValidationError
 
 
 def test_extract_coref_sets(nafobj):
@@ -42,3 +49,75 @@ def test_token_ids_from_term_ids(nafobj):
     ))
     expected_ids = list(map(Cwf.get_id, nafobj.get_tokens()))
     assert calculated_ids == expected_ids
+
+
+def test_term_index(nafobj):
+    from KafNafParserPy import Cterm
+    term_ids = list(map(Cterm.get_id, nafobj.get_terms()))
+    term_index = TermIndex(nafobj)
+    assert not term_index
+    assert NAFReader.token_ids_from_term_ids(
+        term_ids[:3] + term_ids[:3],
+        nafobj,
+        term_index
+    ) == 2 * list(NAFReader.token_ids_from_term_ids(term_ids[:3], nafobj))
+    assert sorted(term_index) == sorted(term_ids[:3])
+    with pytest.raises(ValidationError):
+        NAFReader.token_ids_from_term_ids(['unknown'], nafobj, term_index)
+
+
+@pytest.mark.parametrize('filename', [
+    'coref.naf',
+    'no_coref.naf',
+    'not_consec_coref.naf',
+])
+def test_stream_reader(resources_dir, filename):
+    from KafNafParserPy import KafNafParser
+    naf_file = os.path.join(resources_dir, filename)
+    nafobj = KafNafParser(naf_file)
+    reader = NAFReader()
+    stream_reader = NAFStreamReader()
+    layers = stream_reader.parse(naf_file)
+
+    assert stream_reader.extract_sentences(layers) == \
+        reader.extract_sentences(nafobj)
+    assert list(stream_reader.extract_coref_sets(layers)) == [
+        [list(span) for span in refset]
+        for refset in reader.extract_coref_sets(nafobj)
+    ]
+
+
+def test_stream_reader_kaf():
+    kaf = io.BytesIO(
+        b'<KAF><text><wf wid="w1" sent="1">Een</wf><wf wid="w2" sent="1">'
+        b'test</wf></text><terms><term tid="t1"><span><target id="w1"/>'
+        b'<target id="w2"/></span></term></terms><coreferences>'
+        b'<coref coid="co1"><span><target id="t1"/></span></coref>'
+        b'<coref coid="co2"><span><target id="t2"/></span></coref>'
+        b'</coreferences></KAF>'
+    )
+    reader = NAFStreamReader()
+    layers = reader.parse(kaf)
+    assert [word['id'] for word in layers.words] == ['w1', 'w2']
+    coref_sets = reader.extract_coref_sets(layers)
+    assert next(coref_sets) == [['w1', 'w2']]
+    with pytest.raises(ValidationError):
+        next(coref_sets)
+
+
+@pytest.mark.parametrize('wf, message', [
+    (b'<wf id="w1">Een</wf>', "found: None"),
+    (b'<wf id="w1" sent="one">Een</wf>', "found: 'one'"),
+])
+def test_stream_reader_malformed(wf, message):
+    naf = io.BytesIO(
+        b'<NAF><text>\n' + wf + b'\n</text><terms/><coreferences/></NAF>'
+    )
+    with pytest.raises(ValidationError) as excinfo:
+        NAFStreamReader().parse(naf)
+    assert "'w1' on line 2" in str(excinfo.value)
+    assert message in str(excinfo.value)
+
+    # Not well-formed XML
+    with pytest.raises(etree.XMLSyntaxError):
+        NAFStreamReader().parse(io.BytesIO(b'<NAF><text><wf id="w1"></NAF>'))